@@ -0,0 +1,114 @@
+"""
+AGRUPADOR DE MICRO-LOTES
+Planificador opcional que reúne las predicciones individuales concurrentes en una cola
+y las evalúa juntas con una sola llamada a predict_proba, cuando se alcanza el tamaño
+máximo de lote o vence la espera máxima desde la primera solicitud encolada.
+Cambia un aumento acotado de la latencia por más predicciones por núcleo bajo carga.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metricas import Histograma
+
+# Límites superiores de los histogramas
+LIMITES_TAMANO_LOTE = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+LIMITES_ESPERA_MS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100)
+
+
+class _Solicitud:
+    __slots__ = ('version', 'solicitante', 'llegada', 'futuro')
+
+    def __init__(self, version, solicitante):
+        self.version = version
+        self.solicitante = solicitante
+        self.llegada = time.perf_counter()
+        self.futuro = Future()
+
+
+class AgrupadorPredicciones:
+    """
+    Evalúa en micro-lotes las predicciones de un solo solicitante.
+    - evaluar: función (version, lote) -> (predicciones, probabilidades), la misma que usa /predecir.
+    - max_lote: solicitudes por lote como máximo.
+    - espera_max: segundos que la primera solicitud de un lote puede esperar a las siguientes.
+    - timeout: segundos que una petición espera su resultado antes de fallar.
+    Las solicitudes de distintas versiones del modelo se evalúan en lotes separados.
+    """
+
+    def __init__(self, evaluar, max_lote=32, espera_max=0.002, timeout=5.0):
+        self.evaluar = evaluar
+        self.max_lote = max_lote
+        self.espera_max = espera_max
+        self.timeout = timeout
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._pid = None
+        self._candado = threading.Lock()
+        self.tamano_lote = Histograma(LIMITES_TAMANO_LOTE)
+        self.espera_ms = Histograma(LIMITES_ESPERA_MS)
+
+    def _asegurar_hilo(self):
+        # El hilo se arranca de forma perezosa (y se rearranca tras un fork)
+        if self._hilo is not None and self._pid == os.getpid() and self._hilo.is_alive():
+            return
+        with self._candado:
+            if self._hilo is not None and self._pid == os.getpid() and self._hilo.is_alive():
+                return
+            if self._pid != os.getpid():
+                self._cola = queue.Queue()
+            self._pid = os.getpid()
+            self._hilo = threading.Thread(target=self._bucle, name='agrupador-lotes', daemon=True)
+            self._hilo.start()
+
+    def predecir(self, version, solicitante):
+        """Encola un solicitante y bloquea hasta su (predicción, probabilidades)"""
+        self._asegurar_hilo()
+        solicitud = _Solicitud(version, solicitante)
+        self._cola.put(solicitud)
+        return solicitud.futuro.result(timeout=self.timeout)
+
+    def _bucle(self):
+        while True:
+            lote = [self._cola.get()]
+            limite = lote[0].llegada + self.espera_max
+            while len(lote) < self.max_lote:
+                restante = limite - time.perf_counter()
+                try:
+                    lote.append(self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            self._despachar(lote)
+
+    def _despachar(self, lote):
+        inicio = time.perf_counter()
+        grupos = {}
+        for solicitud in lote:
+            grupos.setdefault(id(solicitud.version), []).append(solicitud)
+
+        for solicitud in lote:
+            self.espera_ms.observar((inicio - solicitud.llegada) * 1000)
+        for grupo in grupos.values():
+            self.tamano_lote.observar(len(grupo))
+
+        for grupo in grupos.values():
+            try:
+                predicciones, probabilidades = self.evaluar(grupo[0].version, [s.solicitante for s in grupo])
+            except Exception as e:
+                for solicitud in grupo:
+                    solicitud.futuro.set_exception(e)
+                continue
+            for solicitud, prediccion, probabilidad in zip(grupo, predicciones, probabilidades):
+                solicitud.futuro.set_result((prediccion, probabilidad))
+
+    def metricas(self):
+        """Configuración y distribuciones de tamaño de lote y espera en cola (ms)"""
+        return {
+            'max_lote': self.max_lote,
+            'espera_max_ms': self.espera_max * 1000,
+            'pendientes': self._cola.qsize(),
+            'tamano_lote': self.tamano_lote.describir(),
+            'espera_cola_ms': self.espera_ms.describir()
+        }
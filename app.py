@@ -2,141 +2,336 @@
 APLICACIÓN WEB DE PREDICCIÓN DE MOROSIDAD
 Sistema web para predecir morosidad crediticia usando el modelo entrenado
 """
-from flask import Flask, render_template, request, jsonify
-import joblib
-import pandas as pd
+import time
+INICIO_ARRANQUE = time.perf_counter()
+
+from flask import Flask, render_template, request, jsonify, Response
 import numpy as np
 import os
-from datetime import datetime
+import atexit
 import json
+from datetime import datetime
+from registro_modelos import RegistroModelos, SOLICITANTE_PRUEBA
+from registro_predicciones import RegistroPredicciones
+from estadisticas_vivas import AgregadorEstadisticas
+from metricas import RegistroMetricas, lineas_metrica
+from agrupador_lotes import AgrupadorPredicciones
+from cache_predicciones import CachePredicciones, clave_solicitante
+from esquema import (ValidadorEsquema, OPCIONES_CATEGORICAS, CAMPOS_REQUERIDOS, NIVELES_RIESGO,
+                     clasificar_riesgo, resumen_errores)
 
 app = Flask(__name__)
 
+# Tiempos de arranque reportados por /salud (pandas y sklearn se importan solo cuando hacen falta)
+TIEMPOS_ARRANQUE = {'importaciones_s': time.perf_counter() - INICIO_ARRANQUE}
+listo = False
+
+# Usar el motor compilado (sin pandas/ColumnTransformer) cuando el modelo lo permita
+USAR_MOTOR_RAPIDO = os.environ.get('MOROSIDAD_MOTOR_RAPIDO', '1') != '0'
+
+# Log de predicciones (JSON Lines escrito por un hilo en segundo plano)
+registro = RegistroPredicciones(
+    log_dir='logs',
+    politica_fsync=os.environ.get('MOROSIDAD_LOG_FSYNC', 'lote')
+)
+
+# Estadísticas del día en memoria; la instantánea se guarda desde el hilo del registro
+agregador = AgregadorEstadisticas(log_dir='logs', intervalo_snapshot=5.0)
+print(f"Estadísticas del día recuperadas desde: {agregador.cargar()}")
+registro.tareas_periodicas.append(agregador.guardar_snapshot)
+atexit.register(agregador.guardar_snapshot, True)
+
+# Métricas del camino caliente, expuestas en /api/metricas con formato Prometheus
+metricas = RegistroMetricas(prefijo='morosidad')
+ETAPAS_PREDICCION = ('lectura_json', 'validacion', 'cache', 'modelo', 'resultado',
+                     'log_estadisticas', 'log_encolado', 'serializacion', 'total')
+tiempo_etapa = {etapa: metricas.histograma('predecir_etapa_segundos', 'Duración de cada etapa de /predecir',
+                                           etapa=etapa) for etapa in ETAPAS_PREDICCION}
+tiempo_lote = metricas.histograma('predecir_lote_segundos', 'Duración total de /predecir/lote')
+predicciones_total = {endpoint: metricas.contador('predicciones_total', 'Solicitantes evaluados por endpoint',
+                                                  endpoint=endpoint) for endpoint in ('predecir', 'predecir_lote')}
+riesgo_total = {nivel: metricas.contador('predicciones_riesgo_total', 'Solicitantes evaluados por nivel de riesgo',
+                                         riesgo=nivel) for nivel in NIVELES_RIESGO}
+
+def medir_etapa(etapa, desde):
+    """Registra el tiempo transcurrido desde 'desde' en la etapa y devuelve el instante actual"""
+    ahora = time.perf_counter()
+    tiempo_etapa[etapa].observar(ahora - desde)
+    return ahora
+
+def contar_error(tipo, cantidad=1):
+    """Cuenta errores por tipo (en los lotes, uno por solicitante rechazado)"""
+    metricas.contador('errores_total', 'Errores por tipo', tipo=tipo).incrementar(cantidad)
+
+# Flujo SSE de estadísticas: máximo de eventos por segundo y latido para mantener la conexión
+SSE_MAX_EVENTOS_POR_SEGUNDO = 2
+SSE_LATIDO_S = 15
+
+# Registro de modelos: versiones residentes y recarga en caliente desde 'output'
+VIGILAR_MODELOS = os.environ.get('MOROSIDAD_VIGILAR_MODELOS', '1') != '0'
+modelos = RegistroModelos(
+    output_dir='output',
+    max_versiones=int(os.environ.get('MOROSIDAD_MAX_VERSIONES', '3')),
+    intervalo_sondeo=10.0,
+    compilar=USAR_MOTOR_RAPIDO,
+    mmap=os.environ.get('MOROSIDAD_MMAP', '1') != '0',
+    arranque_rapido=os.environ.get('MOROSIDAD_ARRANQUE_RAPIDO', '1') != '0'
+)
+
 # Cargar el modelo entrenado más reciente
 def cargar_modelo_mas_reciente():
-    """Carga el modelo más reciente del directorio output"""
-    output_dir = 'output'
-    modelos = [f for f in os.listdir(output_dir) if f.startswith('model_pipeline_final') and f.endswith('.joblib')]
-    
-    if not modelos:
-        raise FileNotFoundError("No se encontró ningún modelo entrenado en el directorio 'output'")
-    
-    # Ordenar por fecha (más reciente primero)
-    modelos.sort(reverse=True)
-    modelo_path = os.path.join(output_dir, modelos[0])
-    
-    print(f"Cargando modelo: {modelo_path}")
-    return joblib.load(modelo_path), modelos[0]
+    """Carga y activa el modelo más reciente del directorio output"""
+    version = modelos.cargar_mas_reciente()
+    if version.motor is not None:
+        print("Motor de inferencia rápida compilado.")
+    return version
 
-# Cargar el modelo al iniciar la aplicación
-try:
-    modelo, modelo_nombre = cargar_modelo_mas_reciente()
-    print(f"Modelo cargado exitosamente: {modelo_nombre}")
-except Exception as e:
-    print(f"Error al cargar el modelo: {e}")
-    modelo = None
-    modelo_nombre = None
-
-# Definir las opciones categóricas válidas
-OPCIONES_CATEGORICAS = {
-    'genero': ['M', 'F'],
-    'zona': ['Urbana', 'Rural'],
-    'tipo_empleo': ['Dependiente', 'Independiente', 'Agricola', 'Gobierno'],
-    'destino_credito': ['Consumo', 'Comercial', 'Agricola'],
-    'tipo_garantia': ['Ninguna', 'Vehiculo', 'Inmueble']
-}
+def calentar_modelo(version):
+    """
+    Ejecuta una predicción completa (conversión, modelo y armado de respuesta) para
+    que la primera petición real no pague inicializaciones perezosas.
+    """
+    solicitante, _ = validador.validar(SOLICITANTE_PRUEBA)
+    predicciones, probabilidades = predecir_probabilidades(version, [solicitante])
+    construir_resultado(SOLICITANTE_PRUEBA, predicciones[0], probabilidades[0],
+                        datetime.now().strftime("%Y-%m-%d %H:%M:%S"), version.nombre)
+
+@app.before_request
+def iniciar_vigilancia_modelos():
+    """Arranca la vigilancia del directorio de modelos en el proceso que atiende peticiones"""
+    if VIGILAR_MODELOS:
+        modelos.iniciar_vigilancia()
+
+@app.route('/salud')
+def salud():
+    """Preparación del proceso: modelo cargado, calentamiento y tiempos de arranque"""
+    activo = modelos.activo
+    estado = {
+        'listo': listo and activo is not None,
+        'modelo': activo.describir() if activo is not None else None,
+        'tiempos': TIEMPOS_ARRANQUE,
+        'pid': os.getpid()
+    }
+    return jsonify(estado), 200 if estado['listo'] else 503
+
+def seleccionar_modelo():
+    """
+    Versión del modelo para la petición: cabecera X-Modelo-Version o parámetro ?modelo=,
+    o la versión activa. La referencia se toma una vez para que un cambio en caliente
+    no afecte a la petición en curso.
+    """
+    nombre = request.headers.get('X-Modelo-Version') or request.args.get('modelo')
+    return modelos.obtener(nombre)
 
 @app.route('/')
 def index():
     """Página principal con el formulario de predicción"""
     return render_template('index.html', 
                          opciones=OPCIONES_CATEGORICAS,
-                         modelo_nombre=modelo_nombre)
+                         modelo_nombre=modelos.nombre_activo())
+
+# Máximo de solicitantes aceptados en una petición de lote
+MAX_FILAS_LOTE = 1000
+
+# Validador compilado del esquema compartido con el entrenamiento
+validador = ValidadorEsquema()
+
+def predecir_probabilidades(version, lote):
+    """
+    Evalúa un lote (lista de registros, arreglo estructurado o DataFrame) con una única llamada al modelo
+    y deriva las clases de las probabilidades.
+    """
+    probabilidades = version.predict_proba(lote)
+    predicciones = version.classes_[probabilidades.argmax(axis=1)]
+    return predicciones, probabilidades
+
+# Micro-lotes opcionales: las predicciones individuales concurrentes se evalúan juntas
+agrupador_lotes = None
+if os.environ.get('MOROSIDAD_MICROLOTES', '0') == '1':
+    agrupador_lotes = AgrupadorPredicciones(
+        predecir_probabilidades,
+        max_lote=int(os.environ.get('MOROSIDAD_MICROLOTES_MAX', '32')),
+        espera_max=float(os.environ.get('MOROSIDAD_MICROLOTES_ESPERA_MS', '2')) / 1000
+    )
+
+# Caché LRU + TTL de predicciones individuales (MOROSIDAD_CACHE_MAX=0 la desactiva)
+cache_predicciones = None
+if int(os.environ.get('MOROSIDAD_CACHE_MAX', '1024')) > 0:
+    cache_predicciones = CachePredicciones(
+        max_entradas=int(os.environ.get('MOROSIDAD_CACHE_MAX', '1024')),
+        ttl=float(os.environ.get('MOROSIDAD_CACHE_TTL', '300'))
+    )
+    modelos.al_cambiar.append(cache_predicciones.invalidar)
+
+def evaluar_solicitante(version, solicitante):
+    """Predicción de un solicitante ya validado: caché, micro-lote o llamada directa al modelo"""
+    clave = None
+    marca = time.perf_counter()
+    if cache_predicciones is not None:
+        clave = clave_solicitante(solicitante, CAMPOS_REQUERIDOS, version.nombre)
+        guardado = cache_predicciones.obtener(clave)
+        marca = medir_etapa('cache', marca)
+        if guardado is not None:
+            return guardado
+    
+    if agrupador_lotes is not None:
+        prediccion, probabilidad = agrupador_lotes.predecir(version, solicitante)
+    else:
+        predicciones, probabilidades = predecir_probabilidades(version, [solicitante])
+        prediccion, probabilidad = predicciones[0], probabilidades[0]
+    medir_etapa('modelo', marca)
+    
+    resultado = (int(prediccion), tuple(float(p) for p in probabilidad))
+    if clave is not None:
+        cache_predicciones.guardar(clave, resultado)
+    return resultado
+
+def construir_resultado(datos, prediccion, probabilidad, timestamp, modelo_nombre):
+    """Arma el diccionario de respuesta para un solicitante evaluado"""
+    return {
+        'prediccion': int(prediccion),
+        'prediccion_texto': 'MOROSO' if prediccion == 1 else 'NO MOROSO',
+        'probabilidad_no_moroso': float(probabilidad[0]),
+        'probabilidad_moroso': float(probabilidad[1]),
+        'riesgo': clasificar_riesgo(probabilidad[1]),
+        'recomendacion': generar_recomendacion(prediccion, probabilidad[1]),
+        'datos_ingresados': datos,
+        'modelo': modelo_nombre,
+        'timestamp': timestamp
+    }
 
 @app.route('/predecir', methods=['POST'])
 def predecir():
     """Endpoint para realizar predicciones"""
     try:
-        if modelo is None:
+        inicio = time.perf_counter()
+        if modelos.activo is None:
+            contar_error('modelo_no_cargado')
             return jsonify({
                 'error': 'El modelo no está cargado. Por favor, entrena el modelo primero.'
             }), 500
         
-        # Obtener datos del formulario
-        datos = request.get_json()
-        
-        # Validar que todos los campos requeridos estén presentes
-        campos_requeridos = [
-            'edad', 'genero', 'zona', 'tipo_empleo', 'antiguedad', 'ingresos',
-            'score_crediticio', 'pagos_previos', 'creditos_previos', 'monto_credito',
-            'plazo_meses', 'destino_credito', 'tipo_garantia', 'valor_garantia',
-            'precio_soya', 'precio_vino', 'uso_productos'
-        ]
-        
-        campos_faltantes = [campo for campo in campos_requeridos if campo not in datos]
-        if campos_faltantes:
-            return jsonify({
-                'error': f'Campos faltantes: {", ".join(campos_faltantes)}'
-            }), 400
-        
-        # Crear DataFrame con los datos
-        df_input = pd.DataFrame([datos])
-        
-        # Convertir tipos de datos numéricos
-        columnas_numericas = [
-            'edad', 'antiguedad', 'ingresos', 'score_crediticio', 
-            'pagos_previos', 'creditos_previos', 'monto_credito', 
-            'plazo_meses', 'valor_garantia', 'precio_soya', 
-            'precio_vino', 'uso_productos'
-        ]
+        try:
+            version = seleccionar_modelo()
+        except KeyError:
+            contar_error('version_no_encontrada')
+            return jsonify({'error': 'La versión de modelo solicitada no está cargada.'}), 404
         
-        for col in columnas_numericas:
-            df_input[col] = pd.to_numeric(df_input[col], errors='coerce')
+        # Obtener datos del formulario
+        marca = time.perf_counter()
+        datos = request.get_json(silent=True)
+        marca = medir_etapa('lectura_json', marca)
         
-        # Verificar valores nulos después de la conversión
-        if df_input.isnull().any().any():
-            columnas_con_nulos = df_input.columns[df_input.isnull().any()].tolist()
+        # Validar tipos, rangos y categorías contra el esquema
+        solicitante, errores = validador.validar(datos)
+        marca = medir_etapa('validacion', marca)
+        if errores:
+            contar_error('validacion')
             return jsonify({
-                'error': f'Valores inválidos en: {", ".join(columnas_con_nulos)}'
+                'error': f'Datos inválidos: {resumen_errores(errores)}',
+                'errores': errores
             }), 400
         
-        # Realizar predicción
-        prediccion = modelo.predict(df_input)[0]
-        probabilidad = modelo.predict_proba(df_input)[0]
+        # Realizar predicción (desde la caché, en un micro-lote o con una sola llamada al modelo)
+        prediccion, probabilidad = evaluar_solicitante(version, solicitante)
         
         # Preparar respuesta
-        resultado = {
-            'prediccion': int(prediccion),
-            'prediccion_texto': 'MOROSO' if prediccion == 1 else 'NO MOROSO',
-            'probabilidad_no_moroso': float(probabilidad[0]),
-            'probabilidad_moroso': float(probabilidad[1]),
-            'riesgo': clasificar_riesgo(probabilidad[1]),
-            'recomendacion': generar_recomendacion(prediccion, probabilidad[1]),
-            'datos_ingresados': datos,
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
+        marca = time.perf_counter()
+        resultado = construir_resultado(
+            datos, prediccion, probabilidad,
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"), version.nombre
+        )
+        medir_etapa('resultado', marca)
+        predicciones_total['predecir'].incrementar()
         
         # Guardar predicción en log
         guardar_prediccion_log(resultado)
         
-        return jsonify(resultado)
+        marca = time.perf_counter()
+        respuesta = jsonify(resultado)
+        medir_etapa('serializacion', marca)
+        medir_etapa('total', inicio)
+        return respuesta
     
     except Exception as e:
+        contar_error('interno')
         print(f"Error en predicción: {str(e)}")
         return jsonify({
             'error': f'Error al procesar la predicción: {str(e)}'
         }), 500
 
-def clasificar_riesgo(probabilidad_moroso):
-    """Clasifica el riesgo basado en la probabilidad de morosidad"""
-    if probabilidad_moroso < 0.2:
-        return 'BAJO'
-    elif probabilidad_moroso < 0.5:
-        return 'MEDIO'
-    elif probabilidad_moroso < 0.7:
-        return 'ALTO'
-    else:
-        return 'MUY ALTO'
+@app.route('/predecir/lote', methods=['POST'])
+def predecir_lote():
+    """Endpoint para evaluar un lote de solicitantes con una sola llamada al modelo"""
+    try:
+        inicio = time.perf_counter()
+        if modelos.activo is None:
+            contar_error('modelo_no_cargado')
+            return jsonify({
+                'error': 'El modelo no está cargado. Por favor, entrena el modelo primero.'
+            }), 500
+        
+        try:
+            version = seleccionar_modelo()
+        except KeyError:
+            contar_error('version_no_encontrada')
+            return jsonify({'error': 'La versión de modelo solicitada no está cargada.'}), 404
+        
+        filas = request.get_json(silent=True)
+        
+        if not isinstance(filas, list) or not filas:
+            contar_error('lote_invalido')
+            return jsonify({
+                'error': 'Se esperaba un arreglo JSON con al menos un solicitante.'
+            }), 400
+        
+        if len(filas) > MAX_FILAS_LOTE:
+            contar_error('lote_invalido')
+            return jsonify({
+                'error': f'El lote excede el máximo de {MAX_FILAS_LOTE} solicitantes.'
+            }), 400
+        
+        validos, indices, errores = validador.validar_lote(filas)
+        
+        # Realizar la predicción de todo el lote válido de una vez
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        resultados = [None] * len(filas)
+        evaluados = []
+        
+        if len(validos):
+            predicciones, probabilidades = predecir_probabilidades(version, validos)
+            for indice, prediccion, probabilidad in zip(indices, predicciones, probabilidades):
+                resultado = construir_resultado(filas[indice], prediccion, probabilidad, timestamp, version.nombre)
+                evaluados.append(resultado)
+                resultados[indice] = {'indice': int(indice), **resultado}
+        
+        predicciones_total['predecir_lote'].incrementar(len(evaluados))
+        if errores:
+            contar_error('validacion_lote', len(errores))
+        
+        for indice, por_campo in errores.items():
+            resultados[indice] = {'indice': indice, 'error': resumen_errores(por_campo), 'errores': por_campo}
+        
+        # Guardar las predicciones del lote en una sola escritura
+        if evaluados:
+            guardar_predicciones_log(evaluados)
+        
+        tiempo_lote.observar(time.perf_counter() - inicio)
+        return jsonify({
+            'total': len(filas),
+            'procesados': len(evaluados),
+            'con_errores': len(errores),
+            'resultados': resultados,
+            'modelo': version.nombre,
+            'timestamp': timestamp
+        })
+    
+    except Exception as e:
+        contar_error('interno')
+        print(f"Error en predicción por lote: {str(e)}")
+        return jsonify({
+            'error': f'Error al procesar el lote: {str(e)}'
+        }), 500
 
 def generar_recomendacion(prediccion, probabilidad_moroso):
     """Genera recomendaciones basadas en la predicción"""
@@ -156,88 +351,146 @@ def generar_recomendacion(prediccion, probabilidad_moroso):
             return "Riesgo moderado. Considere aprobar con límites reducidos y seguimiento cercano."
 
 def guardar_prediccion_log(resultado):
-    """Guarda las predicciones en un archivo de log"""
-    log_dir = 'logs'
-    os.makedirs(log_dir, exist_ok=True)
-    
-    log_file = os.path.join(log_dir, f'predicciones_{datetime.now().strftime("%Y%m%d")}.json')
-    
-    try:
-        # Leer predicciones existentes
-        if os.path.exists(log_file):
-            with open(log_file, 'r', encoding='utf-8') as f:
-                predicciones = json.load(f)
-        else:
-            predicciones = []
-        
-        # Añadir nueva predicción
-        predicciones.append(resultado)
-        
-        # Guardar
-        with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump(predicciones, f, indent=4, ensure_ascii=False)
-    except Exception as e:
-        print(f"Error al guardar log: {e}")
+    """Encola la predicción para el log del día (la escritura ocurre en segundo plano)"""
+    riesgo_total[resultado['riesgo']].incrementar()
+    marca = time.perf_counter()
+    agregador.registrar(resultado)
+    marca = medir_etapa('log_estadisticas', marca)
+    registro.registrar(resultado)
+    medir_etapa('log_encolado', marca)
+
+def guardar_predicciones_log(resultados):
+    """Encola varias predicciones para el log del día"""
+    for resultado in resultados:
+        riesgo_total[resultado['riesgo']].incrementar()
+    agregador.registrar_varios(resultados)
+    registro.registrar_varios(resultados)
 
 @app.route('/estadisticas')
 def estadisticas():
     """Página con estadísticas de predicciones"""
-    return render_template('estadisticas.html', modelo_nombre=modelo_nombre)
+    return render_template('estadisticas.html', modelo_nombre=modelos.nombre_activo())
 
 @app.route('/api/estadisticas')
 def api_estadisticas():
     """API para obtener estadísticas de las predicciones realizadas"""
     try:
-        log_dir = 'logs'
-        if not os.path.exists(log_dir):
-            return jsonify({'total': 0, 'morosos': 0, 'no_morosos': 0})
-        
-        # Leer todas las predicciones del día
-        log_file = os.path.join(log_dir, f'predicciones_{datetime.now().strftime("%Y%m%d")}.json')
-        
-        if not os.path.exists(log_file):
-            return jsonify({'total': 0, 'morosos': 0, 'no_morosos': 0})
-        
-        with open(log_file, 'r', encoding='utf-8') as f:
-            predicciones = json.load(f)
-        
-        total = len(predicciones)
-        morosos = sum(1 for p in predicciones if p['prediccion'] == 1)
-        no_morosos = total - morosos
-        
-        # Calcular promedios de probabilidad
-        if total > 0:
-            prob_moroso_promedio = np.mean([p['probabilidad_moroso'] for p in predicciones])
-        else:
-            prob_moroso_promedio = 0
-        
-        return jsonify({
-            'total': total,
-            'morosos': morosos,
-            'no_morosos': no_morosos,
-            'prob_moroso_promedio': float(prob_moroso_promedio),
-            'ultima_prediccion': predicciones[-1]['timestamp'] if predicciones else None
-        })
+        # Estadísticas acumuladas en memoria (O(1), sin leer los logs)
+        return jsonify(agregador.resumen())
     
     except Exception as e:
         print(f"Error al obtener estadísticas: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/estadisticas/stream')
+def api_estadisticas_stream():
+    """
+    Flujo Server-Sent Events con las estadísticas del día.
+    Se envía un evento cuando llegan predicciones; las ráfagas se agrupan
+    para no superar SSE_MAX_EVENTOS_POR_SEGUNDO por conexión.
+    """
+    def generar():
+        intervalo = 1.0 / SSE_MAX_EVENTOS_POR_SEGUNDO
+        version = None
+        ultimo_envio = 0.0
+        while True:
+            if version is not None and agregador.esperar_cambio(version, timeout=SSE_LATIDO_S) == version:
+                yield ': latido\n\n'
+                continue
+            
+            # Agrupar las predicciones que lleguen durante el intervalo mínimo
+            espera = intervalo - (time.monotonic() - ultimo_envio)
+            if espera > 0:
+                time.sleep(espera)
+            
+            datos = agregador.resumen()
+            version = datos['version']
+            ultimo_envio = time.monotonic()
+            yield f"id: {version}\nevent: estadisticas\ndata: {json.dumps(datos)}\n\n"
+    
+    return Response(generar(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/modelos')
+def api_modelos():
+    """Versiones del modelo cargadas en memoria y la versión activa"""
+    return jsonify(modelos.describir())
+
+@app.route('/api/microlotes')
+def api_microlotes():
+    """Distribuciones de tamaño de lote y espera en cola del planificador de micro-lotes"""
+    if agrupador_lotes is None:
+        return jsonify({'activo': False})
+    return jsonify({'activo': True, **agrupador_lotes.metricas()})
+
+@app.route('/api/cache')
+def api_cache():
+    """Aciertos, fallos y tamaño de la caché de predicciones"""
+    if cache_predicciones is None:
+        return jsonify({'activo': False})
+    return jsonify({'activo': True, **cache_predicciones.metricas()})
+
+def recolectar_metricas():
+    """Métricas calculadas al exportar: modelo activo, log, caché y micro-lotes"""
+    lineas = lineas_metrica('morosidad_modelo_activo', 'gauge', 'Modelo activo (valor 1)',
+                            [({'modelo': modelos.nombre_activo() or ''}, 1)])
+    lineas += lineas_metrica('morosidad_modelos_residentes', 'gauge', 'Versiones del modelo cargadas en memoria',
+                             [({}, len(modelos.describir()['versiones']))])
+    lineas += lineas_metrica('morosidad_log_registros_total', 'counter', 'Predicciones escritas o descartadas en el log',
+                             [({'estado': 'escritos'}, registro.escritos), ({'estado': 'descartados'}, registro.descartados)])
+    if cache_predicciones is not None:
+        lineas += lineas_metrica('morosidad_cache_consultas_total', 'counter', 'Consultas a la caché de predicciones',
+                                 [({'resultado': 'acierto'}, cache_predicciones.aciertos),
+                                  ({'resultado': 'fallo'}, cache_predicciones.fallos)])
+    if agrupador_lotes is not None:
+        for nombre, ayuda, histograma in (
+                ('morosidad_microlote_tamano', 'Solicitudes por micro-lote', agrupador_lotes.tamano_lote),
+                ('morosidad_microlote_espera_ms', 'Espera en cola de cada solicitud (ms)', agrupador_lotes.espera_ms)):
+            lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} histogram'] + histograma.exportar(nombre)
+    return lineas
+
+metricas.recolectores.append(recolectar_metricas)
+
+@app.route('/api/metricas')
+def api_metricas():
+    """Métricas del proceso en formato de texto de Prometheus"""
+    return Response(metricas.exportar(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/about')
 def about():
     """Página con información del modelo"""
-    return render_template('about.html', modelo_nombre=modelo_nombre)
+    return render_template('about.html', modelo_nombre=modelos.nombre_activo())
 
 @app.route('/demo')
 def demo():
     """Página de demostración con perfiles pre-cargados"""
-    return render_template('demo.html', modelo_nombre=modelo_nombre)
+    return render_template('demo.html', modelo_nombre=modelos.nombre_activo())
+
+# Cada versión que se active en caliente también se calienta
+modelos.al_cambiar.append(calentar_modelo)
+
+# Cargar y calentar el modelo al iniciar la aplicación
+try:
+    inicio = time.perf_counter()
+    cargar_modelo_mas_reciente()
+    TIEMPOS_ARRANQUE['carga_modelo_s'] = time.perf_counter() - inicio
+    print(f"Modelo cargado exitosamente: {modelos.nombre_activo()}")
+    
+    inicio = time.perf_counter()
+    calentar_modelo(modelos.activo)
+    TIEMPOS_ARRANQUE['calentamiento_s'] = time.perf_counter() - inicio
+    listo = True
+except Exception as e:
+    print(f"Error al cargar el modelo: {e}")
+TIEMPOS_ARRANQUE['arranque_total_s'] = time.perf_counter() - INICIO_ARRANQUE
 
 if __name__ == '__main__':
     print("\n" + "="*70)
     print("SISTEMA DE PREDICCIÓN DE MOROSIDAD - AHORRO VALLE")
     print("="*70)
-    print(f"Modelo cargado: {modelo_nombre}")
+    print(f"Modelo cargado: {modelos.nombre_activo()}")
     print("Servidor iniciando en: http://127.0.0.1:5000")
     print("="*70 + "\n")
     
@@ -0,0 +1,67 @@
+"""
+BENCHMARK DE ARRANQUE
+Mide el tiempo hasta que app.py queda listo (modelo cargado y calentado) en procesos nuevos,
+comparando el arranque completo con el arranque rápido (motor compilado + mmap + importaciones diferidas).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODOS = {
+    'completo': {'MOROSIDAD_ARRANQUE_RAPIDO': '0', 'MOROSIDAD_MMAP': '0'},
+    'rapido': {'MOROSIDAD_ARRANQUE_RAPIDO': '1', 'MOROSIDAD_MMAP': '1'},
+}
+
+CODIGO = "import json, app; print('@@' + json.dumps(app.TIEMPOS_ARRANQUE))"
+
+
+def medir_arranque(entorno_extra, repeticiones):
+    """Lanza app.py en procesos nuevos y devuelve los tiempos de cada arranque"""
+    entorno = dict(os.environ, MOROSIDAD_VIGILAR_MODELOS='0', **entorno_extra)
+    mediciones = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        salida = subprocess.run([sys.executable, '-c', CODIGO], cwd=RAIZ, env=entorno,
+                                capture_output=True, text=True, check=True).stdout
+        total = time.perf_counter() - inicio
+        linea = next(l for l in salida.splitlines() if l.startswith('@@'))
+        tiempos = json.loads(linea[2:])
+        tiempos['proceso_s'] = total
+        mediciones.append(tiempos)
+    return mediciones
+
+
+def resumir(mediciones):
+    claves = mediciones[0].keys()
+    return {c: {'mediana': statistics.median(m[c] for m in mediciones),
+                'min': min(m[c] for m in mediciones),
+                'max': max(m[c] for m in mediciones)} for c in claves}
+
+
+def main(args):
+    # Un arranque previo genera el motor compilado que usa el modo rápido
+    medir_arranque(MODOS['completo'], 1)
+
+    reporte = {'repeticiones': args.repeticiones, 'modos': {}}
+    for modo, entorno in MODOS.items():
+        print(f"Midiendo arranque {modo}...", file=sys.stderr)
+        reporte['modos'][modo] = resumir(medir_arranque(entorno, args.repeticiones))
+
+    texto = json.dumps(reporte, indent=4)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    print(texto)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de tiempo de arranque del servicio")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Arranques medidos por modo.")
+    parser.add_argument("--salida", type=str, default=None, help="Archivo JSON donde guardar el reporte.")
+    main(parser.parse_args())
@@ -0,0 +1,264 @@
+"""
+BENCHMARK DE CARGA
+Generador de carga reproducible para /predecir y /predecir/lote.
+Los solicitantes sintéticos se muestrean (con semilla) de las distribuciones marginales de
+dataset_credito_morosidad.csv. La carga se aplica con concurrencia fija y, opcionalmente,
+a una tasa fija (las latencias se miden desde el instante programado, sin omisión coordinada),
+contra el cliente de pruebas de Flask (sin red), un servidor ya iniciado (--url) o un
+servidor.py iniciado por el propio benchmark (--servidor N).
+El reporte JSON incluye rendimiento y percentiles p50/p95/p99 para comparar versiones.
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from esquema import ESQUEMA
+from escalado import puerto_libre, esperar_listo
+
+
+# --- SOLICITANTES SINTÉTICOS ---
+
+def generar_solicitantes(n, ruta_dataset, semilla=42):
+    """
+    Muestrea n solicitantes columna por columna de las distribuciones del dataset.
+    Los numéricos continuos reciben un pequeño ruido para no repetir filas exactas;
+    los enteros y los rangos se ajustan al esquema.
+    """
+    rng = np.random.default_rng(semilla)
+    df = pd.read_csv(ruta_dataset)
+    columnas = {}
+    for campo in ESQUEMA:
+        valores = df[campo.nombre].dropna().to_numpy()
+        muestra = rng.choice(valores, size=n)
+        if campo.numerico:
+            muestra = muestra.astype(float)
+            if not campo.entero:
+                muestra = muestra * rng.normal(1.0, 0.02, size=n)
+            else:
+                muestra = np.round(muestra)
+            muestra = np.clip(muestra, campo.minimo if campo.minimo is not None else -np.inf,
+                              campo.maximo if campo.maximo is not None else np.inf)
+            columnas[campo.nombre] = [int(v) if campo.entero else round(float(v), 2) for v in muestra]
+        else:
+            columnas[campo.nombre] = [str(v) for v in muestra]
+    return [{nombre: columnas[nombre][i] for nombre in columnas} for i in range(n)]
+
+
+# --- CLIENTES ---
+
+class ClientePrueba:
+    """Peticiones al cliente de pruebas de Flask, en el mismo proceso"""
+
+    def __init__(self):
+        os.chdir(RAIZ)
+        import app
+        self.app = app
+        self._cliente = app.app.test_client()
+
+    def post(self, ruta, cuerpo):
+        respuesta = self._cliente.post(ruta, data=cuerpo, content_type='application/json')
+        return respuesta.status_code
+
+    def get_json(self, ruta):
+        return self._cliente.get(ruta).get_json()
+
+
+class ClienteHTTP:
+    """Peticiones HTTP con una conexión persistente por hilo"""
+
+    def __init__(self, url):
+        partes = urllib.parse.urlsplit(url)
+        self.host, self.puerto = partes.hostname, partes.port or 80
+        self._local = threading.local()
+
+    def _conexion(self):
+        if getattr(self._local, 'conexion', None) is None:
+            self._local.conexion = http.client.HTTPConnection(self.host, self.puerto, timeout=30)
+        return self._local.conexion
+
+    def post(self, ruta, cuerpo):
+        try:
+            conexion = self._conexion()
+            conexion.request('POST', ruta, body=cuerpo, headers={'Content-Type': 'application/json'})
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            return respuesta.status
+        except (OSError, http.client.HTTPException):
+            self._local.conexion = None
+            return 0
+
+    def get_json(self, ruta):
+        conexion = http.client.HTTPConnection(self.host, self.puerto, timeout=30)
+        try:
+            conexion.request('GET', ruta)
+            return json.loads(conexion.getresponse().read())
+        finally:
+            conexion.close()
+
+
+# --- GENERACIÓN DE CARGA ---
+
+def ejecutar_carga(cliente, ruta, cuerpos, concurrencia, tasa=None):
+    """
+    Envía los cuerpos con 'concurrencia' hilos. Con tasa (peticiones/s) cada petición tiene
+    un instante programado y su latencia se mide desde ese instante.
+    Devuelve (latencias en segundos, códigos de estado, duración total).
+    """
+    n = len(cuerpos)
+    latencias = np.zeros(n)
+    codigos = np.zeros(n, dtype=int)
+    siguiente = iter(range(n))
+    candado = threading.Lock()
+    inicio = time.perf_counter()
+
+    def trabajador():
+        while True:
+            with candado:
+                i = next(siguiente, None)
+            if i is None:
+                return
+            programado = time.perf_counter()
+            if tasa:
+                programado = inicio + i / tasa
+                espera = programado - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+            codigos[i] = cliente.post(ruta, cuerpos[i])
+            latencias[i] = time.perf_counter() - programado
+
+    hilos = [threading.Thread(target=trabajador) for _ in range(concurrencia)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return latencias, codigos, time.perf_counter() - inicio
+
+
+def resumir(latencias, codigos, duracion, solicitantes_por_peticion):
+    correctas = codigos == 200
+    ok = latencias[correctas] * 1000
+    return {
+        'peticiones': int(len(codigos)),
+        'errores': int((~correctas).sum()),
+        'codigos': {str(c): int((codigos == c).sum()) for c in np.unique(codigos)},
+        'duracion_s': duracion,
+        'peticiones_por_segundo': len(codigos) / duracion,
+        'solicitantes_por_segundo': int(correctas.sum()) * solicitantes_por_peticion / duracion,
+        'latencia_ms': {
+            'media': float(ok.mean()) if len(ok) else None,
+            'p50': float(np.percentile(ok, 50)) if len(ok) else None,
+            'p95': float(np.percentile(ok, 95)) if len(ok) else None,
+            'p99': float(np.percentile(ok, 99)) if len(ok) else None,
+            'max': float(ok.max()) if len(ok) else None
+        }
+    }
+
+
+def version_codigo():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(args):
+    servidor = None
+    if args.servidor:
+        puerto = puerto_libre()
+        args.url = f'http://127.0.0.1:{puerto}'
+        servidor = subprocess.Popen(
+            [sys.executable, 'servidor.py', '--trabajadores', str(args.servidor), '--host', '127.0.0.1',
+             '--puerto', str(puerto), '--sin_vigilancia', '--gracia', '5'],
+            cwd=RAIZ, env=dict(os.environ, MOROSIDAD_LOG_FSYNC='nunca'),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    try:
+        if args.url:
+            esperar_listo(args.url)
+            cliente = ClienteHTTP(args.url)
+            modo = 'servidor' if servidor else 'url'
+        else:
+            os.environ.setdefault('MOROSIDAD_VIGILAR_MODELOS', '0')
+            os.environ.setdefault('MOROSIDAD_LOG_FSYNC', 'nunca')
+            cliente = ClientePrueba()
+            modo = 'cliente_prueba'
+        salud = cliente.get_json('/salud')
+
+        reporte = {
+            'fecha': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'codigo': version_codigo(),
+            'modelo': (salud.get('modelo') or {}).get('nombre'),
+            'modo': modo,
+            'configuracion': {
+                'concurrencia': args.concurrencia, 'tasa': args.tasa, 'peticiones': args.peticiones,
+                'tamano_lote': args.tamano_lote, 'calentamiento': args.calentamiento, 'semilla': args.semilla,
+                'trabajadores': args.servidor
+            },
+            'resultados': {}
+        }
+
+        endpoints = ['predecir', 'lote'] if args.endpoint == 'ambos' else [args.endpoint]
+        for endpoint in endpoints:
+            por_peticion = 1 if endpoint == 'predecir' else args.tamano_lote
+            solicitantes = generar_solicitantes((args.peticiones + args.calentamiento) * por_peticion,
+                                                os.path.join(RAIZ, args.dataset), args.semilla)
+            if endpoint == 'predecir':
+                ruta = '/predecir'
+                cuerpos = [json.dumps(s) for s in solicitantes]
+            else:
+                ruta = '/predecir/lote'
+                cuerpos = [json.dumps(solicitantes[i:i + por_peticion])
+                           for i in range(0, len(solicitantes), por_peticion)]
+
+            print(f"Calentando {ruta}...", file=sys.stderr)
+            ejecutar_carga(cliente, ruta, cuerpos[:args.calentamiento], args.concurrencia)
+            print(f"Midiendo {ruta}: {args.peticiones} peticiones, concurrencia {args.concurrencia}"
+                  + (f", tasa {args.tasa}/s" if args.tasa else ''), file=sys.stderr)
+            latencias, codigos, duracion = ejecutar_carga(cliente, ruta, cuerpos[args.calentamiento:],
+                                                          args.concurrencia, args.tasa)
+            reporte['resultados'][endpoint] = resumir(latencias, codigos, duracion, por_peticion)
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            servidor.wait(timeout=30)
+
+    texto = json.dumps(reporte, indent=4)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    print(texto)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de carga de los endpoints de predicción")
+    parser.add_argument("--url", type=str, default=None,
+                        help="Servidor ya iniciado (p. ej. http://127.0.0.1:5000). Sin --url ni --servidor "
+                             "se usa el cliente de pruebas de Flask.")
+    parser.add_argument("--servidor", type=int, default=None,
+                        help="Inicia servidor.py con este número de trabajadores en un puerto libre.")
+    parser.add_argument("--endpoint", choices=['predecir', 'lote', 'ambos'], default='predecir')
+    parser.add_argument("--peticiones", type=int, default=2000, help="Peticiones medidas por endpoint.")
+    parser.add_argument("--calentamiento", type=int, default=50, help="Peticiones previas no medidas.")
+    parser.add_argument("--concurrencia", type=int, default=8, help="Peticiones simultáneas.")
+    parser.add_argument("--tasa", type=float, default=None,
+                        help="Peticiones por segundo (por defecto, tan rápido como responda el servicio).")
+    parser.add_argument("--tamano_lote", type=int, default=100, help="Solicitantes por petición de lote.")
+    parser.add_argument("--dataset", type=str, default="dataset_credito_morosidad.csv",
+                        help="Dataset del que se muestrean los solicitantes.")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", type=str, default=None, help="Archivo JSON donde guardar el reporte.")
+    main(parser.parse_args())
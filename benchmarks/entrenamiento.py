@@ -0,0 +1,68 @@
+"""
+BENCHMARK DE ENTRENAMIENTO
+Mide el tiempo de ajuste y la latencia de predict_proba de cada candidato del registro
+(candidatos.py) a medida que crece el historial: el dataset se remuestrea con reemplazo hasta
+cada tamaño pedido. Sirve para ver cómo escala cada modelo con las filas, algo que el CSV de
+ejemplo (4000 filas) no muestra.
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from candidatos import CANDIDATOS
+from morosidadTrain import ClasificadorMorosidad, _latencia_inferencia
+
+
+def medir(clf, filas, candidatos, semilla=42):
+    """Tiempo de ajuste (s) y latencia (ms por 1000 filas) por candidato con 'filas' de entrenamiento"""
+    # Se separa antes de remuestrear: validación no comparte filas con train (parada temprana honesta)
+    base_train, base_val = train_test_split(clf.df, test_size=0.15, stratify=clf.df[clf.target],
+                                            random_state=semilla)
+    n_val = max(int(filas * 0.15), 1)
+    train = base_train.sample(n=filas - n_val, replace=True, random_state=semilla)
+    val = base_val.sample(n=n_val, replace=True, random_state=semilla)
+    X_train, y_train = train.drop(columns=clf.target), train[clf.target]
+    X_val, y_val = val.drop(columns=clf.target), val[clf.target]
+    clf.X_train, clf.y_train, clf.X_val, clf.y_val, clf.X_test, clf.y_test = X_train, y_train, X_val, y_val, X_val, y_val
+    resultados = {}
+    for nombre in candidatos:
+        clf.entrenar_modelos(candidatos=[nombre], presupuesto_cpu=1)
+        lote_ms, fila_ms = _latencia_inferencia(clf.models[nombre], X_val, repeticiones=3, filas_individuales=20)
+        resultados[nombre] = {'filas': filas, 'ajuste_s': clf.recursos_entrenamiento[nombre]['fit_time_s'],
+                              'latencia_1000_filas_ms': lote_ms, 'latencia_fila_ms': fila_ms}
+    return resultados
+
+
+def main(args):
+    warnings.filterwarnings('ignore')
+    clf = ClasificadorMorosidad(args.dataset, output_dir=args.output_dir, cache_dir=None)
+    clf.load_data()
+    clf.detectar_target()
+    clf.dividir_datos()
+    clf.crear_pipeline_preprocesamiento()
+    candidatos = args.candidatos or list(CANDIDATOS)
+    filas = []
+    for n in args.filas:
+        inicio = time.perf_counter()
+        for nombre, r in medir(clf, n, candidatos).items():
+            filas.append(dict(modelo=nombre, **r))
+        print(f"{n} filas medidas en {time.perf_counter() - inicio:.1f}s")
+    tabla = pd.DataFrame(filas).pivot(index='filas', columns='modelo', values=['ajuste_s', 'latencia_1000_filas_ms'])
+    print(tabla.round(3).to_string())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Escalado del entrenamiento de los candidatos con las filas")
+    parser.add_argument("--dataset", default=os.path.join(RAIZ, 'dataset_credito_morosidad.csv'))
+    parser.add_argument("--output_dir", default=os.path.join(RAIZ, 'output'))
+    parser.add_argument("--filas", type=int, nargs="+", default=[4000, 20000, 100000])
+    parser.add_argument("--candidatos", nargs="+", choices=list(CANDIDATOS), default=None)
+    main(parser.parse_args())
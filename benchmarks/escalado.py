@@ -0,0 +1,130 @@
+"""
+BENCHMARK DE ESCALADO
+Levanta servidor.py con distinto número de trabajadores y mide el rendimiento de /predecir
+con varios clientes concurrentes (procesos independientes) para comprobar que escala con los núcleos.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from registro_modelos import SOLICITANTE_PRUEBA
+
+CUERPO = json.dumps(SOLICITANTE_PRUEBA).encode('utf-8')
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def esperar_listo(url, timeout=60):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        try:
+            with urllib.request.urlopen(url + '/salud', timeout=2) as r:
+                if r.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"El servidor no quedó listo en {timeout} s")
+
+
+def cliente(url, duracion, resultados):
+    """Envía peticiones secuenciales durante 'duracion' segundos y devuelve las latencias"""
+    latencias = []
+    errores = 0
+    limite = time.monotonic() + duracion
+    while time.monotonic() < limite:
+        peticion = urllib.request.Request(url + '/predecir', data=CUERPO,
+                                          headers={'Content-Type': 'application/json'})
+        inicio = time.perf_counter()
+        try:
+            with urllib.request.urlopen(peticion, timeout=10) as r:
+                r.read()
+            latencias.append(time.perf_counter() - inicio)
+        except (urllib.error.URLError, ConnectionError):
+            errores += 1
+    resultados.put((latencias, errores))
+
+
+def medir(trabajadores, clientes, duracion):
+    puerto = puerto_libre()
+    url = f'http://127.0.0.1:{puerto}'
+    entorno = dict(os.environ, MOROSIDAD_LOG_FSYNC='nunca')
+    proceso = subprocess.Popen(
+        [sys.executable, 'servidor.py', '--trabajadores', str(trabajadores), '--host', '127.0.0.1',
+         '--puerto', str(puerto), '--sin_vigilancia', '--gracia', '5'],
+        cwd=RAIZ, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        esperar_listo(url)
+        resultados = multiprocessing.Queue()
+        procesos = [multiprocessing.Process(target=cliente, args=(url, duracion, resultados))
+                    for _ in range(clientes)]
+        for p in procesos:
+            p.start()
+        latencias, errores = [], 0
+        for _ in procesos:
+            parcial, fallidas = resultados.get()
+            latencias.extend(parcial)
+            errores += fallidas
+        for p in procesos:
+            p.join()
+    finally:
+        proceso.send_signal(signal.SIGTERM)
+        proceso.wait(timeout=30)
+
+    latencias.sort()
+    return {
+        'trabajadores': trabajadores,
+        'clientes': clientes,
+        'peticiones': len(latencias),
+        'errores': errores,
+        'peticiones_por_segundo': len(latencias) / duracion,
+        'latencia_ms': {
+            'p50': statistics.median(latencias) * 1000 if latencias else None,
+            'p95': latencias[int(len(latencias) * 0.95)] * 1000 if latencias else None
+        }
+    }
+
+
+def main(args):
+    reporte = {'cpus': os.cpu_count(), 'duracion_s': args.duracion, 'mediciones': []}
+    for trabajadores in args.trabajadores:
+        print(f"Midiendo con {trabajadores} trabajadores...", file=sys.stderr)
+        clientes = args.clientes or 2 * trabajadores
+        reporte['mediciones'].append(medir(trabajadores, clientes, args.duracion))
+
+    base = reporte['mediciones'][0]['peticiones_por_segundo']
+    for m in reporte['mediciones']:
+        m['aceleracion'] = m['peticiones_por_segundo'] / base if base else None
+
+    texto = json.dumps(reporte, indent=4)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            f.write(texto)
+    print(texto)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de escalado del servidor pre-fork")
+    parser.add_argument("--trabajadores", type=int, nargs='+', default=[1, 2, 4],
+                        help="Números de trabajadores a medir.")
+    parser.add_argument("--clientes", type=int, default=None,
+                        help="Clientes concurrentes (por defecto, el doble de trabajadores).")
+    parser.add_argument("--duracion", type=float, default=10.0, help="Segundos de carga por medición.")
+    parser.add_argument("--salida", type=str, default=None, help="Archivo JSON donde guardar el reporte.")
+    main(parser.parse_args())
@@ -0,0 +1,192 @@
+"""
+CACHE TIPADO DEL DATASET
+Carga del CSV de entrenamiento con los tipos del esquema compartido (esquema.py):
+- categóricos como 'category',
+- enteros con el entero más pequeño que contiene sus valores (int8/int16/...),
+- el resto en float32 si conserva los valores a la precisión con que vienen en el CSV
+  (si no, se mantienen en float64), y el objetivo como entero pequeño.
+El resultado se guarda junto al CSV en un archivo binario columnar (Parquet si pyarrow
+está instalado, si no NPZ) que se reutiliza mientras el CSV no cambie: se compara tamaño
+y mtime, y si difieren, el hash SHA-256 del contenido.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from esquema import ESQUEMA, COLUMNA_OBJETIVO
+
+# Se incrementa al cambiar las reglas de tipado (invalida los caches existentes)
+VERSION_CACHE = 1
+
+_CAMPOS = {c.nombre: c for c in ESQUEMA}
+
+
+def _decimales(valores, maximo=6):
+    # Menor cantidad de decimales que representa todos los valores (tal como vienen del CSV)
+    escala = np.maximum(np.abs(valores), 1.0)
+    for d in range(maximo + 1):
+        if np.all(np.abs(valores - np.round(valores, d)) <= 1e-9 * escala):
+            return d
+    return None
+
+
+def _tipo_real(serie):
+    """float32 si cada valor queda a menos de media unidad de su último decimal; si no, float64"""
+    valores = serie.to_numpy(dtype=np.float64)
+    finitos = valores[np.isfinite(valores)]
+    if len(finitos) == 0:
+        return serie.astype(np.float32)
+    decimales = _decimales(finitos)
+    if decimales is not None:
+        error = np.abs(finitos.astype(np.float32).astype(np.float64) - finitos).max()
+        if error < 0.5 * 10.0 ** -decimales:
+            return serie.astype(np.float32)
+    return serie.astype(np.float64)
+
+
+def _tipo_entero(serie):
+    """Entero más pequeño que contiene los valores; con nulos o decimales se trata como real"""
+    valores = serie.to_numpy(dtype=np.float64)
+    if np.isnan(valores).any() or not np.all(np.mod(valores, 1) == 0):
+        return _tipo_real(serie)
+    return pd.to_numeric(serie, downcast='integer')
+
+
+def tipar_dataset(df):
+    """Aplica los tipos del esquema a las columnas del DataFrame (las desconocidas se dejan igual)"""
+    columnas = {}
+    for nombre in df.columns:
+        serie = df[nombre]
+        campo = _CAMPOS.get(nombre)
+        if campo is not None and not campo.numerico:
+            columnas[nombre] = serie.astype('category')
+        elif (campo is not None and campo.entero) or nombre == COLUMNA_OBJETIVO:
+            columnas[nombre] = _tipo_entero(serie) if pd.api.types.is_numeric_dtype(serie) else serie
+        elif campo is not None:
+            columnas[nombre] = _tipo_real(serie) if pd.api.types.is_numeric_dtype(serie) else serie
+        else:
+            columnas[nombre] = serie
+    return pd.DataFrame(columnas, index=df.index)
+
+
+# --- ARCHIVO DE CACHE ---
+
+def _formato_disponible():
+    try:
+        import pyarrow  # noqa: F401
+        return 'parquet'
+    except ImportError:
+        return 'npz'
+
+
+def ruta_cache(ruta_csv, formato=None):
+    """Archivo de cache junto al CSV (p. ej. datos.csv -> datos.csv.cache.npz)"""
+    return f'{ruta_csv}.cache.{formato or _formato_disponible()}'
+
+
+def hash_archivo(ruta):
+    """SHA-256 del contenido del archivo, leído por bloques"""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for trozo in iter(lambda: f.read(1 << 20), b''):
+            h.update(trozo)
+    return h.hexdigest()
+
+
+def _guardar_npz(df, ruta):
+    # Cada columna como arreglo; los categóricos como códigos + categorías (sin pickle)
+    arreglos = {}
+    tipos = {}
+    for i, nombre in enumerate(df.columns):
+        serie = df[nombre]
+        if isinstance(serie.dtype, pd.CategoricalDtype) or serie.dtype == object:
+            # Los object (columnas fuera del esquema) también van como códigos para conservar los nulos
+            categorica = serie if serie.dtype != object else serie.astype(str).where(serie.notna()).astype('category')
+            arreglos[f'c{i}'] = categorica.cat.codes.to_numpy()
+            arreglos[f'k{i}'] = categorica.cat.categories.to_numpy().astype(str)
+            tipos[nombre] = 'category' if serie.dtype != object else 'object'
+        else:
+            arreglos[f'c{i}'] = serie.to_numpy()
+            tipos[nombre] = str(serie.dtype)
+    arreglos['columnas'] = np.array(json.dumps({'columnas': list(map(str, df.columns)), 'tipos': tipos}))
+    with open(ruta, 'wb') as f:
+        np.savez(f, **arreglos)
+
+
+def _leer_npz(ruta):
+    with np.load(ruta, allow_pickle=False) as datos:
+        meta = json.loads(str(datos['columnas']))
+        columnas = {}
+        for i, nombre in enumerate(meta['columnas']):
+            tipo = meta['tipos'][nombre]
+            if tipo in ('category', 'object'):
+                columna = pd.Categorical.from_codes(datos[f'c{i}'], categories=datos[f'k{i}'])
+                columnas[nombre] = columna if tipo == 'category' else pd.Series(columna).astype(object)
+            else:
+                columnas[nombre] = datos[f'c{i}']
+    return pd.DataFrame(columnas)
+
+
+def _firma(ruta_csv):
+    info = os.stat(ruta_csv)
+    return {'version': VERSION_CACHE, 'tamano': info.st_size, 'mtime_ns': info.st_mtime_ns}
+
+
+def cargar_dataset(ruta_csv, usar_cache=True):
+    """
+    DataFrame tipado del CSV. Con usar_cache, se lee del archivo binario si el CSV no cambió
+    (tamaño/mtime, o el mismo hash si solo cambió el mtime) y se regenera en caso contrario.
+    Devuelve (df, origen) con origen 'cache' o 'csv'.
+    """
+    if not usar_cache:
+        return tipar_dataset(pd.read_csv(ruta_csv)), 'csv'
+
+    formato = _formato_disponible()
+    ruta = ruta_cache(ruta_csv, formato)
+    ruta_meta = ruta + '.json'
+    firma = _firma(ruta_csv)
+    meta = None
+    if os.path.exists(ruta) and os.path.exists(ruta_meta):
+        try:
+            with open(ruta_meta, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+
+    vigente = meta is not None and meta.get('version') == VERSION_CACHE
+    if vigente and (meta['tamano'], meta['mtime_ns']) != (firma['tamano'], firma['mtime_ns']):
+        # mtime distinto (copia, checkout): el cache sigue valiendo si el contenido es el mismo
+        firma['sha256'] = hash_archivo(ruta_csv)
+        vigente = meta.get('sha256') == firma['sha256']
+        if vigente:
+            _escribir_meta(ruta_meta, firma)
+
+    if vigente:
+        try:
+            return (pd.read_parquet(ruta) if formato == 'parquet' else _leer_npz(ruta)), 'cache'
+        except Exception as e:
+            print(f"Cache del dataset ilegible ({e}); se vuelve a leer el CSV.")
+
+    df = tipar_dataset(pd.read_csv(ruta_csv))
+    firma.setdefault('sha256', hash_archivo(ruta_csv))
+    try:
+        temporal = f'{ruta}.{os.getpid()}.tmp'
+        if formato == 'parquet':
+            df.to_parquet(temporal, index=False)
+        else:
+            _guardar_npz(df, temporal)
+        os.replace(temporal, ruta)
+        _escribir_meta(ruta_meta, firma)
+    except OSError as e:
+        print(f"No se pudo guardar el cache del dataset: {e}")
+    return df, 'csv'
+
+
+def _escribir_meta(ruta_meta, firma):
+    temporal = f'{ruta_meta}.{os.getpid()}.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(firma, f, indent=2)
+    os.replace(temporal, ruta_meta)
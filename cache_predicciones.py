@@ -0,0 +1,79 @@
+"""
+CACHÉ DE PREDICCIONES
+Caché LRU con expiración (TTL) delante del modelo. La clave es un hash canónico de los
+17 campos ya validados y convertidos del solicitante más el nombre de la versión del modelo,
+de modo que las evaluaciones repetidas (reenvíos del formulario, perfiles de demostración)
+no vuelven a pasar por el pipeline. Se vacía al activar un modelo nuevo.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def clave_solicitante(solicitante, campos, modelo_nombre):
+    """Hash canónico de los campos (en orden fijo) y la versión del modelo"""
+    valores = [solicitante[campo] for campo in campos]
+    texto = json.dumps([modelo_nombre, valores], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(texto.encode('utf-8'), digest_size=16).digest()
+
+
+class CachePredicciones:
+    """
+    Caché LRU + TTL de (predicción, probabilidades).
+    - max_entradas: tamaño máximo; al excederlo se descarta la entrada usada hace más tiempo.
+    - ttl: segundos de validez de cada entrada.
+    """
+
+    def __init__(self, max_entradas=1024, ttl=300.0):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.aciertos = 0
+        self.fallos = 0
+        self.expirados = 0
+        self.invalidaciones = 0
+        self._entradas = OrderedDict()
+        self._candado = threading.Lock()
+
+    def obtener(self, clave):
+        """Resultado guardado para la clave, o None si no existe o expiró"""
+        ahora = time.monotonic()
+        with self._candado:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                if entrada[0] > ahora:
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return entrada[1]
+                del self._entradas[clave]
+                self.expirados += 1
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave, resultado):
+        with self._candado:
+            self._entradas[clave] = (time.monotonic() + self.ttl, resultado)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self, *args):
+        """Vacía la caché (se registra en modelos.al_cambiar, que pasa la versión nueva)"""
+        with self._candado:
+            self._entradas.clear()
+            self.invalidaciones += 1
+
+    def metricas(self):
+        with self._candado:
+            consultas = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._entradas),
+                'max_entradas': self.max_entradas,
+                'ttl_s': self.ttl,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+                'expirados': self.expirados,
+                'invalidaciones': self.invalidaciones
+            }
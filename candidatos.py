@@ -0,0 +1,143 @@
+"""
+REGISTRO DE MODELOS CANDIDATOS
+Modelos que compiten en el entrenamiento (morosidadTrain.py). Cada candidato define cómo
+construir su estimador, su espacio de búsqueda de hiperparámetros y el nombre del modelo
+optimizado. entrenar_modelos, la búsqueda del anexo 2.3 y la comparación objetiva recorren
+este registro: agregar un candidato es llamar a registrar_candidato() sin tocar el pipeline.
+"""
+import numpy as np
+from scipy.stats import loguniform, randint
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import OrdinalEncoder
+
+# Máximo de árboles del Random Forest (también el recurso máximo de la búsqueda por halving)
+MAX_ARBOLES = 600
+
+# Máximo de iteraciones del gradient boosting (la parada temprana suele cortar mucho antes)
+MAX_ITERACIONES_HGB = 500
+
+
+class Candidato:
+    """
+    Un modelo candidato.
+    - nombre: clave en clf.models y en los resultados.
+    - construir: función (random_state, categoricas) -> estimador sin ajustar (paso 'model' del Pipeline).
+    - espacio: función (estrategia) -> parámetros 'model__*' de la búsqueda: distribuciones para
+      'random'/'halving' y rejilla discreta para 'grid'.
+    - nombre_optimizado: nombre del modelo que resulta de la búsqueda.
+    - paralelo: el estimador acepta n_jobs (recibe su parte del presupuesto de CPU).
+    - preprocesador: función (numericas, categoricas) -> transformador propio (paso 'preprocessor');
+      None usa el preprocesador común (imputación + escalado + one-hot).
+    - parada_temprana: el ajuste recibe el conjunto de validación (fit(..., X_val=, y_val=)).
+    """
+
+    def __init__(self, nombre, construir, espacio, nombre_optimizado, paralelo=False, preprocesador=None,
+                 parada_temprana=False):
+        self.nombre = nombre
+        self.construir = construir
+        self.espacio = espacio
+        self.nombre_optimizado = nombre_optimizado
+        self.paralelo = paralelo
+        self.preprocesador = preprocesador
+        self.parada_temprana = parada_temprana
+
+
+def _espacio_logistica(estrategia):
+    if estrategia == 'grid':
+        return {
+            'model__solver': ['saga'], 'model__penalty': ['l1', 'l2', 'elasticnet'],
+            'model__C': [0.01, 0.1, 1, 10], 'model__l1_ratio': [0.15, 0.5, 0.85]
+        }
+    return {
+        'model__solver': ['saga'], 'model__penalty': ['l1', 'l2', 'elasticnet'],
+        'model__C': loguniform(1e-3, 1e2), 'model__l1_ratio': [0.15, 0.3, 0.5, 0.7, 0.85]
+    }
+
+
+def _espacio_bosque(estrategia):
+    if estrategia == 'grid':
+        return {
+            'model__n_estimators': [200, MAX_ARBOLES],
+            'model__max_depth': [None, 10, 18],
+            'model__min_samples_leaf': [1, 5],
+            'model__max_features': ['sqrt', 0.5],
+            'model__class_weight': ['balanced']
+        }
+    return {
+        'model__n_estimators': randint(150, MAX_ARBOLES),
+        'model__max_depth': [None, 6, 10, 14, 18, 22],
+        'model__min_samples_split': randint(2, 20),
+        'model__min_samples_leaf': randint(1, 10),
+        'model__max_features': ['sqrt', 'log2', 0.5, 0.7, 1.0],
+        'model__class_weight': ['balanced']
+    }
+
+
+def _espacio_hgb(estrategia):
+    if estrategia == 'grid':
+        return {
+            'model__learning_rate': [0.03, 0.1],
+            'model__max_leaf_nodes': [15, 31],
+            'model__min_samples_leaf': [20, 60],
+            'model__l2_regularization': [0.0, 1.0]
+        }
+    return {
+        'model__learning_rate': loguniform(0.01, 0.3),
+        'model__max_leaf_nodes': randint(8, 64),
+        'model__min_samples_leaf': randint(10, 120),
+        'model__l2_regularization': loguniform(1e-4, 10),
+        'model__max_features': [0.5, 0.8, 1.0]
+    }
+
+
+def _preprocesador_ordinal(numericas, categoricas):
+    # Numéricas tal cual (los histogramas no necesitan escala y los nulos tienen su propio bin) y
+    # categóricas como códigos ordinales, sin expansión one-hot. Las categorías no vistas en el
+    # entrenamiento se codifican como nulo y el modelo las trata como faltantes.
+    return ColumnTransformer([
+        ('num', 'passthrough', list(numericas)),
+        ('cat', OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=np.nan,
+                               encoded_missing_value=np.nan), list(categoricas))
+    ], verbose_feature_names_out=False).set_output(transform='pandas')
+
+
+def _construir_hgb(semilla, categoricas):
+    # Las categóricas se identifican por nombre en la salida (pandas) del preprocesador ordinal
+    return HistGradientBoostingClassifier(
+        max_iter=MAX_ITERACIONES_HGB, early_stopping=True, n_iter_no_change=10, scoring='loss',
+        categorical_features=list(categoricas) or None, class_weight='balanced', random_state=semilla)
+
+
+# Registro en orden de entrenamiento y de presentación
+CANDIDATOS = {}
+
+
+def registrar_candidato(candidato):
+    """Agrega (o reemplaza) un candidato en el registro"""
+    CANDIDATOS[candidato.nombre] = candidato
+    return candidato
+
+
+def candidato_de(nombre_modelo):
+    """Candidato de un modelo base u optimizado (p. ej. 'Random Forest (Optimizado)'); None si no hay"""
+    for candidato in CANDIDATOS.values():
+        if nombre_modelo in (candidato.nombre, candidato.nombre_optimizado):
+            return candidato
+    return None
+
+
+registrar_candidato(Candidato(
+    'Regresión Logística',
+    lambda semilla, categoricas: LogisticRegression(random_state=semilla, max_iter=1000, class_weight='balanced'),
+    _espacio_logistica, 'Regresión Logística (Optimizada)'))
+
+registrar_candidato(Candidato(
+    'Random Forest',
+    lambda semilla, categoricas: RandomForestClassifier(random_state=semilla, class_weight='balanced'),
+    _espacio_bosque, 'Random Forest (Optimizado)', paralelo=True))
+
+registrar_candidato(Candidato(
+    'Gradient Boosting (Histogramas)', _construir_hgb, _espacio_hgb, 'Gradient Boosting (Optimizado)',
+    preprocesador=_preprocesador_ordinal, parada_temprana=True))
@@ -0,0 +1,228 @@
+"""
+ENTRENAMIENTO INCREMENTAL (FUERA DE MEMORIA)
+Entrena un modelo logístico sobre un CSV más grande que la memoria, leyéndolo por bloques:
+1. Primera pasada: conteo de clases y categorías, muestra acotada de filas (bottom-k) para las
+   medianas y modas de imputación, y media/varianza exactas (StandardScaler.partial_fit
+   combinado con la imputación de los faltantes).
+2. Épocas de SGDClassifier(loss='log_loss').partial_fit sobre los bloques de entrenamiento,
+   evaluando cada época con un flujo de validación separado (una fracción fija de las filas,
+   elegida de forma determinista por bloque) y conservando la mejor época.
+El resultado es un Pipeline(preprocessor, model) con la misma forma que el de morosidadTrain.py,
+por lo que app.py (y el motor rápido) lo cargan igual que cualquier otro artefacto.
+La memoria queda acotada por tamano_bloque + tamano_muestra filas más una probabilidad por fila
+de validación.
+"""
+import json
+import os
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import f1_score, log_loss, roc_auc_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from esquema import COLUMNA_OBJETIVO, COLUMNAS_CATEGORICAS, COLUMNAS_NUMERICAS
+
+
+def leer_bloques(ruta, tamano_bloque, fraccion_validacion, semilla):
+    """
+    Recorre el CSV por bloques y separa cada uno en (entrenamiento, validación).
+    La separación depende solo del número de bloque y la semilla: es la misma en todas las pasadas.
+    """
+    tipos = {c: str for c in COLUMNAS_CATEGORICAS}
+    for numero, bloque in enumerate(pd.read_csv(ruta, chunksize=tamano_bloque, dtype=tipos)):
+        bloque = bloque[bloque[COLUMNA_OBJETIVO].notna()]
+        validacion = np.random.default_rng([semilla, numero]).random(len(bloque)) < fraccion_validacion
+        yield numero, bloque[~validacion], bloque[validacion]
+
+
+def _pesos_balanceados(conteo):
+    # Misma fórmula que class_weight='balanced' (que partial_fit no admite): n / (k * n_clase)
+    total = sum(conteo.values())
+    return {clase: total / (len(conteo) * n) for clase, n in conteo.items()}
+
+
+class EntrenadorIncremental:
+    """
+    Entrenamiento por bloques de un Pipeline(ColumnTransformer, SGDClassifier).
+    - tamano_bloque: filas leídas por bloque.
+    - fraccion_validacion: fracción de filas de cada bloque reservada para validación.
+    - tamano_muestra: filas de la muestra usada para medianas y modas de imputación.
+    - epocas: pasadas máximas sobre los datos de entrenamiento (se conserva la mejor según
+      log-loss de validación; paciencia: épocas sin mejora antes de detenerse).
+    - alpha: regularización L2 del SGDClassifier.
+    """
+
+    def __init__(self, ruta, tamano_bloque=100000, fraccion_validacion=0.15, tamano_muestra=100000,
+                 epocas=5, paciencia=2, alpha=1e-4, semilla=42):
+        self.ruta = ruta
+        self.tamano_bloque = tamano_bloque
+        self.fraccion_validacion = fraccion_validacion
+        self.tamano_muestra = tamano_muestra
+        self.epocas = epocas
+        self.paciencia = paciencia
+        self.alpha = alpha
+        self.semilla = semilla
+        self.conteo_clases = {}
+        self.historial = []
+
+    def _bloques(self):
+        return leer_bloques(self.ruta, self.tamano_bloque, self.fraccion_validacion, self.semilla)
+
+    # --- PRIMERA PASADA: ESTADÍSTICAS DEL PREPROCESAMIENTO ---
+
+    def ajustar_preprocesador(self):
+        """Una pasada: categorías, clases, muestra para imputación y escalado exacto"""
+        rng = np.random.default_rng(self.semilla)
+        muestra, claves = None, None
+        categorias = {c: set() for c in COLUMNAS_CATEGORICAS}
+        # Media/varianza de los valores presentes (StandardScaler ignora los NaN en partial_fit)
+        escalador_presentes = StandardScaler()
+        filas = 0
+        for _, entrenamiento, _ in self._bloques():
+            if not len(entrenamiento):
+                continue
+            filas += len(entrenamiento)
+            for clase, n in entrenamiento[COLUMNA_OBJETIVO].value_counts().items():
+                self.conteo_clases[int(clase)] = self.conteo_clases.get(int(clase), 0) + int(n)
+            for c in COLUMNAS_CATEGORICAS:
+                categorias[c].update(entrenamiento[c].dropna().unique())
+            escalador_presentes.partial_fit(entrenamiento[COLUMNAS_NUMERICAS].to_numpy(dtype=np.float64))
+            # Muestra bottom-k: cada fila recibe una clave aleatoria y se conservan las k menores
+            nuevas = rng.random(len(entrenamiento))
+            candidatas = entrenamiento if muestra is None else pd.concat([muestra, entrenamiento])
+            claves_todas = nuevas if claves is None else np.concatenate([claves, nuevas])
+            orden = np.argsort(claves_todas, kind='stable')[:self.tamano_muestra]
+            muestra, claves = candidatas.iloc[orden], claves_todas[orden]
+        if muestra is None or len(self.conteo_clases) < 2:
+            raise ValueError("El dataset no tiene filas de entrenamiento de ambas clases.")
+
+        numeric_transformer = Pipeline(steps=[
+            ('imputer', SimpleImputer(strategy='median')),
+            ('scaler', StandardScaler())])
+        categorical_transformer = Pipeline(steps=[
+            ('imputer', SimpleImputer(strategy='most_frequent')),
+            ('onehot', OneHotEncoder(categories=[sorted(categorias[c]) for c in COLUMNAS_CATEGORICAS],
+                                     handle_unknown='ignore'))])
+        preprocesador = ColumnTransformer(
+            transformers=[('num', numeric_transformer, COLUMNAS_NUMERICAS),
+                          ('cat', categorical_transformer, COLUMNAS_CATEGORICAS)],
+            remainder='drop')
+        # Imputadores y one-hot se ajustan con la muestra (las categorías son las de todo el flujo)
+        preprocesador.fit(muestra[COLUMNAS_NUMERICAS + COLUMNAS_CATEGORICAS])
+
+        # El escalador se reemplaza por la media/varianza exactas de todas las filas ya imputadas:
+        # las n - m presentes (media_p, var_p) más m faltantes con el valor de la mediana
+        num = preprocesador.named_transformers_['num']
+        mediana = num.named_steps['imputer'].statistics_
+        presentes = np.broadcast_to(escalador_presentes.n_samples_seen_, mediana.shape).astype(np.float64)
+        faltantes = filas - presentes
+        media_p = np.nan_to_num(escalador_presentes.mean_)
+        var_p = np.nan_to_num(escalador_presentes.var_)
+        media = (presentes * media_p + faltantes * mediana) / filas
+        var = (presentes * (var_p + (media_p - media) ** 2) + faltantes * (mediana - media) ** 2) / filas
+        escalador = num.named_steps['scaler']
+        escalador.mean_, escalador.var_, escalador.n_samples_seen_ = media, var, filas
+        escalador.scale_ = np.where(var > 10 * np.finfo(np.float64).eps, np.sqrt(var), 1.0)
+        self.filas_entrenamiento = filas
+        return preprocesador
+
+    # --- ÉPOCAS DE SGD ---
+
+    def _evaluar(self, pipeline):
+        etiquetas, probabilidades = [], []
+        for _, _, validacion in self._bloques():
+            if len(validacion):
+                etiquetas.append(validacion[COLUMNA_OBJETIVO].to_numpy(dtype=np.int8))
+                probabilidades.append(pipeline.predict_proba(validacion)[:, 1])
+        y = np.concatenate(etiquetas)
+        p = np.concatenate(probabilidades)
+        return {
+            'log_loss': float(log_loss(y, p, labels=[0, 1])),
+            'roc_auc': float(roc_auc_score(y, p)) if len(np.unique(y)) == 2 else None,
+            'f1': float(f1_score(y, (p >= 0.5).astype(int), zero_division=0)),
+            'filas_validacion': int(len(y))
+        }
+
+    def entrenar(self):
+        """Ajusta el preprocesador y el modelo; devuelve el Pipeline de la mejor época"""
+        inicio = time.perf_counter()
+        preprocesador = self.ajustar_preprocesador()
+        clases = np.array(sorted(self.conteo_clases))
+        # average=True (ASGD): promedio de los pesos de todas las actualizaciones, más estable entre épocas
+        modelo = SGDClassifier(loss='log_loss', alpha=self.alpha, average=True,
+                               class_weight=_pesos_balanceados(self.conteo_clases), random_state=self.semilla)
+        pipeline = Pipeline(steps=[('preprocessor', preprocesador), ('model', modelo)])
+        print(f"Preprocesador ajustado con {self.filas_entrenamiento} filas de entrenamiento "
+              f"en {time.perf_counter() - inicio:.1f}s; clases: {self.conteo_clases}")
+
+        rng = np.random.default_rng(self.semilla)
+        mejor, mejor_estado, sin_mejora = None, None, 0
+        for epoca in range(1, self.epocas + 1):
+            inicio_epoca = time.perf_counter()
+            for _, entrenamiento, _ in self._bloques():
+                if not len(entrenamiento):
+                    continue
+                # Orden aleatorio dentro del bloque (SGD es sensible al orden de las filas)
+                entrenamiento = entrenamiento.iloc[rng.permutation(len(entrenamiento))]
+                X = preprocesador.transform(entrenamiento)
+                modelo.partial_fit(X, entrenamiento[COLUMNA_OBJETIVO].to_numpy(dtype=np.int64), classes=clases)
+            metricas = self._evaluar(pipeline)
+            metricas.update(epoca=epoca, segundos=time.perf_counter() - inicio_epoca)
+            self.historial.append(metricas)
+            print(f"Época {epoca}: log-loss {metricas['log_loss']:.4f}, AUC {metricas['roc_auc'] or 0:.4f}, "
+                  f"F1 {metricas['f1']:.4f} ({metricas['segundos']:.1f}s)")
+            if mejor is None or metricas['log_loss'] < mejor['log_loss']:
+                mejor, sin_mejora = metricas, 0
+                mejor_estado = (modelo.coef_.copy(), modelo.intercept_.copy())
+            else:
+                sin_mejora += 1
+                if sin_mejora >= self.paciencia:
+                    print(f"Sin mejora en {self.paciencia} épocas: se detiene el entrenamiento.")
+                    break
+
+        modelo.coef_, modelo.intercept_ = mejor_estado
+        self.mejor = mejor
+        self.segundos = time.perf_counter() - inicio
+        return pipeline
+
+
+def entrenar_incremental(ruta, output_dir='output', **opciones):
+    """Entrena en modo incremental y guarda el artefacto y el resumen con el formato habitual"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    entrenador = EntrenadorIncremental(ruta, **opciones)
+    pipeline = entrenador.entrenar()
+
+    os.makedirs(output_dir, exist_ok=True)
+    model_filename = os.path.join(output_dir, f'model_pipeline_final_{timestamp}.joblib')
+    joblib.dump(pipeline, model_filename)
+    print(f"✅ Modelo incremental guardado en: {model_filename}")
+
+    resultados = {
+        'best_model_name': 'SGD Logístico (Incremental)',
+        'timestamp': timestamp,
+        'input_file': ruta,
+        'incremental': {
+            'opciones': {'tamano_bloque': entrenador.tamano_bloque,
+                         'fraccion_validacion': entrenador.fraccion_validacion,
+                         'tamano_muestra': entrenador.tamano_muestra, 'epocas': entrenador.epocas,
+                         'alpha': entrenador.alpha, 'semilla': entrenador.semilla},
+            'filas_entrenamiento': entrenador.filas_entrenamiento,
+            'clases': {str(k): v for k, v in entrenador.conteo_clases.items()},
+            'pesos_clase': {str(k): v for k, v in _pesos_balanceados(entrenador.conteo_clases).items()},
+            'mejor_epoca': entrenador.mejor,
+            'historial': entrenador.historial,
+            'segundos': entrenador.segundos
+        }
+    }
+    metrics_filename = os.path.join(output_dir, f'training_results_{timestamp}.json')
+    with open(metrics_filename, 'w') as f:
+        json.dump(resultados, f, indent=4)
+    print(f"✅ Resultados/métricas guardados en: {metrics_filename}")
+    return pipeline, model_filename
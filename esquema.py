@@ -0,0 +1,285 @@
+"""
+ESQUEMA DEL SOLICITANTE
+Definición declarativa de los 17 campos de entrada (tipo, rango y categorías permitidas),
+compartida por la aplicación web y el script de entrenamiento.
+ValidadorEsquema compila el esquema en verificadores por campo que producen un registro
+estructurado de NumPy (o un arreglo estructurado para un lote) con errores por campo,
+sin construir un DataFrame por petición.
+"""
+import numpy as np
+
+COLUMNA_OBJETIVO = 'default_12m'
+
+
+class Campo:
+    """
+    Un campo del solicitante.
+    - tipo: 'numerico' o 'categorico'.
+    - minimo / maximo: rango permitido (inclusive) de los numéricos; None si no tiene límite.
+    - entero: el valor numérico debe ser entero (se acepta 8.0 pero no 8.5).
+    - opciones: categorías con las que se entrenó el modelo; cualquier otra se rechaza.
+    """
+
+    def __init__(self, nombre, tipo, minimo=None, maximo=None, entero=False, opciones=None, descripcion=''):
+        if tipo not in ('numerico', 'categorico'):
+            raise ValueError(f"Tipo de campo desconocido: {tipo}")
+        self.nombre = nombre
+        self.tipo = tipo
+        self.minimo = minimo
+        self.maximo = maximo
+        self.entero = entero
+        self.opciones = tuple(opciones or ())
+        self.descripcion = descripcion
+
+    @property
+    def numerico(self):
+        return self.tipo == 'numerico'
+
+    def mensaje_rango(self):
+        if self.minimo is not None and self.maximo is not None:
+            return f'Debe estar entre {self.minimo} y {self.maximo}'
+        if self.minimo is not None:
+            return f'Debe ser mayor o igual a {self.minimo}'
+        return f'Debe ser menor o igual a {self.maximo}'
+
+    def mensaje_opciones(self, valor):
+        return f"Valor no permitido '{valor}'; opciones: {', '.join(self.opciones)}"
+
+
+# Rangos de validez documentados en GUIA_RAPIDA.md (no los del dataset) y categorías con las que se entrenó el modelo
+ESQUEMA = (
+    Campo('edad', 'numerico', 18, 100, entero=True, descripcion='Edad en años'),
+    Campo('genero', 'categorico', opciones=['M', 'F']),
+    Campo('zona', 'categorico', opciones=['Urbana', 'Rural']),
+    Campo('tipo_empleo', 'categorico', opciones=['Dependiente', 'Independiente', 'Agricola', 'Comerciante']),
+    Campo('antiguedad', 'numerico', 0, 50, entero=True, descripcion='Años en el empleo actual'),
+    Campo('ingresos', 'numerico', 0, descripcion='Ingresos mensuales'),
+    Campo('score_crediticio', 'numerico', 300, 850),
+    Campo('pagos_previos', 'numerico', 0, 100, entero=True),
+    Campo('creditos_previos', 'numerico', 0, 50, entero=True),
+    Campo('monto_credito', 'numerico', 1),
+    Campo('plazo_meses', 'numerico', 6, 60, entero=True),
+    Campo('destino_credito', 'categorico', opciones=['Consumo', 'Comercial', 'Agricola']),
+    Campo('tipo_garantia', 'categorico', opciones=['Ninguna', 'Vehiculo', 'Inmueble']),
+    Campo('valor_garantia', 'numerico', 0),
+    Campo('precio_soya', 'numerico', 0),
+    Campo('precio_vino', 'numerico', 0),
+    Campo('uso_productos', 'numerico', 0, 10, entero=True, descripcion='Productos de la cooperativa en uso'),
+)
+
+CAMPOS_REQUERIDOS = [c.nombre for c in ESQUEMA]
+COLUMNAS_NUMERICAS = [c.nombre for c in ESQUEMA if c.numerico]
+COLUMNAS_CATEGORICAS = [c.nombre for c in ESQUEMA if not c.numerico]
+OPCIONES_CATEGORICAS = {c.nombre: list(c.opciones) for c in ESQUEMA if not c.numerico}
+
+# Registro estructurado: numéricos en float64 y categóricos como objetos (str)
+DTYPE_REGISTRO = np.dtype([(c.nombre, np.float64 if c.numerico else object) for c in ESQUEMA])
+
+# Niveles de riesgo de la respuesta: BAJO < 0.2 <= MEDIO < 0.5 <= ALTO < 0.7 <= MUY ALTO
+NIVELES_RIESGO = ('BAJO', 'MEDIO', 'ALTO', 'MUY ALTO')
+UMBRALES_RIESGO = (0.2, 0.5, 0.7)
+
+
+def clasificar_riesgo(probabilidad_moroso):
+    """Clasifica el riesgo basado en la probabilidad de morosidad"""
+    if probabilidad_moroso < 0.2:
+        return 'BAJO'
+    elif probabilidad_moroso < 0.5:
+        return 'MEDIO'
+    elif probabilidad_moroso < 0.7:
+        return 'ALTO'
+    else:
+        return 'MUY ALTO'
+
+
+def clasificar_riesgo_lote(probabilidades_moroso):
+    """clasificar_riesgo vectorizado: arreglo de niveles para un arreglo de probabilidades"""
+    indices = np.searchsorted(UMBRALES_RIESGO, probabilidades_moroso, side='right')
+    return np.array(NIVELES_RIESGO, dtype=object)[indices]
+
+
+FALTANTE = 'Campo faltante'
+NO_NUMERICO = 'Debe ser numérico'
+NO_ENTERO = 'Debe ser un número entero'
+NO_TEXTO = 'Debe ser texto'
+
+
+def _compilar_numerico(campo):
+    minimo = -np.inf if campo.minimo is None else campo.minimo
+    maximo = np.inf if campo.maximo is None else campo.maximo
+    con_rango = campo.minimo is not None or campo.maximo is not None
+    mensaje_rango = campo.mensaje_rango() if con_rango else None
+
+    def verificar(valor):
+        if isinstance(valor, bool):
+            return None, NO_NUMERICO
+        try:
+            numero = float(valor)
+        except (TypeError, ValueError):
+            return None, NO_NUMERICO
+        if numero != numero or numero in (np.inf, -np.inf):
+            return None, NO_NUMERICO
+        if campo.entero and not numero.is_integer():
+            return None, NO_ENTERO
+        if not minimo <= numero <= maximo:
+            return None, mensaje_rango
+        return numero, None
+    return verificar
+
+
+def _compilar_categorico(campo):
+    opciones = frozenset(campo.opciones)
+
+    def verificar(valor):
+        if not isinstance(valor, str):
+            return None, NO_TEXTO
+        if valor not in opciones:
+            return None, campo.mensaje_opciones(valor)
+        return valor, None
+    return verificar
+
+
+class ValidadorEsquema:
+    """
+    Validador compilado a partir del esquema.
+    - validar(datos): un solicitante (dict) -> (registro np.void, {campo: error}).
+    - validar_lote(filas): lista de dicts -> (arreglo estructurado de las filas válidas,
+      índices de esas filas, {índice: {campo: error}}).
+    - validar_columnas(columnas, n): igual que validar_lote pero con un dict de columnas
+      (por ejemplo un DataFrame), usado por el entrenamiento.
+    """
+
+    def __init__(self, esquema=ESQUEMA):
+        self.esquema = tuple(esquema)
+        self.campos = [c.nombre for c in self.esquema]
+        self.dtype = np.dtype([(c.nombre, np.float64 if c.numerico else object) for c in self.esquema])
+        self._verificadores = [
+            (c.nombre, _compilar_numerico(c) if c.numerico else _compilar_categorico(c))
+            for c in self.esquema
+        ]
+
+    def validar(self, datos):
+        """Valida un solicitante; el registro es None si hay errores"""
+        if not isinstance(datos, dict):
+            return None, {'solicitante': 'Se esperaba un objeto JSON'}
+        valores = []
+        errores = {}
+        for nombre, verificar in self._verificadores:
+            if nombre not in datos or datos[nombre] is None:
+                errores[nombre] = FALTANTE
+                continue
+            valor, error = verificar(datos[nombre])
+            if error is not None:
+                errores[nombre] = error
+            valores.append(valor)
+        if errores:
+            return None, errores
+        return np.array(tuple(valores), dtype=self.dtype)[()], errores
+
+    def validar_lote(self, filas):
+        """Valida un lote de solicitantes columna por columna"""
+        errores = {}
+        for i, fila in enumerate(filas):
+            if not isinstance(fila, dict):
+                errores[i] = {'solicitante': 'El solicitante debe ser un objeto JSON'}
+        faltante = object()
+        columnas = {
+            nombre: [fila.get(nombre, faltante) if isinstance(fila, dict) else faltante for fila in filas]
+            for nombre in self.campos
+        }
+        return self._validar(columnas, len(filas), errores, faltante)
+
+    def validar_columnas(self, columnas, n):
+        """Valida columnas ya armadas (dict o DataFrame); los nulos cuentan como faltantes"""
+        return self._validar({nombre: columnas[nombre] if nombre in columnas else [None] * n
+                              for nombre in self.campos}, n, {}, None)
+
+    def _validar(self, columnas, n, errores, faltante):
+        arreglo = np.empty(n, dtype=self.dtype)
+        invalidos = np.zeros(n, dtype=bool)
+        invalidos[list(errores)] = True
+
+        def registrar(mascara, nombre, mensaje):
+            for i in np.flatnonzero(mascara & ~base_invalida):
+                errores.setdefault(int(i), {})[nombre] = mensaje
+            invalidos[mascara] = True
+
+        base_invalida = invalidos.copy()
+        for campo in self.esquema:
+            valores = np.empty(n, dtype=object)
+            valores[:] = list(columnas[campo.nombre])
+            ausentes = np.fromiter((v is faltante or v is None or (isinstance(v, float) and v != v)
+                                    for v in valores), dtype=bool, count=n)
+            registrar(ausentes, campo.nombre, FALTANTE)
+            if campo.numerico:
+                numeros, no_numericos = self._convertir_numeros(valores, ausentes)
+                registrar(no_numericos, campo.nombre, NO_NUMERICO)
+                validos = ~ausentes & ~no_numericos
+                if campo.entero:
+                    registrar(validos & (numeros != np.floor(numeros)), campo.nombre, NO_ENTERO)
+                fuera = np.zeros(n, dtype=bool)
+                if campo.minimo is not None:
+                    fuera |= numeros < campo.minimo
+                if campo.maximo is not None:
+                    fuera |= numeros > campo.maximo
+                registrar(validos & fuera, campo.nombre, campo.mensaje_rango())
+                arreglo[campo.nombre] = numeros
+            else:
+                opciones = frozenset(campo.opciones)
+                permitidos = np.fromiter((isinstance(v, str) and v in opciones for v in valores),
+                                         dtype=bool, count=n)
+                for i in np.flatnonzero(~permitidos & ~ausentes & ~base_invalida):
+                    errores.setdefault(int(i), {})[campo.nombre] = (
+                        campo.mensaje_opciones(valores[i]) if isinstance(valores[i], str) else NO_TEXTO)
+                invalidos[~permitidos] = True
+                arreglo[campo.nombre] = valores
+
+        indices = np.flatnonzero(~invalidos)
+        return arreglo[indices], indices, errores
+
+    @staticmethod
+    def _convertir_numeros(valores, ausentes):
+        # Camino rápido: toda la columna convertible de una vez; si no, valor por valor
+        numeros = np.full(len(valores), np.nan)
+        no_numericos = np.zeros(len(valores), dtype=bool)
+        presentes = ~ausentes
+        try:
+            candidatos = valores[presentes]
+            if any(isinstance(v, bool) for v in candidatos):
+                raise TypeError
+            numeros[presentes] = candidatos.astype(np.float64)
+        except (TypeError, ValueError):
+            for i in np.flatnonzero(presentes):
+                v = valores[i]
+                try:
+                    if isinstance(v, bool):
+                        raise TypeError
+                    numeros[i] = float(v)
+                except (TypeError, ValueError):
+                    no_numericos[i] = True
+        no_numericos |= presentes & ~np.isfinite(numeros)
+        numeros[no_numericos] = np.nan
+        return numeros, no_numericos
+
+
+def resumen_errores(errores):
+    """Texto 'campo: error; ...' para los mensajes de la API"""
+    return '; '.join(f'{campo}: {mensaje}' for campo, mensaje in errores.items())
+
+
+def validar_dataframe(df, validador=None):
+    """
+    Revisa un DataFrame contra el esquema (usado por el entrenamiento).
+    Devuelve {campo: número de filas con error} (vacío si todo cumple el esquema).
+    """
+    validador = validador or ValidadorEsquema()
+    faltantes = [c for c in validador.campos if c not in df.columns]
+    _, _, errores = validador.validar_columnas({c: df[c].to_numpy(dtype=object) for c in df.columns
+                                                if c in validador.campos}, len(df))
+    conteo = {}
+    for por_campo in errores.values():
+        for campo in por_campo:
+            conteo[campo] = conteo.get(campo, 0) + 1
+    for campo in faltantes:
+        conteo[campo] = len(df)
+    return conteo
@@ -0,0 +1,207 @@
+"""
+ESTADÍSTICAS EN MEMORIA
+Agregador incremental de las predicciones del día para /api/estadisticas.
+Mantiene totales acumulados y guarda instantáneas periódicas en disco para que un
+reinicio recupere el estado sin volver a leer los logs.
+Los contadores viven en memoria compartida: los procesos creados con fork después
+de construir el agregador (servidor.py) comparten las mismas estadísticas.
+"""
+import json
+import multiprocessing
+import os
+import threading
+import time
+from datetime import datetime
+
+from esquema import NIVELES_RIESGO
+from registro_predicciones import iterar_predicciones
+
+FORMATO_TIMESTAMP = "%Y-%m-%d %H:%M:%S"
+
+# Posiciones en el arreglo compartido
+FECHA, VERSION, TOTAL, MOROSOS, SUMA_PROB, ULTIMA = range(6)
+RIESGO = 6
+
+
+def _hoy():
+    return datetime.now().strftime("%Y%m%d")
+
+
+def _a_epoch(timestamp):
+    return datetime.strptime(timestamp, FORMATO_TIMESTAMP).timestamp() if timestamp else 0.0
+
+
+class AgregadorEstadisticas:
+    """
+    Estadísticas acumuladas del día: total, morosos, suma de probabilidades,
+    histograma por nivel de riesgo y timestamp de la última predicción.
+    registrar() y resumen() son O(1) sin importar el volumen diario.
+    esperar_cambio() permite a los suscriptores (flujo SSE) bloquearse hasta la próxima predicción.
+    """
+
+    def __init__(self, log_dir='logs', intervalo_snapshot=5.0, intervalo_sondeo=0.25):
+        self.log_dir = log_dir
+        self.intervalo_snapshot = intervalo_snapshot
+        self.intervalo_sondeo = intervalo_sondeo
+        self._valores = multiprocessing.RawArray('d', RIESGO + len(NIVELES_RIESGO))
+        self._candado = multiprocessing.Lock()
+        self._aviso = threading.Condition()
+        self._ultimo_snapshot = 0.0
+        self._version_snapshot = 0
+        self._reiniciar(_hoy())
+
+    # --- ACCESO A LOS CONTADORES COMPARTIDOS ---
+
+    @property
+    def version(self):
+        return int(self._valores[VERSION])
+
+    @property
+    def fecha(self):
+        return str(int(self._valores[FECHA]))
+
+    def _reiniciar(self, fecha):
+        for i in range(len(self._valores)):
+            if i != VERSION:
+                self._valores[i] = 0.0
+        self._valores[FECHA] = float(fecha)
+
+    def _sumar(self, resultado, momento):
+        v = self._valores
+        v[TOTAL] += 1
+        v[MOROSOS] += int(resultado['prediccion'] == 1)
+        v[SUMA_PROB] += resultado['probabilidad_moroso']
+        nivel = resultado.get('riesgo')
+        if nivel in NIVELES_RIESGO:
+            v[RIESGO + NIVELES_RIESGO.index(nivel)] += 1
+        v[ULTIMA] = momento
+
+    def _cambiar_de_dia(self):
+        # Debe llamarse con el candado tomado
+        fecha = _hoy()
+        if fecha != self.fecha:
+            self._guardar(forzar=True)
+            self._reiniciar(fecha)
+
+    def registrar(self, resultado):
+        """Suma una predicción a las estadísticas del día"""
+        self.registrar_varios([resultado])
+
+    def registrar_varios(self, resultados):
+        """Suma varias predicciones con una sola adquisición del candado"""
+        momento = time.time()
+        with self._candado:
+            self._cambiar_de_dia()
+            for resultado in resultados:
+                self._sumar(resultado, momento)
+            self._valores[VERSION] += 1
+        with self._aviso:
+            self._aviso.notify_all()
+
+    def esperar_cambio(self, version, timeout=None):
+        """
+        Espera hasta que la versión sea distinta de la indicada (o venza el timeout) y la devuelve.
+        Los cambios de otros procesos se detectan revisando el contador cada intervalo_sondeo.
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._aviso:
+            while self.version == version:
+                espera = self.intervalo_sondeo
+                if limite is not None:
+                    espera = min(espera, limite - time.monotonic())
+                    if espera <= 0:
+                        break
+                self._aviso.wait(espera)
+        return self.version
+
+    def _estado(self):
+        v = self._valores
+        return {
+            'total': int(v[TOTAL]),
+            'morosos': int(v[MOROSOS]),
+            'suma_prob_moroso': v[SUMA_PROB],
+            'riesgo': {nivel: int(v[RIESGO + i]) for i, nivel in enumerate(NIVELES_RIESGO)},
+            'ultima_prediccion': (datetime.fromtimestamp(v[ULTIMA]).strftime(FORMATO_TIMESTAMP)
+                                  if v[ULTIMA] else None)
+        }
+
+    def resumen(self):
+        """Estadísticas actuales con el formato de /api/estadisticas"""
+        with self._candado:
+            self._cambiar_de_dia()
+            version = self.version
+            estado = self._estado()
+        total = estado['total']
+        return {
+            'version': version,
+            'total': total,
+            'morosos': estado['morosos'],
+            'no_morosos': total - estado['morosos'],
+            'prob_moroso_promedio': estado['suma_prob_moroso'] / total if total else 0.0,
+            'riesgo': estado['riesgo'],
+            'ultima_prediccion': estado['ultima_prediccion']
+        }
+
+    # --- PERSISTENCIA ---
+
+    def ruta_snapshot(self, fecha=None):
+        """Ruta de la instantánea del día"""
+        return os.path.join(self.log_dir, f'estadisticas_{fecha or self.fecha}.json')
+
+    def _guardar(self, forzar=False):
+        # Debe llamarse con el candado tomado
+        if self.version == self._version_snapshot:
+            return
+        if not forzar and time.monotonic() - self._ultimo_snapshot < self.intervalo_snapshot:
+            return
+        estado = dict(fecha=self.fecha, **self._estado())
+        os.makedirs(self.log_dir, exist_ok=True)
+        ruta = self.ruta_snapshot()
+        temporal = f'{ruta}.{os.getpid()}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(estado, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+        self._ultimo_snapshot = time.monotonic()
+        self._version_snapshot = self.version
+
+    def guardar_snapshot(self, forzar=False):
+        """Guarda una instantánea si hubo cambios y pasó el intervalo (o si se fuerza)"""
+        try:
+            with self._candado:
+                self._guardar(forzar)
+        except Exception as e:
+            print(f"Error al guardar estadísticas: {e}")
+
+    def cargar(self):
+        """
+        Recupera las estadísticas del día desde la instantánea.
+        Si no existe, las reconstruye una única vez a partir de los logs.
+        """
+        with self._candado:
+            self._reiniciar(_hoy())
+            ruta = self.ruta_snapshot()
+            if os.path.exists(ruta):
+                with open(ruta, 'r', encoding='utf-8') as f:
+                    estado = json.load(f)
+                v = self._valores
+                v[TOTAL] = estado['total']
+                v[MOROSOS] = estado['morosos']
+                v[SUMA_PROB] = estado['suma_prob_moroso']
+                for i, nivel in enumerate(NIVELES_RIESGO):
+                    v[RIESGO + i] = estado['riesgo'].get(nivel, 0)
+                v[ULTIMA] = _a_epoch(estado['ultima_prediccion'])
+                self._version_snapshot = self.version
+                return 'snapshot'
+
+            ultima = None
+            for resultado in iterar_predicciones(self.fecha, self.log_dir):
+                self._sumar(resultado, 0.0)
+                # Los logs migrados se anexan al final: la última línea no siempre es la más reciente
+                marca = resultado.get('timestamp')
+                if marca and (ultima is None or marca > ultima):
+                    ultima = marca
+            self._valores[ULTIMA] = _a_epoch(ultima)
+            if self._valores[TOTAL]:
+                self._valores[VERSION] += 1
+                self._guardar(forzar=True)
+            return 'logs'
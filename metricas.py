@@ -0,0 +1,144 @@
+"""
+MÉTRICAS DEL SERVICIO
+Contadores e histogramas de cubetas fijas para instrumentar el camino caliente
+(cada observación es una búsqueda binaria y dos sumas, sin candado) y su
+exportación en el formato de texto de Prometheus para /api/metricas.
+Sin candado, dos hilos que actualizan la misma serie a la vez pueden perder
+ocasionalmente una observación: se acepta a cambio de un costo menor a 1 µs.
+Las métricas son por proceso: con servidor.py cada trabajador expone las suyas.
+"""
+import bisect
+import threading
+
+# Límites (segundos) para las etapas de una petición: de 10 µs a 1 s
+LIMITES_SEGUNDOS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001,
+                    0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _formatear_etiquetas(etiquetas, extra=None):
+    pares = list(etiquetas) + ([extra] if extra else [])
+    if not pares:
+        return ''
+    texto = ','.join('{}="{}"'.format(
+        clave, str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for clave, valor in pares)
+    return '{' + texto + '}'
+
+
+def _formatear_numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Histograma:
+    """Histograma de cubetas fijas (la última cubeta acumula lo que excede el mayor límite)"""
+
+    def __init__(self, limites):
+        self.limites = tuple(limites)
+        self.cubetas = [0] * (len(self.limites) + 1)
+        self.suma = 0.0
+
+    def observar(self, valor):
+        self.cubetas[bisect.bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+
+    @property
+    def cantidad(self):
+        return sum(self.cubetas)
+
+    def describir(self):
+        etiquetas = [f'<={l}' for l in self.limites] + [f'>{self.limites[-1]}']
+        cubetas, suma = list(self.cubetas), self.suma
+        cantidad = sum(cubetas)
+        return {
+            'cantidad': cantidad,
+            'promedio': suma / cantidad if cantidad else 0.0,
+            'cubetas': dict(zip(etiquetas, cubetas))
+        }
+
+    def exportar(self, nombre, etiquetas=()):
+        """Líneas _bucket (acumuladas), _sum y _count en formato Prometheus"""
+        cubetas, suma = list(self.cubetas), self.suma
+        cantidad = sum(cubetas)
+        lineas = []
+        acumulado = 0
+        for limite, valor in zip(self.limites + (float('inf'),), cubetas):
+            acumulado += valor
+            lineas.append(f'{nombre}_bucket{_formatear_etiquetas(etiquetas, ("le", _formatear_numero(limite)))} {acumulado}')
+        lineas.append(f'{nombre}_sum{_formatear_etiquetas(etiquetas)} {_formatear_numero(suma)}')
+        lineas.append(f'{nombre}_count{_formatear_etiquetas(etiquetas)} {cantidad}')
+        return lineas
+
+
+class Contador:
+    """Contador monótono"""
+
+    def __init__(self):
+        self.valor = 0
+
+    def incrementar(self, cantidad=1):
+        self.valor += cantidad
+
+
+class RegistroMetricas:
+    """
+    Familias de métricas con nombre, ayuda y etiquetas.
+    histograma() y contador() devuelven (creándola una sola vez) la serie de unas etiquetas
+    concretas: el código instrumentado la guarda y solo llama a observar()/incrementar().
+    Los recolectores son funciones sin argumentos que devuelven líneas adicionales
+    (valores calculados al exportar, como el modelo activo).
+    """
+
+    def __init__(self, prefijo='morosidad'):
+        self.prefijo = prefijo
+        self.recolectores = []
+        self._familias = {}
+        self._candado = threading.Lock()
+
+    def _serie(self, tipo, nombre, ayuda, etiquetas, crear):
+        nombre = f'{self.prefijo}_{nombre}'
+        clave = tuple(sorted(etiquetas.items()))
+        with self._candado:
+            familia = self._familias.setdefault(nombre, {'tipo': tipo, 'ayuda': ayuda, 'series': {}})
+            if familia['tipo'] != tipo:
+                raise ValueError(f"La métrica {nombre} ya existe con tipo {familia['tipo']}")
+            serie = familia['series'].get(clave)
+            if serie is None:
+                serie = familia['series'][clave] = crear()
+            return serie
+
+    def histograma(self, nombre, ayuda='', limites=LIMITES_SEGUNDOS, **etiquetas):
+        return self._serie('histogram', nombre, ayuda, etiquetas, lambda: Histograma(limites))
+
+    def contador(self, nombre, ayuda='', **etiquetas):
+        return self._serie('counter', nombre, ayuda, etiquetas, Contador)
+
+    def exportar(self):
+        """Texto en formato de exposición de Prometheus (versión 0.0.4)"""
+        lineas = []
+        with self._candado:
+            familias = [(n, f['tipo'], f['ayuda'], list(f['series'].items()))
+                        for n, f in sorted(self._familias.items())]
+        for nombre, tipo, ayuda, series in familias:
+            lineas.append(f'# HELP {nombre} {ayuda}')
+            lineas.append(f'# TYPE {nombre} {tipo}')
+            for etiquetas, serie in series:
+                if tipo == 'histogram':
+                    lineas.extend(serie.exportar(nombre, etiquetas))
+                else:
+                    lineas.append(f'{nombre}{_formatear_etiquetas(etiquetas)} {serie.valor}')
+        for recolector in self.recolectores:
+            try:
+                lineas.extend(recolector())
+            except Exception as e:
+                print(f"Error en recolector de métricas: {e}")
+        return '\n'.join(lineas) + '\n'
+
+
+def lineas_metrica(nombre, tipo, ayuda, valores):
+    """Líneas de una familia calculada al exportar: valores es una lista de (etiquetas dict, valor)"""
+    lineas = [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} {tipo}']
+    for etiquetas, valor in valores:
+        lineas.append(f'{nombre}{_formatear_etiquetas(sorted(etiquetas.items()))} {_formatear_numero(valor)}')
+    return lineas
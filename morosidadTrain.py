@@ -3,25 +3,36 @@ SCRIPT DE ENTRENAMIENTO AUTOMÁTICO - PREDICCIÓN DE MOROSIDAD
 """
 import os
 import random
+import hashlib
+import multiprocessing
+import sys
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor
+try:
+    import resource
+except ImportError:  # Windows: sin medición de memoria por modelo
+    resource = None
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from scipy import stats
 from sklearn.impute import SimpleImputer
-from statsmodels.stats.outliers_influence import variance_inflation_factor
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
 from sklearn.model_selection import (
     train_test_split, 
     GridSearchCV, 
     RandomizedSearchCV, 
+    HalvingRandomSearchCV,
+    ParameterGrid,
+    ParameterSampler,
     StratifiedKFold,
-    cross_val_score
+    cross_validate
 )
+from sklearn.base import clone
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
-from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import (
     accuracy_score,
     precision_score,
@@ -31,18 +42,189 @@ from sklearn.metrics import (
     confusion_matrix,
     classification_report
 )
-from scipy.stats import loguniform, randint
 import argparse
 import joblib
 import json
+import time
 from datetime import datetime
+from esquema import COLUMNAS_NUMERICAS, COLUMNAS_CATEGORICAS, validar_dataframe
+from cache_dataset import cargar_dataset
+from entrenamiento_incremental import entrenar_incremental
+from puntos_control import PuntosControl, huella_ejecucion
+from candidatos import CANDIDATOS, MAX_ARBOLES, candidato_de
+
+# Métricas de la validación cruzada (nombres de scoring de scikit-learn)
+METRICAS_CV = ['accuracy', 'precision', 'recall', 'f1', 'roc_auc']
+
+# Estrategias de búsqueda de hiperparámetros (los espacios de cada modelo están en candidatos.py)
+ESTRATEGIAS_BUSQUEDA = ['halving', 'random', 'grid']
+
+# Se incrementa al cambiar el dibujo de las figuras del EDA (invalida las figuras guardadas)
+VERSION_EDA = 1
+
+# Código que determina el resultado del entrenamiento (forma parte de la huella de los puntos de control)
+ARCHIVOS_CODIGO = [os.path.join(os.path.dirname(os.path.abspath(__file__)), nombre)
+                   for nombre in ('morosidadTrain.py', 'esquema.py', 'cache_dataset.py', 'candidatos.py')]
+
+# --- RENDERIZADO DE FIGURAS DEL EDA ---
+# Funciones de módulo (serializables) para poder ejecutarlas en los procesos del pool.
+
+def _figura_distribuciones(datos, tipo, ruta):
+    # Histogramas (tipo='hist') o boxplots (tipo='boxplot') de todas las columnas numéricas.
+    n = datos.shape[1]
+    ncols = 3
+    nrows = int(np.ceil(n / ncols))
+    fig, axes = plt.subplots(nrows, ncols, figsize=(5 * ncols, 4 * nrows))
+    axes = np.atleast_1d(axes).flatten()
+    for i, c in enumerate(datos.columns):
+        if tipo == 'hist':
+            sns.histplot(datos[c].dropna(), kde=True, ax=axes[i])
+            axes[i].set_title(f"Distribución: {c}")
+        else:
+            sns.boxplot(x=datos[c].dropna(), ax=axes[i])
+            axes[i].set_title(f"Boxplot: {c}")
+    # Ocultar ejes sobrantes
+    for j in range(n, len(axes)):
+        axes[j].set_visible(False)
+    fig.tight_layout()
+    fig.savefig(ruta)
+    plt.close(fig)
+
+def _figura_correlacion(corr, ruta):
+    fig, ax = plt.subplots(figsize=(10, 8))
+    sns.heatmap(corr, annot=True, fmt='.2f', cmap='coolwarm', center=0, ax=ax)
+    ax.set_title("Matriz de Correlación")
+    fig.savefig(ruta)
+    plt.close(fig)
+
+def _figura_relacion_num(objetivo, columna, ruta):
+    fig, ax = plt.subplots(figsize=(6, 3))
+    sns.boxplot(x=objetivo, y=columna, ax=ax)
+    ax.set_title(f"{columna.name} vs {objetivo.name}")
+    fig.savefig(ruta)
+    plt.close(fig)
+
+def _figura_relacion_cat(columna, objetivo, ruta):
+    fig, ax = plt.subplots(figsize=(8, 4))
+    sns.countplot(x=columna, hue=objetivo, ax=ax)
+    ax.set_title(f"{columna.name} por {objetivo.name}")
+    ax.tick_params(axis='x', rotation=45)
+    fig.savefig(ruta)
+    plt.close(fig)
+
+def _renderizar(tareas, directorio, procesos=1):
+    # Dibuja las tareas (función, argumentos, archivo); con varios procesos usa un pool (fork si existe).
+    rutas = [os.path.join(directorio, nombre) for _, _, nombre in tareas]
+    if procesos <= 1 or len(tareas) <= 1:
+        for (funcion, argumentos, _), ruta in zip(tareas, rutas):
+            funcion(*argumentos, ruta)
+        return rutas
+    metodo = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+    with ProcessPoolExecutor(max_workers=min(procesos, len(tareas)),
+                             mp_context=multiprocessing.get_context(metodo)) as pool:
+        futuros = [pool.submit(funcion, *argumentos, ruta) for (funcion, argumentos, _), ruta in zip(tareas, rutas)]
+        for futuro in futuros:
+            futuro.result()
+    return rutas
+
+# --- AJUSTE DE CANDIDATOS ---
+
+def _nucleos(presupuesto_cpu=None):
+    # Núcleos que puede usar el entrenamiento: el presupuesto configurado o, sin él, todos
+    return max(1, presupuesto_cpu or os.cpu_count() or 1)
+
+def _rss_maximo_mb():
+    # Pico de memoria residente del proceso actual (ru_maxrss: KB en Linux, bytes en macOS)
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maximo / 2**20 if sys.platform == 'darwin' else maximo / 2**10
+
+def _ajustar_candidato(nombre, pipeline, X, y, medir_memoria=False, validacion=None):
+    # Ajusta un candidato midiendo el tiempo de reloj. Con medir_memoria se registra el pico de
+    # memoria residente (ru_maxrss, incluye buffers nativos) del proceso hijo que lo entrena, que
+    # debe ser un proceso nuevo para este candidato: peak_rss_mb es el pico absoluto del proceso y
+    # delta_rss_mb lo que creció durante el ajuste.
+    # validacion=(X_val, y_val): parada temprana del modelo sobre ese conjunto, transformado con
+    # el preprocesador ya ajustado en train (el Pipeline no transforma los parámetros de fit).
+    rss_inicial = _rss_maximo_mb() if medir_memoria else None
+    inicio = time.perf_counter()
+    if validacion is None:
+        pipeline.fit(X, y)
+    else:
+        preprocesador = pipeline.named_steps['preprocessor']
+        X_t = preprocesador.fit_transform(X, y)
+        pipeline.named_steps['model'].fit(X_t, y, X_val=preprocesador.transform(validacion[0]),
+                                          y_val=validacion[1])
+    duracion = time.perf_counter() - inicio
+    recursos = {'fit_time_s': duracion}
+    if medir_memoria:
+        pico = _rss_maximo_mb()
+        recursos.update({'peak_rss_mb': pico, 'delta_rss_mb': pico - rss_inicial})
+    if validacion is not None and hasattr(pipeline.named_steps['model'], 'n_iter_'):
+        recursos['n_iter'] = int(pipeline.named_steps['model'].n_iter_)
+    return nombre, pipeline, recursos
+
+def _latencia_inferencia(modelo, X, repeticiones=5, filas_individuales=50):
+    # Latencia de predict_proba: ms por 1000 filas en lote (mejor de varias repeticiones) y mediana
+    # en ms de una predicción de una sola fila (el caso de la aplicación web).
+    lote = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        modelo.predict_proba(X)
+        lote.append(time.perf_counter() - inicio)
+    individuales = []
+    for i in range(min(filas_individuales, len(X))):
+        fila = X.iloc[[i]]
+        inicio = time.perf_counter()
+        modelo.predict_proba(fila)
+        individuales.append(time.perf_counter() - inicio)
+    return 1000 * min(lote) * 1000 / len(X), 1000 * float(np.median(individuales))
+
+# --- VIF POR BLOQUES ---
+
+def comomentos_por_bloques(bloques):
+    # Media y matriz de co-momentos (suma de productos centrados) de las filas finitas de todos
+    # los bloques, combinando bloque a bloque (Chan et al.): solo un bloque en memoria a la vez.
+    n, media, comomentos, columnas = 0, None, None, None
+    for bloque in bloques:
+        if columnas is None:
+            columnas = list(bloque.select_dtypes(include='number').columns)
+        X = bloque[columnas].to_numpy(dtype=np.float64)
+        X = X[np.isfinite(X).all(axis=1)]
+        if not len(X):
+            continue
+        n_b = len(X)
+        media_b = X.mean(axis=0)
+        centrado = X - media_b
+        comomentos_b = centrado.T @ centrado
+        if n == 0:
+            n, media, comomentos = n_b, media_b, comomentos_b
+            continue
+        delta = media_b - media
+        total = n + n_b
+        comomentos = comomentos + comomentos_b + np.outer(delta, delta) * (n * n_b / total)
+        media = media + delta * (n_b / total)
+        n = total
+    return n, media, comomentos, columnas or []
+
+def vif_desde_correlacion(correlacion, condicion_max=1e12):
+    # Diagonal de la inversa de la matriz de correlación; si es casi singular (colinealidad
+    # perfecta o casi) se usa la pseudo-inversa y se advierte que los VIF son aproximados.
+    if np.linalg.cond(correlacion) < condicion_max:
+        try:
+            return np.diag(np.linalg.inv(correlacion))
+        except np.linalg.LinAlgError:
+            pass
+    print("Advertencia: matriz de correlación casi singular; VIF calculados con la pseudo-inversa "
+          "(hay columnas colineales).")
+    return np.diag(np.linalg.pinv(correlacion, hermitian=True))
 
 # --- CLASE BASE DE EDA (Análisis Exploratorio) ---
 class EDA_Morosidad:
     """ Clase base para el Análisis Exploratorio de Datos. """
     
-    def __init__(self, data_path, random_state=42):
+    def __init__(self, data_path, random_state=42, usar_cache_datos=True):
         self.data_path = data_path
+        self.usar_cache_datos = usar_cache_datos
         self.random_state = random_state
         np.random.seed(random_state)
         random.seed(random_state)
@@ -51,14 +233,31 @@ class EDA_Morosidad:
         self.cleaned_path = "cleaned_dataset.csv"
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.output_dir = 'output' # Por defecto
+        self.eda_dir = None
 
     def load_data(self):
-        # Carga el dataset y muestra información inicial.
-        self.df = pd.read_csv(self.data_path)
-        print(f"Dataset cargado: {self.df.shape[0]} filas, {self.df.shape[1]} columnas")
+        # Carga el dataset con los tipos del esquema (cache binario junto al CSV) y muestra información inicial.
+        inicio = time.perf_counter()
+        self.df, origen = cargar_dataset(self.data_path, usar_cache=self.usar_cache_datos)
+        print(f"Dataset cargado: {self.df.shape[0]} filas, {self.df.shape[1]} columnas "
+              f"(desde {origen}, {time.perf_counter() - inicio:.2f}s, "
+              f"{self.df.memory_usage(deep=True).sum() / 1024 ** 2:.2f} MB en memoria)")
         print(self.df.head())
+        self.validar_esquema()
         return self.df
 
+    def validar_esquema(self):
+        # Revisa el dataset contra el esquema compartido con la aplicación web (esquema.py).
+        # Las categorías que la app no acepta producirían one-hot vacíos en producción.
+        errores = validar_dataframe(self.df)
+        if errores:
+            print("Advertencia: filas que no cumplen el esquema de la aplicación:")
+            for campo, cantidad in errores.items():
+                print(f"  {campo}: {cantidad} filas")
+        else:
+            print("El dataset cumple el esquema de la aplicación.")
+        return errores
+
     def resumen_general(self):
         # Muestra información general, nulos y estadísticas básicas.
         print("\n--- Información General del Dataset ---")
@@ -74,70 +273,48 @@ class EDA_Morosidad:
         print(resumen.sort_values('pct_nulos', ascending=False))
         print(f"Duplicados detectados: {self.df.duplicated().sum()}")
 
-    # --- MÉTODO CORREGIDO ---
-    def plot_distributions(self):
-        # Genera y guarda histogramas y boxplots.
-        print("Generando gráficos de distribución...")
+    # --- FIGURAS DEL EDA ---
+    # Cada figura es una tarea (función de renderizado, argumentos, archivo) para poder dibujarlas
+    # en un pool de procesos (generar_eda) o directamente con los métodos individuales.
+
+    def _tareas_distribuciones(self, sufijo=''):
         num_cols = self.df.select_dtypes(include='number').columns.tolist()
-        
         if not num_cols:
             print("No se encontraron columnas numéricas para graficar distribuciones.")
-            return
-            
-        n = len(num_cols)
-        ncols = 3
-        nrows = int(np.ceil(n / ncols))
-        
-        # --- Histogramas ---
-        # ¡CORRECCIÓN! Usamos plt.subplots() para obtener 'fig1'
-        fig1, axes1 = plt.subplots(nrows, ncols, figsize=(5 * ncols, 4 * nrows))
-        axes1 = axes1.flatten() # Aplanar el array de ejes para iterar fácilmente
-
-        i = 0 # Inicializar contador
-        for i, c in enumerate(num_cols):
-            sns.histplot(self.df[c].dropna(), kde=True, ax=axes1[i])
-            axes1[i].set_title(f"Distribución: {c}")
-            
-        # Ocultar ejes sobrantes
-        for j in range(i + 1, len(axes1)):
-            axes1[j].set_visible(False)
-            
-        plt.tight_layout()
-        fig_path1 = os.path.join(self.output_dir, f'plot_distributions_hist_{self.timestamp}.png')
-        plt.savefig(fig_path1)
-        plt.close(fig1) # Ahora 'fig1' sí existe
+            return []
+        datos = self.df[num_cols]
+        return [(_figura_distribuciones, (datos, 'hist'), f'plot_distributions_hist{sufijo}.png'),
+                (_figura_distribuciones, (datos, 'boxplot'), f'plot_distributions_boxplot{sufijo}.png')]
 
-        
-        # --- Boxplots ---
-        # ¡CORRECCIÓN! Usamos plt.subplots() para obtener 'fig2'
-        fig2, axes2 = plt.subplots(nrows, ncols, figsize=(5 * ncols, 4 * nrows))
-        axes2 = axes2.flatten() # Aplanar el array de ejes
-
-        i = 0 # Reiniciar contador
-        for i, c in enumerate(num_cols):
-            sns.boxplot(x=self.df[c].dropna(), ax=axes2[i])
-            axes2[i].set_title(f"Boxplot: {c}")
-            
-        # Ocultar ejes sobrantes
-        for j in range(i + 1, len(axes2)):
-            axes2[j].set_visible(False)
-            
-        plt.tight_layout()
-        fig_path2 = os.path.join(self.output_dir, f'plot_distributions_boxplot_{self.timestamp}.png')
-        plt.savefig(fig_path2)
-        plt.close(fig2) # Ahora 'fig2' sí existe
+    def _tareas_correlacion(self, sufijo=''):
+        num_cols = self.df.select_dtypes(include='number').columns
+        corr = self.df[num_cols].corr()
+        return corr, [(_figura_correlacion, (corr,), f'plot_matriz_correlacion{sufijo}.png')]
+
+    def _tareas_relaciones(self, sufijo=''):
+        if self.target is None:
+            print("No se ha definido el target. Saltando análisis de relaciones.")
+            return []
+        num_cols = [c for c in self.df.select_dtypes(include='number').columns if c != self.target]
+        cat_cols = self.df.select_dtypes(include=['object', 'category', 'bool']).columns.tolist()
+        objetivo = self.df[self.target]
+        # Boxplots Numéricas vs Target y Countplots Categóricas vs Target
+        tareas = [(_figura_relacion_num, (objetivo, self.df[c]), f'plot_relacion_num_{c}{sufijo}.png')
+                  for c in num_cols]
+        tareas += [(_figura_relacion_cat, (self.df[c], objetivo), f'plot_relacion_cat_{c}{sufijo}.png')
+                   for c in cat_cols]
+        return tareas
+
+    def plot_distributions(self):
+        # Genera y guarda histogramas y boxplots.
+        print("Generando gráficos de distribución...")
+        _renderizar(self._tareas_distribuciones(f'_{self.timestamp}'), self.output_dir)
 
     def matriz_correlacion(self):
         # Genera y guarda la matriz de correlación.
         print("Generando matriz de correlación...")
-        num_cols = self.df.select_dtypes(include='number').columns
-        corr = self.df[num_cols].corr()
-        fig, ax = plt.subplots(figsize=(10, 8))
-        sns.heatmap(corr, annot=True, fmt='.2f', cmap='coolwarm', center=0, ax=ax)
-        ax.set_title("Matriz de Correlación")
-        fig_path = os.path.join(self.output_dir, f'plot_matriz_correlacion_{self.timestamp}.png')
-        plt.savefig(fig_path)
-        plt.close(fig)
+        corr, tareas = self._tareas_correlacion(f'_{self.timestamp}')
+        _renderizar(tareas, self.output_dir)
         return corr
 
     def detectar_target(self):
@@ -160,45 +337,67 @@ class EDA_Morosidad:
     def analizar_relaciones(self):
         # Genera y guarda visualizaciones de relaciones con el target.
         print("Generando gráficos de relaciones con el target...")
-        if self.target is None:
-            print("No se ha definido el target. Saltando análisis de relaciones.")
-            return
+        _renderizar(self._tareas_relaciones(f'_{self.timestamp}'), self.output_dir)
 
-        num_cols = [c for c in self.df.select_dtypes(include='number').columns if c != self.target]
-        cat_cols = self.df.select_dtypes(include=['object', 'category', 'bool']).columns.tolist()
+    def huella_dataset(self):
+        # Hash del contenido del dataset (valores, índice y columnas) y de la versión de las figuras.
+        h = hashlib.sha256(f'eda-v{VERSION_EDA}|'.encode())
+        h.update('|'.join(map(str, self.df.columns)).encode())
+        h.update(pd.util.hash_pandas_object(self.df, index=True).values.tobytes())
+        return h.hexdigest()
 
-        # Boxplots Numéricas vs Target
-        for c in num_cols:
-            fig, ax = plt.subplots(figsize=(6, 3))
-            sns.boxplot(x=self.df[self.target], y=self.df[c], ax=ax)
-            ax.set_title(f"{c} vs {self.target}")
-            fig_path = os.path.join(self.output_dir, f'plot_relacion_num_{c}_{self.timestamp}.png')
-            plt.savefig(fig_path)
-            plt.close(fig)
-
-        # Countplots Categóricas vs Target
-        for c in cat_cols:
-            fig, ax = plt.subplots(figsize=(8, 4))
-            sns.countplot(x=self.df[c], hue=self.df[self.target], ax=ax)
-            ax.set_title(f"{c} por {self.target}")
-            ax.tick_params(axis='x', rotation=45)
-            fig_path = os.path.join(self.output_dir, f'plot_relacion_cat_{c}_{self.timestamp}.png')
-            plt.savefig(fig_path)
-            plt.close(fig)
+    def generar_eda(self, procesos=None):
+        # Renderiza todas las figuras del EDA en un pool de procesos dentro de <output_dir>/eda_<huella>.
+        # Si el contenido del dataset no cambió desde la última ejecución se reutilizan las figuras.
+        huella = self.huella_dataset()
+        directorio = os.path.join(self.output_dir, f'eda_{huella[:12]}')
+        marcador = os.path.join(directorio, 'eda.json')
+        self.eda_dir = directorio
+        if os.path.exists(marcador):
+            with open(marcador, 'r', encoding='utf-8') as f:
+                figuras = json.load(f)['figuras']
+            if all(os.path.exists(os.path.join(directorio, nombre)) for nombre in figuras):
+                print(f"Dataset sin cambios: se reutilizan {len(figuras)} figuras del EDA en {directorio}")
+                return directorio
+
+        inicio = time.perf_counter()
+        os.makedirs(directorio, exist_ok=True)
+        _, tareas_corr = self._tareas_correlacion()
+        tareas = self._tareas_distribuciones() + tareas_corr + self._tareas_relaciones()
+        procesos = procesos or os.cpu_count() or 1
+        _renderizar(tareas, directorio, procesos)
+        with open(marcador, 'w', encoding='utf-8') as f:
+            json.dump({'huella': huella, 'dataset': self.data_path, 'fecha': self.timestamp,
+                       'figuras': [nombre for _, _, nombre in tareas]}, f, indent=4)
+        print(f"EDA: {len(tareas)} figuras en {time.perf_counter() - inicio:.1f}s "
+              f"({min(procesos, len(tareas))} procesos) -> {directorio}")
+        return directorio
 
-    def calcular_vif(self):
-        # Calcula el Factor de Inflación de Varianza (VIF).
+    def calcular_vif(self, bloques=None, tamano_bloque=50000):
+        # Calcula el Factor de Inflación de Varianza (VIF) de todas las columnas en una sola operación:
+        # VIF_j = (R^-1)_jj, con R la matriz de correlación (equivale a regresar cada columna sobre
+        # las demás con intercepto). R se acumula por bloques, sin copiar la matriz completa.
+        # bloques: iterable opcional de DataFrames (p. ej. pd.read_csv(..., chunksize=...)); por
+        # defecto se recorre self.df en bloques de tamano_bloque filas.
         print("Calculando VIF...")
-        num_cols = self.df.select_dtypes(include='number').columns
-        X = self.df[num_cols].dropna()
-        X = X.replace([np.inf, -np.inf], np.nan).dropna()
-        X = X.loc[:, X.var() > 1e-6]
-        if X.empty:
+        if bloques is None:
+            num_cols = self.df.select_dtypes(include='number').columns
+            bloques = (self.df[num_cols].iloc[i:i + tamano_bloque] for i in range(0, len(self.df), tamano_bloque))
+        n, media, comomentos, columnas = comomentos_por_bloques(bloques)
+        if n < 2:
+            print("No hay suficientes datos numéricos válidos para calcular VIF.")
+            return
+        varianza = np.diag(comomentos) / (n - 1)
+        validas = varianza > 1e-6
+        if not validas.any():
             print("No hay suficientes datos numéricos válidos para calcular VIF.")
             return
+        comomentos = comomentos[np.ix_(validas, validas)]
+        desviacion = np.sqrt(np.diag(comomentos))
+        correlacion = comomentos / np.outer(desviacion, desviacion)
         vif_data = pd.DataFrame()
-        vif_data['feature'] = X.columns
-        vif_data['VIF'] = [variance_inflation_factor(X.values, i) for i in range(X.shape[1])]
+        vif_data['feature'] = [c for c, v in zip(columnas, validas) if v]
+        vif_data['VIF'] = vif_desde_correlacion(correlacion)
         print(vif_data.sort_values('VIF', ascending=False))
         return vif_data
 
@@ -224,8 +423,9 @@ class ClasificadorMorosidad(EDA_Morosidad):
     """
 
     # --- MÉTODO CORREGIDO ---
-    def __init__(self, data_path, output_dir='output', random_state=42):
-        super().__init__(data_path, random_state)
+    def __init__(self, data_path, output_dir='output', random_state=42, cache_dir='auto', cache_max_mb=512,
+                 usar_cache_datos=True):
+        super().__init__(data_path, random_state, usar_cache_datos)
         
         # --- ¡AQUÍ ESTÁ LA PARTE QUE FALTA! ---
         # Directorio de salida para todos los artefactos
@@ -246,12 +446,53 @@ class ClasificadorMorosidad(EDA_Morosidad):
         self.preprocessor = None
         self.models = {}
         self.metrics = {}
+        self.reporte_busqueda = None
+        # Tiempo de ajuste y pico de memoria por modelo (entrenar_modelos)
+        self.recursos_entrenamiento = {}
+        # (id(modelo), conjunto) -> (modelo, X, probabilidades, etiquetas); ver predicciones()
+        self._cache_predicciones = {}
+        # Puntos de control por etapa (PuntosControl); None = sin puntos de control
+        self.puntos_control = None
+
+        # Cache en disco de la salida del preprocesador (Pipeline memory=): los folds de la validación
+        # cruzada y los candidatos de la búsqueda que solo cambian model__* no repiten el preprocesamiento.
+        # La clave es el hash de los datos del fold y de los parámetros del ColumnTransformer.
+        if cache_dir == 'auto':
+            cache_dir = os.path.join(self.output_dir, 'cache_preprocesamiento')
+        self.cache_max_bytes = int(cache_max_mb * 1024 * 1024)
+        self.memoria = joblib.Memory(cache_dir, verbose=0) if cache_dir else None
+        self.limitar_cache()
+
+    def etapa(self, nombre, atributos, funcion, *args, **kwargs):
+        # Ejecuta funcion(*args, **kwargs) como etapa con punto de control: si ya terminó en esta
+        # huella se recuperan su resultado y los atributos del clasificador que modifica
+        # (p. ej. 'models', 'metrics') sin volver a ejecutarla.
+        if self.puntos_control is None:
+            return funcion(*args, **kwargs)
+        terminada, guardado = self.puntos_control.cargar(nombre)
+        if terminada:
+            print(f"\n--- Etapa '{nombre}' recuperada del punto de control ---")
+            for atributo, valor in guardado['atributos'].items():
+                setattr(self, atributo, valor)
+            return guardado['resultado']
+        resultado = funcion(*args, **kwargs)
+        self.puntos_control.guardar(nombre, {
+            'resultado': resultado, 'atributos': {a: getattr(self, a) for a in atributos}})
+        return resultado
+
+    def limitar_cache(self):
+        # Acota el tamaño del cache de preprocesamiento eliminando las entradas usadas hace más tiempo.
+        if self.memoria is not None:
+            self.memoria.reduce_size(bytes_limit=self.cache_max_bytes)
 
     def dividir_datos(self):
         # (Sin cambios)
         print("\n--- Dividiendo los Datos (70% Train / 15% Validation / 15% Test) ---")
         X = self.df.drop(columns=self.target)
         y = self.df[self.target]
+        # Texto como 'category': el cache de preprocesamiento calcula el hash de cada fold ~15 veces
+        # más rápido que con columnas object (la codificación one-hot resultante es la misma)
+        X = X.astype({c: 'category' for c in X.select_dtypes(include='object').columns})
         self.X_train, X_temp, self.y_train, y_temp = train_test_split(
             X, y, test_size=0.3, random_state=self.random_state, stratify=y)
         self.X_val, self.X_test, self.y_val, self.y_test = train_test_split(
@@ -262,9 +503,13 @@ class ClasificadorMorosidad(EDA_Morosidad):
         print(f"Forma X_test:  {self.X_test.shape}")
 
     def _identificar_columnas(self):
-        # (Sin cambios)
-        self.numeric_features = self.X_train.select_dtypes(include=np.number).columns.tolist()
-        self.categorical_features = self.X_train.select_dtypes(include=['object', 'category', 'bool']).columns.tolist()
+        # Las columnas del esquema compartido conservan su tipo declarado; las demás se detectan por dtype
+        numericas = self.X_train.select_dtypes(include=np.number).columns
+        categoricas = self.X_train.select_dtypes(include=['object', 'category', 'bool']).columns
+        self.numeric_features = [c for c in self.X_train.columns
+                                 if c in COLUMNAS_NUMERICAS or (c in numericas and c not in COLUMNAS_CATEGORICAS)]
+        self.categorical_features = [c for c in self.X_train.columns
+                                     if c in COLUMNAS_CATEGORICAS or (c in categoricas and c not in COLUMNAS_NUMERICAS)]
         print(f"Columnas numéricas detectadas: {self.numeric_features}")
         print(f"Columnas categóricas detectadas: {self.categorical_features}")
 
@@ -286,24 +531,86 @@ class ClasificadorMorosidad(EDA_Morosidad):
         print("Pipeline de preprocesamiento creado exitosamente.")
         return self.preprocessor
 
-    def entrenar_modelos(self):
-        # (Sin cambios)
-        print("\n--- Entrenando Modelos ---")
-        pipeline_lr = Pipeline(steps=[
-            ('preprocessor', self.preprocessor),
-            ('model', LogisticRegression(random_state=self.random_state, max_iter=1000, class_weight='balanced'))])
-        print("Entrenando Regresión Logística...")
-        pipeline_lr.fit(self.X_train, self.y_train)
-        self.models['Regresión Logística'] = pipeline_lr
-        print("Regresión Logística entrenada.")
-        
-        pipeline_rf = Pipeline(steps=[
-            ('preprocessor', self.preprocessor),
-            ('model', RandomForestClassifier(random_state=self.random_state, class_weight='balanced'))])
-        print("Entrenando Random Forest...")
-        pipeline_rf.fit(self.X_train, self.y_train)
-        self.models['Random Forest'] = pipeline_rf
-        print("Random Forest entrenado.")
+    def entrenar_modelos(self, candidatos=None, presupuesto_cpu=None, medir_memoria=False):
+        # Entrena los candidatos del registro (candidatos.py), o los nombrados, en paralelo bajo un
+        # presupuesto de núcleos: hasta presupuesto_cpu procesos y, si sobran núcleos, n_jobs para
+        # los estimadores que lo aceptan. Registra el tiempo de ajuste por modelo y, con
+        # medir_memoria, el pico de memoria residente: cada candidato se entrena entonces en su
+        # propio proceso hijo (también con un solo núcleo), lo que agrega el costo de devolver el
+        # modelo ajustado al proceso principal.
+        # Los modelos se reemplazan: las predicciones guardadas dejan de valer
+        self.invalidar_predicciones()
+        nombres = list(candidatos or CANDIDATOS)
+        desconocidos = [n for n in nombres if n not in CANDIDATOS]
+        if desconocidos:
+            raise ValueError(f"Candidatos desconocidos: {desconocidos}; disponibles: {list(CANDIDATOS)}")
+        presupuesto = _nucleos(presupuesto_cpu)
+        procesos = min(presupuesto, len(nombres))
+        hilos = max(1, presupuesto // procesos)
+        print(f"\n--- Entrenando Modelos ({len(nombres)} candidatos, {procesos} procesos, "
+              f"presupuesto {presupuesto} núcleos) ---")
+
+        pipelines = {}
+        for nombre in nombres:
+            candidato = CANDIDATOS[nombre]
+            modelo = candidato.construir(self.random_state, self.categorical_features)
+            if candidato.paralelo:
+                modelo.set_params(n_jobs=hilos)
+            preprocesador = (candidato.preprocesador(self.numeric_features, self.categorical_features)
+                             if candidato.preprocesador else clone(self.preprocessor))
+            pipelines[nombre] = Pipeline(steps=[
+                ('preprocessor', preprocesador),
+                ('model', modelo)],
+                memory=self.memoria)
+        validacion = {n: (self.X_val, self.y_val) if CANDIDATOS[n].parada_temprana else None for n in nombres}
+
+        if medir_memoria and resource is None:
+            print("Advertencia: la medición de memoria por modelo requiere el módulo resource (no disponible); se omite.")
+            medir_memoria = False
+
+        if procesos <= 1 and not medir_memoria:
+            resultados = [_ajustar_candidato(n, p, self.X_train, self.y_train, False, validacion[n])
+                          for n, p in pipelines.items()]
+        else:
+            # maxtasksperchild=1: un proceso nuevo por candidato, para que ru_maxrss sea solo suyo
+            metodo = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+            with multiprocessing.get_context(metodo).Pool(procesos, maxtasksperchild=1) as pool:
+                pendientes = [pool.apply_async(_ajustar_candidato, (n, p, self.X_train, self.y_train,
+                                                                    medir_memoria, validacion[n]))
+                              for n, p in pipelines.items()]
+                resultados = [pendiente.get() for pendiente in pendientes]
+
+        for nombre, pipeline, recursos in resultados:
+            recursos['n_jobs'] = pipeline.named_steps['model'].get_params().get('n_jobs') or 1
+            self.models[nombre] = pipeline
+            self.recursos_entrenamiento[nombre] = recursos
+            memoria = (f", memoria residente {recursos['peak_rss_mb']:.0f} MB (+{recursos['delta_rss_mb']:.0f} MB "
+                       f"durante el ajuste)" if medir_memoria else '')
+            iteraciones = f", {recursos['n_iter']} iteraciones (parada temprana)" if 'n_iter' in recursos else ''
+            print(f"{nombre} entrenado: {recursos['fit_time_s']:.2f}s{memoria}{iteraciones}")
+
+    def _conjunto(self, dataset):
+        return {'train': (self.X_train, self.y_train), 'validation': (self.X_val, self.y_val),
+                'test': (self.X_test, self.y_test)}.get(dataset, (None, None))
+
+    def predicciones(self, name, dataset):
+        # predict_proba una sola vez por (modelo, conjunto); las etiquetas se derivan de las
+        # probabilidades (clase de mayor probabilidad, como predict). Evaluación, overfitting y
+        # comparación reutilizan el resultado. La entrada se descarta si el modelo guardado con ese
+        # nombre o los datos del conjunto se reemplazan (se guarda la referencia para comparar identidad).
+        model = self.models[name]
+        X, _ = self._conjunto(dataset)
+        clave = (id(model), dataset)
+        entrada = self._cache_predicciones.get(clave)
+        if entrada is None or entrada[0] is not model or entrada[1] is not X:
+            proba = model.predict_proba(X)
+            entrada = (model, X, proba, model.classes_[proba.argmax(axis=1)])
+            self._cache_predicciones[clave] = entrada
+        return entrada[2], entrada[3]
+
+    def invalidar_predicciones(self):
+        # Descarta las predicciones guardadas (p. ej. tras reentrenar modelos en el mismo objeto).
+        self._cache_predicciones.clear()
 
     def evaluar_modelos(self, dataset='validation'):
         # Modificado para guardar gráficos
@@ -322,8 +629,8 @@ class ClasificadorMorosidad(EDA_Morosidad):
         self.metrics[dataset] = {}
         for name, model in self.models.items():
             print(f"\n=== Modelo: {name} ===")
-            y_pred = model.predict(X)
-            y_proba = model.predict_proba(X)[:, 1]
+            y_proba, y_pred = self.predicciones(name, dataset)
+            y_proba = y_proba[:, 1]
             acc = accuracy_score(y, y_pred)
             precision = precision_score(y, y_pred, zero_division=0)
             recall = recall_score(y, y_pred, zero_division=0)
@@ -370,13 +677,13 @@ class ClasificadorMorosidad(EDA_Morosidad):
         analisis = {}
         for name, model in self.models.items():
             print(f"\n{'='*50}\nModelo: {name}\n{'='*50}")
-            y_pred_train = model.predict(self.X_train)
+            _, y_pred_train = self.predicciones(name, 'train')
             f1_train = f1_score(self.y_train, y_pred_train, zero_division=0)
             acc_train = accuracy_score(self.y_train, y_pred_train)
-            y_pred_val = model.predict(self.X_val)
+            _, y_pred_val = self.predicciones(name, 'validation')
             f1_val = f1_score(self.y_val, y_pred_val, zero_division=0)
             acc_val = accuracy_score(self.y_val, y_pred_val)
-            y_pred_test = model.predict(self.X_test)
+            _, y_pred_test = self.predicciones(name, 'test')
             f1_test = f1_score(self.y_test, y_pred_test, zero_division=0)
             acc_test = accuracy_score(self.y_test, y_pred_test)
             diff_train_val = f1_train - f1_val
@@ -412,8 +719,11 @@ class ClasificadorMorosidad(EDA_Morosidad):
         return df_analisis
 
 
-    def validacion_cruzada(self, cv=5):
-        # Modificado para guardar gráficos y corregir error de 'if f1_scores:'
+    def validacion_cruzada(self, cv=5, metricas=None, presupuesto_cpu=None):
+        # Un solo ajuste por fold (cross_validate): todas las métricas se calculan con las
+        # mismas predicciones/probabilidades del fold. Devuelve también tiempos de ajuste y scoring.
+        # Los folds se ajustan en paralelo con hasta presupuesto_cpu procesos (por defecto, todos los núcleos).
+        metricas = list(metricas or METRICAS_CV)
         print("\n" + "="*70 + f"\nVALIDACIÓN CRUZADA (K={cv} Folds Estratificados)\n" + "="*70)
         X_combined = pd.concat([self.X_train, self.X_val])
         y_combined = pd.concat([self.y_train, self.y_val])
@@ -422,41 +732,51 @@ class ClasificadorMorosidad(EDA_Morosidad):
         
         for name, model in self.models.items():
             print(f"\n{'='*50}\nValidación Cruzada: {name}\n{'='*50}")
-            scoring_metrics = ['accuracy', 'precision', 'recall', 'f1', 'roc_auc']
             scores = {}
-            for metric in scoring_metrics:
-                try:
-                    cv_scores = cross_val_score(model, X_combined, y_combined, cv=skf, scoring=metric, n_jobs=-1)
+            try:
+                resultado = cross_validate(model, X_combined, y_combined, cv=skf, scoring=metricas,
+                                           n_jobs=_nucleos(presupuesto_cpu), error_score='raise')
+                for metric in metricas:
+                    cv_scores = resultado[f'test_{metric}']
                     scores[metric] = {'mean': cv_scores.mean(), 'std': cv_scores.std(), 'scores': cv_scores}
                     print(f"   {metric.upper():12s}: {cv_scores.mean():.4f} (+/- {cv_scores.std():.4f})")
-                except Exception as e:
-                    print(f"   {metric.upper():12s}: Error - {str(e)}")
+                for tiempo in ('fit_time', 'score_time'):
+                    scores[tiempo] = {'mean': resultado[tiempo].mean(), 'std': resultado[tiempo].std(),
+                                      'scores': resultado[tiempo]}
+                print(f"   Tiempo por fold: ajuste {resultado['fit_time'].mean():.3f}s, "
+                      f"scoring {resultado['score_time'].mean():.3f}s")
+            except Exception as e:
+                print(f"   Error en validación cruzada - {str(e)}")
+                for metric in metricas + ['fit_time', 'score_time']:
                     scores[metric] = {'mean': 0, 'std': 0, 'scores': []}
             cv_results[name] = scores
             # (prints de estabilidad omitidos por brevedad)
 
+        columnas = metricas + ['fit_time', 'score_time']
         comparison_data = {}
         for name, scores in cv_results.items():
-            comparison_data[name] = {f'{metric}_mean': scores[metric]['mean'] for metric in scoring_metrics}
-            comparison_data[name].update({f'{metric}_std': scores[metric]['std'] for metric in scoring_metrics})
+            comparison_data[name] = {f'{metric}_mean': scores[metric]['mean'] for metric in columnas}
+            comparison_data[name].update({f'{metric}_std': scores[metric]['std'] for metric in columnas})
         df_cv = pd.DataFrame(comparison_data).T
         print(f"\n{'='*70}\nRESUMEN DE VALIDACIÓN CRUZADA\n{'='*70}")
-        print(df_cv[[f'{m}_mean' for m in scoring_metrics]])
+        print(df_cv[[f'{m}_mean' for m in columnas]])
 
         # --- GUARDAR GRÁFICO ---
         fig, axes = plt.subplots(1, len(self.models), figsize=(7*len(self.models), 5), squeeze=False)
         axes = axes.ravel()
         for idx, (name, scores) in enumerate(cv_results.items()):
-            f1_scores = scores['f1']['scores']
+            metrica_grafico = 'f1' if 'f1' in metricas else metricas[0]
+            f1_scores = scores[metrica_grafico]['scores']
+            etiqueta = 'F1-Score' if metrica_grafico == 'f1' else metrica_grafico
             
             # --- ¡CORRECCIÓN DE VALUEERROR! ---
             if len(f1_scores) > 0: 
-                axes[idx].boxplot([f1_scores], labels=['F1-Score'])
+                axes[idx].boxplot([f1_scores], tick_labels=[etiqueta])
                 axes[idx].scatter([1]*len(f1_scores), f1_scores, alpha=0.5, color='red')
-                axes[idx].set_title(f'{name}\nF1: {scores["f1"]["mean"]:.3f} ± {scores["f1"]["std"]:.3f}', fontweight='bold')
-                axes[idx].set_ylabel('F1-Score')
+                axes[idx].set_title(f'{name}\n{etiqueta}: {scores[metrica_grafico]["mean"]:.3f} ± {scores[metrica_grafico]["std"]:.3f}', fontweight='bold')
+                axes[idx].set_ylabel(etiqueta)
                 axes[idx].grid(alpha=0.3, axis='y')
-                axes[idx].axhline(y=scores['f1']['mean'], color='green', linestyle='--', alpha=0.7)
+                axes[idx].axhline(y=scores[metrica_grafico]['mean'], color='green', linestyle='--', alpha=0.7)
                 
         plt.tight_layout()
         fig_path = os.path.join(self.output_dir, f'plot_validacion_cruzada_{self.timestamp}.png')
@@ -484,6 +804,12 @@ class ClasificadorMorosidad(EDA_Morosidad):
                 'Val_Precision': val_metrics['Precision'], 'Test_Precision': test_metrics['Precision'],
                 'Consistency': abs(val_metrics['F1-Score'] - test_metrics['F1-Score'])
             }
+            # Costo: tiempo de ajuste (entrenar_modelos) y latencia de inferencia sobre test
+            lote_ms, fila_ms = _latencia_inferencia(self.models[name], self.X_test)
+            comparison[name].update({
+                'Fit_Time_s': self.recursos_entrenamiento.get(name, {}).get('fit_time_s', np.nan),
+                'Latencia_1000_filas_ms': lote_ms, 'Latencia_fila_ms': fila_ms
+            })
         df_comp = pd.DataFrame(comparison).T
         
         # (prints de rankings omitidos por brevedad)
@@ -524,9 +850,19 @@ class ClasificadorMorosidad(EDA_Morosidad):
 
         print(f"\n{'='*70}\nTABLA COMPLETA DE COMPARACIÓN\n{'='*70}")
         print(df_comp)
+        print(f"\n{'='*70}\nCOSTO VS DESEMPEÑO\n{'='*70}")
+        print(df_comp[['Test_F1', 'Test_ROC_AUC', 'Fit_Time_s', 'Latencia_1000_filas_ms', 'Latencia_fila_ms']].to_string())
         return df_comp, mejor_modelo
 
-    def ejecutar_pipeline_completo(self):
+    def ejecutar_eda(self, procesos=None):
+        # Solo el análisis exploratorio (carga, resumen, target y figuras), sin entrenar.
+        self.load_data()
+        self.resumen_general()
+        self.detectar_target()
+        return self.generar_eda(procesos)
+
+    def ejecutar_pipeline_completo(self, metricas_cv=None, eda=True, candidatos=None, presupuesto_cpu=None,
+                                   medir_memoria=False):
         # Orquesta todo el flujo base.
         print("=== INICIO DEL PIPELINE DE CLASIFICACIÓN ===\n")
         try:
@@ -538,26 +874,32 @@ class ClasificadorMorosidad(EDA_Morosidad):
                 print("ERROR: No se pudo detectar la variable objetivo. Abortando.")
                 return None
 
-            print("\n--- Generando Análisis Exploratorio Visual (EDA) ---")
-            self.plot_distributions()
-            self.matriz_correlacion()
-            self.analizar_relaciones()
+            if eda:
+                print("\n--- Generando Análisis Exploratorio Visual (EDA) ---")
+                self.generar_eda()
+            else:
+                print("\n--- EDA omitido (--sin-eda) ---")
             
+            # La división y el preprocesador son deterministas y baratos: se rehacen siempre.
+            # Las etapas siguientes pasan por etapa() (puntos de control, si están activos).
             self.dividir_datos()
             self.crear_pipeline_preprocesamiento()
-            self.entrenar_modelos()
+            self.etapa('entrenamiento', ['models', 'recursos_entrenamiento'], self.entrenar_modelos,
+                       candidatos=candidatos, presupuesto_cpu=presupuesto_cpu, medir_memoria=medir_memoria)
             
             print("\n--- Evaluación en Conjunto de VALIDACIÓN ---")
-            metrics_val_df = self.evaluar_modelos(dataset='validation')
+            metrics_val_df = self.etapa('evaluacion_validacion', ['metrics'], self.evaluar_modelos, dataset='validation')
             print(metrics_val_df)
             
             print("\n--- Evaluación en Conjunto de TEST ---")
-            metrics_test_df = self.evaluar_modelos(dataset='test')
+            metrics_test_df = self.etapa('evaluacion_test', ['metrics'], self.evaluar_modelos, dataset='test')
             print(metrics_test_df)
             
-            overfitting_df = self.analizar_overfitting()
-            cv_results, cv_df = self.validacion_cruzada(cv=5)
-            comparison_df, mejor_modelo = self.comparacion_objetiva_modelos()
+            overfitting_df = self.etapa('overfitting', [], self.analizar_overfitting)
+            cv_results, cv_df = self.etapa('validacion_cruzada', [], self.validacion_cruzada, cv=5,
+                                           metricas=metricas_cv, presupuesto_cpu=presupuesto_cpu)
+            self.limitar_cache()
+            comparison_df, mejor_modelo = self.etapa('comparacion', [], self.comparacion_objetiva_modelos)
             
             print("\n" + "="*70 + "\nPIPELINE DE CLASIFICACIÓN COMPLETADO\n" + "="*70)
             print(f"\nModelo Recomendado para Producción: {mejor_modelo}")
@@ -589,41 +931,232 @@ def _seleccionar_mejor_modelo_por_validacion(clf: ClasificadorMorosidad):
     print(f"\n[2.3] Mejor modelo base (VALIDACIÓN, F1): {best_name}")
     return best_name
 
-def _optimizar_mejor_modelo(clf: ClasificadorMorosidad, nombre_mejor: str, cv=5, n_iter=30, random_state=42):
+def _espacio_busqueda(nombre_mejor, estrategia):
+    # Espacio de búsqueda y nombre del modelo optimizado según el registro de candidatos.
+    candidato = candidato_de(nombre_mejor)
+    if candidato is None:
+        return None, None
+    return candidato.espacio(estrategia), candidato.nombre_optimizado
+
+def _evaluar_puntos(base_model, puntos, X, y, skf, limite=None, nucleos=1):
+    # Validación cruzada (F1) de los puntos del espacio, por lotes de tantos candidatos como núcleos.
+    # Antes de cada lote se revisa el plazo (perf_counter): no se programa un lote si el plazo venció
+    # o si, al ritmo del lote anterior, terminaría después del plazo (el primer lote siempre se evalúa).
+    # Devuelve ([(params, media, desviación)] de los puntos evaluados, en orden; True si el plazo
+    # impidió evaluar alguno de los puntos restantes).
+    tamano_lote = nucleos
+    evaluados = []
+    duracion_lote = 0.0
+    while len(evaluados) < len(puntos):
+        ahora = time.perf_counter()
+        if limite is not None and evaluados and (ahora >= limite or ahora + duracion_lote > limite):
+            return evaluados, True
+        lote = puntos[len(evaluados):len(evaluados) + tamano_lote]
+        busqueda = GridSearchCV(base_model, [{k: [v] for k, v in punto.items()} for punto in lote],
+                                scoring='f1', cv=skf, n_jobs=nucleos, refit=False)
+        busqueda.fit(X, y)
+        duracion_lote = time.perf_counter() - ahora
+        r = busqueda.cv_results_
+        evaluados += list(zip(r['params'], r['mean_test_score'], r['std_test_score']))
+    return evaluados, False
+
+def _mejores(evaluados, cantidad):
+    # Los 'cantidad' puntos de mayor F1 medio (los que fallaron, con NaN, quedan al final)
+    orden = sorted(evaluados, key=lambda e: -np.inf if np.isnan(e[1]) else e[1], reverse=True)
+    return orden[:cantidad]
+
+def _busqueda_con_plazo(base_model, param_grid, estrategia, X, y, skf, n_candidatos, limite, random_state,
+                        recurso=None, min_recursos=None, max_recursos=None, factor=3, rondas=1, nucleos=1):
+    # Búsqueda equivalente a Randomized/Grid/HalvingRandomSearchCV con un plazo de reloj real: se
+    # evalúa por lotes (y en halving por rondas) y al vencer el plazo no se programa nada más. El mejor
+    # candidato se elige en la última ronda evaluada y se reajusta con el recurso completo. El primer
+    # lote de la primera ronda y ese ajuste final se ejecutan aunque el plazo ya haya vencido (sin ellos
+    # no hay modelo); las rondas siguientes solo empiezan dentro del plazo. Devuelve un objeto con la
+    # interfaz usada de las búsquedas de scikit-learn (cv_results_, best_*, n_candidates_, n_iterations_).
+    if estrategia == 'grid':
+        puntos = list(ParameterGrid(param_grid))
+    else:
+        puntos = list(ParameterSampler(param_grid, n_candidatos, random_state=random_state))
+    todos, recursos, ultima_ronda, rondas_hechas = [], [], [], 0
+    completa = True
+    vivos = puntos
+    for i in range(rondas if estrategia == 'halving' else 1):
+        if i > 0 and time.perf_counter() >= limite:
+            completa = False
+            break
+        Xr, yr, puntos_ronda = X, y, vivos
+        if estrategia == 'halving':
+            r = max_recursos if i == rondas - 1 else min(min_recursos * factor ** i, max_recursos)
+            if recurso == 'n_samples':
+                if r < len(X):
+                    Xr, _, yr, _ = train_test_split(X, y, train_size=r, stratify=y, random_state=random_state)
+            else:
+                puntos_ronda = [dict(punto, **{recurso: r}) for punto in vivos]
+        evaluados, cortada = _evaluar_puntos(base_model, puntos_ronda, Xr, yr, skf, limite, nucleos)
+        if cortada:
+            completa = False
+        if not evaluados:
+            break
+        rondas_hechas += 1
+        if i == 0:
+            candidatos_iniciales = len(evaluados)
+        todos += evaluados
+        ultima_ronda = evaluados
+        if estrategia == 'halving':
+            recursos += [r] * len(evaluados)
+        if not completa or len(evaluados) == 1:
+            break
+        vivos = [{k: v for k, v in params.items() if k != recurso}
+                 for params, _, _ in _mejores(evaluados, int(np.ceil(len(evaluados) / factor)))]
+
+    if not ultima_ronda:
+        raise RuntimeError("El plazo de la búsqueda venció antes de evaluar un solo candidato.")
+    mejor_params, mejor_score, _ = _mejores(ultima_ronda, 1)[0]
+    mejor_params = {k: v for k, v in mejor_params.items() if k != recurso}
+    mejor_estimador = clone(base_model).set_params(**mejor_params)
+    if estrategia == 'halving' and recurso != 'n_samples':
+        mejor_estimador.set_params(**{recurso: max_recursos})
+    mejor_estimador.fit(X, y)
+
+    cv_results = {'params': [params for params, _, _ in todos],
+                  'mean_test_score': np.array([media for _, media, _ in todos])}
+    if estrategia == 'halving':
+        cv_results['n_resources'] = np.array(recursos)
+    return SimpleNamespace(cv_results_=cv_results, best_params_=mejor_params, best_score_=mejor_score,
+                           best_estimator_=mejor_estimador, n_candidates_=[candidatos_iniciales],
+                           n_iterations_=rondas_hechas, plazo_agotado=not completa)
+
+def _reporte_busqueda(search, estrategia, cv, n_iter, duracion, max_recursos=None):
+    # Ajustes realizados frente a la referencia: RandomizedSearchCV con n_iter candidatos a tamaño completo.
+    resultados = search.cv_results_
+    ajustes = len(resultados['params']) * cv
+    if 'n_resources' in resultados:
+        # Ajustes con menos recursos cuentan en proporción (costo ~ filas o árboles)
+        equivalentes = float(np.sum(resultados['n_resources'])) * cv / max_recursos
+    else:
+        equivalentes = float(ajustes)
+    referencia = n_iter * cv
+    # Cota superior aproximada, no medida: extrapola la duración en proporción a los ajustes completos
+    # equivalentes (supone costo lineal en filas/árboles y sin costo fijo por ajuste, lo que la infla).
+    tiempo_referencia = duracion * referencia / equivalentes if equivalentes else duracion
+    return {
+        'estrategia': estrategia,
+        'candidatos': int(search.n_candidates_[0]) if hasattr(search, 'n_candidates_') else len(resultados['params']),
+        'ajustes': ajustes,
+        'ajustes_equivalentes': equivalentes,
+        'ajustes_referencia': referencia,
+        'ajustes_ahorrados': referencia - equivalentes,
+        'tiempo_s': duracion,
+        'tiempo_referencia_extrapolado_s': tiempo_referencia,
+        'tiempo_ahorrado_cota_superior_aprox_s': tiempo_referencia - duracion,
+        'rondas': int(search.n_iterations_) if hasattr(search, 'n_iterations_') else 1
+    }
+
+def _optimizar_mejor_modelo(clf: ClasificadorMorosidad, nombre_mejor: str, cv=5, n_iter=30, random_state=42,
+                            estrategia='random', recurso='auto', factor=3,
+                            presupuesto_ajustes=None, presupuesto_segundos=None, presupuesto_cpu=None):
+    # estrategia: 'random' (RandomizedSearchCV), 'grid' (GridSearchCV) o 'halving' (HalvingRandomSearchCV).
+    # En 'halving' el recurso son las filas de entrenamiento o los árboles (n_estimators) y las
+    # configuraciones débiles se descartan con poco recurso. presupuesto_ajustes (en ajustes completos
+    # equivalentes) limita la cantidad de candidatos hasta n_iter; presupuesto_segundos es un plazo de
+    # reloj: la búsqueda se hace por lotes/rondas y deja de programar evaluaciones al vencer.
+    # La validación cruzada de la búsqueda usa hasta presupuesto_cpu procesos (por defecto, todos).
     if nombre_mejor not in clf.models:
         print("Error: nombre del mejor modelo no está en clf.models.")
         return None, None, None, None
     base_model = clf.models[nombre_mejor]
+    nucleos = _nucleos(presupuesto_cpu)
     skf = StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state)
-    if 'Regresión Logística' in nombre_mejor:
-        param_grid = {
-            'model__solver': ['saga'], 'model__penalty': ['l1', 'l2', 'elasticnet'],
-            'model__C': loguniform(1e-3, 1e2), 'model__l1_ratio': [0.15, 0.3, 0.5, 0.7, 0.85]
-        }
-        search = RandomizedSearchCV(
-            estimator=base_model, param_distributions=param_grid, n_iter=n_iter,
-            scoring='f1', cv=skf, n_jobs=-1, random_state=random_state, verbose=0
+    param_grid, etiqueta_nuevo = _espacio_busqueda(nombre_mejor, estrategia)
+    if param_grid is None:
+        print("Modelo no reconocido para optimización.")
+        return None, None, None, None
+
+    max_recursos = None
+    if estrategia == 'halving':
+        if recurso == 'auto':
+            recurso = 'n_estimators' if 'model__n_estimators' in param_grid else 'filas'
+        if recurso == 'n_estimators':
+            if 'model__n_estimators' not in param_grid:
+                print(f"[2.3] '{nombre_mejor}' no tiene n_estimators; se usan las filas como recurso.")
+                recurso = 'filas'
+            else:
+                param_grid.pop('model__n_estimators')
+                recurso, max_recursos = 'model__n_estimators', MAX_ARBOLES
+        if recurso == 'filas':
+            recurso, max_recursos = 'n_samples', len(clf.X_train)
+        # Cuatro rondas con factor 3: 1/27, 1/9, 1/3 y el recurso completo
+        min_recursos = max(max_recursos // factor ** 3, 1)
+        rondas = int(np.floor(np.log(max_recursos / min_recursos) / np.log(factor))) + 1
+
+    # presupuesto_ajustes acota la cantidad de candidatos (nunca por encima de n_iter);
+    # presupuesto_segundos es un plazo de reloj real que se controla durante la búsqueda.
+    presupuesto = presupuesto_ajustes
+    if estrategia == 'halving':
+        n_candidatos = n_iter
+        if presupuesto is not None:
+            # Cada ronda cuesta ~ n_candidatos * min_recursos / max_recursos ajustes completos por fold
+            n_candidatos = min(n_iter, max(factor, int(presupuesto * max_recursos / (rondas * cv * min_recursos))))
+        descripcion = (f"Búsqueda por halving: {n_candidatos} candidatos, recurso '{recurso}' "
+                       f"de {min_recursos} a {max_recursos} (factor {factor})")
+    elif estrategia == 'grid':
+        n_candidatos = len(ParameterGrid(param_grid))
+        if presupuesto is not None and n_candidatos * cv > presupuesto:
+            print(f"[2.3] Advertencia: la rejilla ({n_candidatos * cv} ajustes) excede el presupuesto "
+                  f"({presupuesto:.0f} ajustes); se ejecuta completa.")
+        descripcion = f"Búsqueda en rejilla: {n_candidatos} combinaciones"
+    else:
+        n_candidatos = n_iter if presupuesto is None else max(1, min(n_iter, int(presupuesto // cv)))
+        descripcion = f"Búsqueda aleatoria: {n_candidatos} candidatos"
+
+    if presupuesto_segundos:
+        print(f"\n[2.3] {descripcion}; plazo de {presupuesto_segundos:.0f}s "
+              f"(no se programan más lotes ni rondas al vencer)")
+    elif estrategia == 'halving':
+        search = HalvingRandomSearchCV(
+            estimator=base_model, param_distributions=param_grid, n_candidates=n_candidatos,
+            resource=recurso, max_resources=max_recursos, min_resources=min_recursos, factor=factor,
+            aggressive_elimination=presupuesto is not None,
+            scoring='f1', cv=skf, n_jobs=nucleos, random_state=random_state, verbose=0
         )
-        etiqueta_nuevo = 'Regresión Logística (Optimizada)'
-    elif 'Random Forest' in nombre_mejor:
-        param_grid = {
-            'model__n_estimators': randint(150, 600),
-            'model__max_depth': [None, 6, 10, 14, 18, 22],
-            'model__min_samples_split': randint(2, 20),
-            'model__min_samples_leaf': randint(1, 10),
-            'model__max_features': ['sqrt', 'log2', 0.5, 0.7, 1.0],
-            'model__class_weight': ['balanced']
-        }
+        print(f"\n[2.3] {descripcion}")
+    elif estrategia == 'grid':
+        search = GridSearchCV(
+            estimator=base_model, param_grid=param_grid, scoring='f1', cv=skf, n_jobs=nucleos, verbose=0
+        )
+        print(f"\n[2.3] {descripcion}")
+    else:
         search = RandomizedSearchCV(
-            estimator=base_model, param_distributions=param_grid, n_iter=n_iter,
-            scoring='f1', cv=skf, n_jobs=-1, random_state=random_state, verbose=0
+            estimator=base_model, param_distributions=param_grid, n_iter=n_candidatos,
+            scoring='f1', cv=skf, n_jobs=nucleos, random_state=random_state, verbose=0
         )
-        etiqueta_nuevo = 'Random Forest (Optimizado)'
+        print(f"\n[2.3] {descripcion}")
+
+    print("[2.3] Ejecutando búsqueda de hiperparámetros...")
+    inicio = time.perf_counter()
+    if presupuesto_segundos:
+        search = _busqueda_con_plazo(
+            base_model, param_grid, estrategia, clf.X_train, clf.y_train, skf, n_candidatos,
+            inicio + presupuesto_segundos, random_state, recurso=recurso if estrategia == 'halving' else None,
+            min_recursos=min_recursos if estrategia == 'halving' else None, max_recursos=max_recursos,
+            factor=factor, rondas=rondas if estrategia == 'halving' else 1, nucleos=nucleos)
+        if search.plazo_agotado:
+            print(f"[2.3] Plazo agotado: {len(search.cv_results_['params'])} evaluaciones en "
+                  f"{search.n_iterations_} ronda(s); se elige el mejor de la última ronda evaluada.")
     else:
-        print("Modelo no reconocido para optimización.")
-        return None, None, None, None
-    print("\n[2.3] Ejecutando búsqueda de hiperparámetros...")
-    search.fit(clf.X_train, clf.y_train)
+        search.fit(clf.X_train, clf.y_train)
+    duracion = time.perf_counter() - inicio
+    clf.reporte_busqueda = _reporte_busqueda(search, estrategia, cv, n_iter, duracion, max_recursos)
+    if presupuesto_segundos:
+        clf.reporte_busqueda.update({'plazo_s': presupuesto_segundos,
+                                     'plazo_agotado': bool(search.plazo_agotado)})
+    reporte = clf.reporte_busqueda
+    print(f"[2.3] {reporte['ajustes']} ajustes ({reporte['ajustes_equivalentes']:.1f} completos equivalentes) "
+          f"en {duracion:.1f}s. Frente a la búsqueda aleatoria de referencia ({n_iter} candidatos × {cv} folds "
+          f"= {reporte['ajustes_referencia']} ajustes): ahorro de {reporte['ajustes_ahorrados']:.1f} ajustes "
+          f"y hasta ≈ {reporte['tiempo_ahorrado_cota_superior_aprox_s']:.1f}s (cota superior aproximada: "
+          f"extrapolación lineal por recurso, no medida).")
+
     best_estimator = search.best_estimator_
     best_params = search.best_params_
     best_score = search.best_score_
@@ -631,6 +1164,7 @@ def _optimizar_mejor_modelo(clf: ClasificadorMorosidad, nombre_mejor: str, cv=5,
     for k, v in best_params.items():
         print(f"   - {k}: {v}")
     clf.models[etiqueta_nuevo] = best_estimator
+    clf.limitar_cache()
     return etiqueta_nuevo, best_estimator, best_params, best_score
 
 def _comparar_mejora_incremental(clf: ClasificadorMorosidad, nombre_base: str, nombre_opt: str):
@@ -705,13 +1239,41 @@ def main(args):
     print("SISTEMA DE PREDICCIÓN DE MOROSIDAD - AHORRO VALLE")
     print("="*70)
 
+    if args.incremental:
+        # Modo fuera de memoria: lectura por bloques y SGD logístico con partial_fit
+        entrenar_incremental(args.input_file, args.output_dir, tamano_bloque=args.tamano_bloque,
+                             epocas=args.epocas, semilla=42)
+        return
+
     clasificador = ClasificadorMorosidad(
         data_path=args.input_file,
         output_dir=args.output_dir,
-        random_state=42
+        random_state=42,
+        cache_dir=None if args.sin_cache else args.cache_dir,
+        cache_max_mb=args.cache_max_mb,
+        usar_cache_datos=not args.sin_cache_datos
     )
 
-    resultados_base = clasificador.ejecutar_pipeline_completo()
+    if args.solo_eda:
+        clasificador.ejecutar_eda()
+        return
+
+    if not args.sin_checkpoints:
+        # Huella de la corrida: datos + código + parámetros que afectan a los modelos
+        parametros = {
+            'random_state': clasificador.random_state, 'metricas_cv': args.metricas_cv, 'search': args.search,
+            'candidatos': args.candidatos,
+            'recurso': args.recurso, 'presupuesto_ajustes': args.presupuesto_ajustes,
+            'presupuesto_segundos': args.presupuesto_segundos
+        }
+        huella = huella_ejecucion(args.input_file, ARCHIVOS_CODIGO, parametros)
+        clasificador.puntos_control = PuntosControl(os.path.join(args.output_dir, 'checkpoints'), huella,
+                                                    reanudar=args.reanudar)
+
+    resultados_base = clasificador.ejecutar_pipeline_completo(metricas_cv=args.metricas_cv, eda=not args.sin_eda,
+                                                              candidatos=args.candidatos,
+                                                              presupuesto_cpu=args.presupuesto_cpu,
+                                                              medir_memoria=args.medir_memoria)
 
     # Manejar si el pipeline falló (ej. no se encontró el target)
     if resultados_base is None:
@@ -727,11 +1289,15 @@ def main(args):
     _nombre_final_recomendado = resultados_base.get('best_model')
     
     if _best_base is not None and _nombre_final_recomendado is not None:
-        nombre_opt, best_estimator, best_params, best_cv = _optimizar_mejor_modelo(
-            clasificador, _best_base, cv=5, n_iter=30, random_state=clasificador.random_state
+        nombre_opt, best_estimator, best_params, best_cv = clasificador.etapa(
+            'optimizacion', ['models', 'reporte_busqueda'], _optimizar_mejor_modelo,
+            clasificador, _best_base, cv=5, n_iter=30, random_state=clasificador.random_state,
+            estrategia=args.search, recurso=args.recurso, presupuesto_ajustes=args.presupuesto_ajustes,
+            presupuesto_segundos=args.presupuesto_segundos, presupuesto_cpu=args.presupuesto_cpu
         )
         if nombre_opt is not None:
-            resumen_mejora = _comparar_mejora_incremental(clasificador, _best_base, nombre_opt)
+            resumen_mejora = clasificador.etapa('mejora_incremental', [], _comparar_mejora_incremental,
+                                                clasificador, _best_base, nombre_opt)
             _justificar_seleccion_final(resumen_mejora, nombre_opt)
             _nombre_final_recomendado = nombre_opt 
             print("\n[2.3] Modelo optimizado registrado.")
@@ -748,6 +1314,8 @@ def main(args):
     # 1. Guardar el modelo final (pipeline completo)
     if _nombre_final_recomendado and _nombre_final_recomendado in clasificador.models:
         final_model_pipeline = clasificador.models[_nombre_final_recomendado]
+        # El artefacto no debe depender del cache local de entrenamiento
+        final_model_pipeline.set_params(memory=None)
         model_filename = os.path.join(args.output_dir, f'model_pipeline_final_{timestamp}.joblib')
         joblib.dump(final_model_pipeline, model_filename)
         print(f"✅ Modelo final guardado en: {model_filename}")
@@ -775,6 +1343,10 @@ def main(args):
         results_serializable['cross_validation'] = resultados_base['cross_validation'].to_dict('index')
     if 'comparison' in resultados_base and not resultados_base['comparison'].empty:
         results_serializable['comparison'] = resultados_base['comparison'].to_dict('index')
+    if clasificador.reporte_busqueda is not None:
+        results_serializable['hyperparameter_search'] = clasificador.reporte_busqueda
+    if clasificador.recursos_entrenamiento:
+        results_serializable['training_resources'] = clasificador.recursos_entrenamiento
 
     try:
         with open(metrics_filename, 'w') as f:
@@ -784,6 +1356,8 @@ def main(args):
         print(f"❌ ERROR al guardar el JSON de resultados: {e}")
         
     print(f"✅ Gráficos y dataset limpio guardados en el directorio: {args.output_dir}")
+    if clasificador.puntos_control is not None:
+        clasificador.puntos_control.completar()
 
 # --- PUNTO DE ENTRADA DEL SCRIPT ---
 
@@ -805,6 +1379,137 @@ if __name__ == "__main__":
         default="output",
         help="Directorio donde se guardarán los modelos, métricas y gráficos."
     )
+
+    parser.add_argument(
+        "--metricas_cv",
+        nargs="+",
+        default=None,
+        help=f"Métricas de scoring para la validación cruzada (por defecto: {' '.join(METRICAS_CV)})."
+    )
+
+    grupo_eda = parser.add_mutually_exclusive_group()
+    grupo_eda.add_argument(
+        "--sin-eda", "--sin_eda",
+        dest="sin_eda",
+        action="store_true",
+        help="Entrena sin generar las figuras del análisis exploratorio."
+    )
+    grupo_eda.add_argument(
+        "--solo-eda", "--solo_eda",
+        dest="solo_eda",
+        action="store_true",
+        help="Solo genera las figuras del análisis exploratorio, sin entrenar."
+    )
+
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default="auto",
+        help="Directorio del cache de preprocesamiento (por defecto, <output_dir>/cache_preprocesamiento)."
+    )
+
+    parser.add_argument(
+        "--cache_max_mb",
+        type=float,
+        default=512,
+        help="Tamaño máximo del cache de preprocesamiento; se eliminan las entradas menos usadas."
+    )
+
+    parser.add_argument(
+        "--sin_cache",
+        action="store_true",
+        help="Desactiva el cache de preprocesamiento entre folds y candidatos."
+    )
+
+    parser.add_argument(
+        "--sin_cache_datos",
+        action="store_true",
+        help="Lee siempre el CSV en lugar del cache binario tipado que se guarda junto a él."
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Entrenamiento fuera de memoria: lee el CSV por bloques y entrena un SGD logístico con partial_fit."
+    )
+
+    parser.add_argument(
+        "--tamano_bloque",
+        type=int,
+        default=100000,
+        help="Filas por bloque en el modo --incremental."
+    )
+
+    parser.add_argument(
+        "--epocas",
+        type=int,
+        default=5,
+        help="Épocas máximas de SGD en el modo --incremental (se conserva la mejor en validación)."
+    )
+
+    parser.add_argument(
+        "--candidatos",
+        nargs="+",
+        choices=list(CANDIDATOS),
+        default=None,
+        help="Modelos candidatos a entrenar (por defecto, todos los del registro de candidatos.py)."
+    )
+
+    parser.add_argument(
+        "--presupuesto_cpu",
+        type=int,
+        default=None,
+        help="Núcleos del entrenamiento: candidatos en paralelo, validación cruzada y búsqueda de "
+             "hiperparámetros (por defecto, todos los disponibles)."
+    )
+
+    parser.add_argument(
+        "--medir_memoria",
+        action="store_true",
+        help="Registra el pico de memoria residente de cada modelo (un proceso hijo por candidato)."
+    )
+
+    parser.add_argument(
+        "--search",
+        choices=ESTRATEGIAS_BUSQUEDA,
+        default="random",
+        help="Estrategia de búsqueda de hiperparámetros: halving (successive halving), random o grid."
+    )
+
+    parser.add_argument(
+        "--recurso",
+        choices=['auto', 'filas', 'n_estimators'],
+        default="auto",
+        help="Recurso de --search halving (auto: n_estimators para Random Forest, filas para el resto)."
+    )
+
+    parser.add_argument(
+        "--presupuesto_ajustes",
+        type=float,
+        default=None,
+        help="Presupuesto de la búsqueda en ajustes completos equivalentes (limita los candidatos)."
+    )
+
+    parser.add_argument(
+        "--presupuesto_segundos",
+        type=float,
+        default=None,
+        help="Plazo de la búsqueda en segundos de reloj, revisado entre lotes de candidatos y entre rondas. "
+             "Al vencer no se evalúan más candidatos y se usa el mejor evaluado hasta entonces; el lote en "
+             "curso y el reajuste final pueden excederlo."
+    )
+
+    parser.add_argument(
+        "--reanudar",
+        action="store_true",
+        help="Continúa una ejecución interrumpida con la misma huella desde su última etapa terminada."
+    )
+
+    parser.add_argument(
+        "--sin_checkpoints",
+        action="store_true",
+        help="No guarda ni reutiliza los puntos de control por etapa (<output_dir>/checkpoints)."
+    )
     
     # --- ¡CORRECCIÓN DE ARGPARSE! ---
     # Usamos parse_known_args() para ignorar los args internos del notebook
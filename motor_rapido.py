@@ -0,0 +1,195 @@
+"""
+MOTOR DE INFERENCIA RÁPIDA
+Compila el pipeline logístico (ColumnTransformer + LogisticRegression, o SGDClassifier con
+log_loss del entrenamiento incremental) en arreglos
+planos de NumPy para puntuar solicitantes sin pasar por pandas ni por el ColumnTransformer.
+Un motor compilado puede guardarse en JSON y recargarse sin importar sklearn.
+"""
+import json
+import os
+
+import numpy as np
+
+
+class MotorLogistico:
+    """
+    Puntuador equivalente al pipeline de producción.
+    Las medianas, la estandarización y los coeficientes quedan plegados en un único
+    vector de pesos; las variables categóricas se resuelven con diccionarios de aporte.
+    """
+
+    def __init__(self, columnas_numericas, pesos, medianas, columnas_categoricas,
+                 aportes, aportes_imputados, sesgo, clases, ignorar_desconocidas=True,
+                 dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self.columnas_numericas = list(columnas_numericas)
+        self.columnas_categoricas = list(columnas_categoricas)
+        self.pesos = np.asarray(pesos, dtype=self.dtype)
+        self.medianas = np.asarray(medianas, dtype=self.dtype)
+        self.aportes = aportes
+        self.aportes_imputados = aportes_imputados
+        self.sesgo = self.dtype.type(sesgo)
+        self.classes_ = np.asarray(clases)
+        self.ignorar_desconocidas = ignorar_desconocidas
+
+    def _aporte(self, columna, valor):
+        # Aporte al logit de un valor categórico (imputado si es NaN, 0 si es desconocido).
+        # Igual que SimpleImputer, None no se considera faltante sino una categoría más.
+        aporte = self.aportes[columna].get(valor)
+        if aporte is not None:
+            return aporte
+        if valor != valor:
+            return self.aportes_imputados[columna]
+        if self.ignorar_desconocidas:
+            return 0.0
+        raise ValueError(f"Categoría desconocida en '{columna}': {valor}")
+
+    def logit_solicitante(self, solicitante):
+        """Calcula el logit de un único solicitante (dict campo -> valor)"""
+        x = np.array([solicitante[c] for c in self.columnas_numericas], dtype=self.dtype)
+        x = np.where(np.isnan(x), self.medianas, x)
+        z = x @ self.pesos + self.sesgo
+        for c in self.columnas_categoricas:
+            z += self._aporte(c, solicitante[c])
+        return z
+
+    def logit(self, lote):
+        """Calcula el logit de un lote: lista de dicts, dict de columnas, DataFrame o arreglo estructurado"""
+        if isinstance(lote, list):
+            if len(lote) == 1:
+                return np.atleast_1d(self.logit_solicitante(lote[0]))
+            columna = lambda c: [fila[c] for fila in lote]
+        else:
+            columna = lambda c: lote[c]
+
+        X = np.column_stack([np.asarray(columna(c), dtype=self.dtype) for c in self.columnas_numericas])
+        X = np.where(np.isnan(X), self.medianas, X)
+        z = X @ self.pesos + self.sesgo
+        for c in self.columnas_categoricas:
+            z += np.fromiter((self._aporte(c, v) for v in columna(c)), dtype=self.dtype, count=len(z))
+        return z
+
+    def probabilidad_moroso(self, solicitante):
+        """Probabilidad de morosidad de un único solicitante"""
+        return float(0.5 * (1.0 + np.tanh(0.5 * self.logit_solicitante(solicitante))))
+
+    def predict_proba(self, lote):
+        """Probabilidades [no moroso, moroso] con la misma forma que el pipeline de sklearn"""
+        z = self.logit(lote)
+        # Sigmoide estable numéricamente
+        p = 0.5 * (1.0 + np.tanh(0.5 * z))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, lote):
+        """Clase predicha por solicitante"""
+        return self.classes_[self.predict_proba(lote).argmax(axis=1)]
+
+
+def guardar_motor(motor, ruta):
+    """Guarda el motor compilado en JSON (solo números y tablas de categorías)"""
+    estado = {
+        'columnas_numericas': motor.columnas_numericas,
+        'pesos': motor.pesos.astype(np.float64).tolist(),
+        'medianas': motor.medianas.astype(np.float64).tolist(),
+        'columnas_categoricas': motor.columnas_categoricas,
+        'aportes': motor.aportes,
+        'aportes_imputados': motor.aportes_imputados,
+        'sesgo': float(motor.sesgo),
+        'clases': motor.classes_.tolist(),
+        'ignorar_desconocidas': motor.ignorar_desconocidas
+    }
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def cargar_motor(ruta, dtype=np.float64):
+    """Reconstruye un motor guardado con guardar_motor (no requiere sklearn ni pandas)"""
+    with open(ruta, 'r', encoding='utf-8') as f:
+        estado = json.load(f)
+    return MotorLogistico(dtype=dtype, **estado)
+
+
+def _pasos(transformador, *tipos):
+    # Devuelve los pasos del sub-pipeline si coinciden con los tipos esperados
+    from sklearn.pipeline import Pipeline
+    if not isinstance(transformador, Pipeline) or len(transformador.steps) != len(tipos):
+        return None
+    pasos = [paso for _, paso in transformador.steps]
+    if not all(isinstance(paso, tipo) for paso, tipo in zip(pasos, tipos)):
+        return None
+    return pasos
+
+
+def compilar_motor(pipeline, dtype=np.float64):
+    """
+    Pliega un pipeline ColumnTransformer(imputer+scaler, imputer+onehot) + LogisticRegression
+    (o SGDClassifier con loss='log_loss', que también es un modelo logístico) en un MotorLogistico.
+    Devuelve None si el pipeline no tiene una forma compatible.
+    """
+    # sklearn se importa aquí para que cargar_motor no dependa de él
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    if not isinstance(pipeline, Pipeline) or len(pipeline.steps) != 2:
+        return None
+    preprocesador, clasificador = pipeline.steps[0][1], pipeline.steps[1][1]
+    logistico = (isinstance(clasificador, LogisticRegression)
+                 or (isinstance(clasificador, SGDClassifier) and clasificador.loss == 'log_loss'))
+    if not isinstance(preprocesador, ColumnTransformer) or not logistico:
+        return None
+    if clasificador.coef_.shape[0] != 1:
+        return None
+
+    coeficientes = clasificador.coef_[0].astype(np.float64)
+    sesgo = float(clasificador.intercept_[0])
+    columnas_numericas, pesos, medianas = [], [], []
+    columnas_categoricas, aportes, aportes_imputados = [], {}, {}
+    ignorar_desconocidas = True
+
+    for nombre, transformador, columnas in preprocesador.transformers_:
+        salida = preprocesador.output_indices_[nombre]
+        if transformador == 'drop' or salida.start == salida.stop:
+            continue
+
+        pasos_num = _pasos(transformador, SimpleImputer, StandardScaler)
+        pasos_cat = _pasos(transformador, SimpleImputer, OneHotEncoder)
+
+        if pasos_num is not None:
+            imputer, scaler = pasos_num
+            if not (isinstance(imputer.missing_values, float) and np.isnan(imputer.missing_values)):
+                return None
+            coef = coeficientes[salida]
+            media = scaler.mean_ if scaler.with_mean else np.zeros(len(columnas))
+            escala = scaler.scale_ if scaler.with_std else np.ones(len(columnas))
+            # z = (x - media) / escala  =>  coef·z = (coef / escala)·x - coef·media / escala
+            columnas_numericas.extend(columnas)
+            pesos.extend(coef / escala)
+            medianas.extend(imputer.statistics_.astype(np.float64))
+            sesgo -= float(np.sum(coef * media / escala))
+
+        elif pasos_cat is not None:
+            imputer, onehot = pasos_cat
+            if onehot.drop_idx_ is not None or getattr(onehot, '_infrequent_enabled', False):
+                return None
+            ignorar_desconocidas = ignorar_desconocidas and onehot.handle_unknown != 'error'
+            coef = coeficientes[salida]
+            inicio = 0
+            for columna, categorias, imputado in zip(columnas, onehot.categories_, imputer.statistics_):
+                tabla = {categoria: float(coef[inicio + k]) for k, categoria in enumerate(categorias)}
+                inicio += len(categorias)
+                columnas_categoricas.append(columna)
+                aportes[columna] = tabla
+                aportes_imputados[columna] = tabla.get(imputado, 0.0)
+        else:
+            return None
+
+    return MotorLogistico(
+        columnas_numericas, pesos, medianas, columnas_categoricas,
+        aportes, aportes_imputados, sesgo, clasificador.classes_,
+        ignorar_desconocidas=ignorar_desconocidas, dtype=dtype
+    )
@@ -0,0 +1,113 @@
+"""
+PUNTOS DE CONTROL DEL ENTRENAMIENTO
+Guarda el resultado de cada etapa del pipeline de entrenamiento (modelos, métricas, búsqueda)
+bajo una huella de la ejecución: hash del CSV de entrada, hash del código que entrena, parámetros
+de la corrida, random_state y versiones de las librerías. Cada huella tiene su directorio en
+<output_dir>/checkpoints/<huella>; una ejecución con la misma huella recupera las etapas ya
+terminadas en lugar de repetirlas.
+Una ejecución anterior completa se reutiliza siempre; una que falló a mitad de camino solo se
+reanuda con reanudar=True (--reanudar); si no, sus etapas se descartan y se empieza de cero.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+from cache_dataset import hash_archivo
+
+# Se incrementa al cambiar el formato de los puntos de control (invalida los existentes)
+VERSION_PUNTOS_CONTROL = 1
+
+
+def huella_ejecucion(ruta_datos, archivos_codigo, parametros):
+    """Hash de los datos, el código y los parámetros que determinan el resultado del entrenamiento"""
+    h = hashlib.sha256(f'puntos-control-v{VERSION_PUNTOS_CONTROL}|'.encode())
+    h.update(hash_archivo(ruta_datos).encode())
+    for ruta in archivos_codigo:
+        h.update(os.path.basename(ruta).encode())
+        h.update(hash_archivo(ruta).encode())
+    versiones = {'sklearn': sklearn.__version__, 'numpy': np.__version__, 'pandas': pd.__version__}
+    h.update(json.dumps({'parametros': parametros, 'versiones': versiones}, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+class PuntosControl:
+    """
+    Etapas terminadas de una ejecución, una por archivo .joblib, y un estado.json con la lista
+    de etapas en orden y si la ejecución terminó.
+    - conservar: cantidad de huellas (directorios) que se mantienen; las más antiguas se eliminan.
+    """
+
+    def __init__(self, directorio_base, huella, reanudar=False, conservar=3):
+        self.huella = huella
+        self.directorio = os.path.join(directorio_base, huella[:16])
+        self._ruta_estado = os.path.join(self.directorio, 'estado.json')
+        estado = self._leer_estado()
+        if estado is not None and not estado['completo'] and not reanudar:
+            print(f"Puntos de control de una ejecución incompleta en {self.directorio} "
+                  f"({len(estado['etapas'])} etapas); se descartan (usar --reanudar para continuar).")
+            shutil.rmtree(self.directorio, ignore_errors=True)
+            estado = None
+        elif estado is not None:
+            motivo = 'ejecución completa' if estado['completo'] else 'reanudando'
+            print(f"Puntos de control ({motivo}): {len(estado['etapas'])} etapas en {self.directorio}")
+        self.estado = estado or {'huella': huella, 'etapas': [], 'completo': False}
+        os.makedirs(self.directorio, exist_ok=True)
+        self._limpiar(directorio_base, conservar)
+
+    def _leer_estado(self):
+        if not os.path.exists(self._ruta_estado):
+            return None
+        try:
+            with open(self._ruta_estado, 'r', encoding='utf-8') as f:
+                estado = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return estado if estado.get('huella') == self.huella else None
+
+    def _escribir_estado(self):
+        temporal = f'{self._ruta_estado}.{os.getpid()}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self.estado, f, indent=2)
+        os.replace(temporal, self._ruta_estado)
+
+    def _ruta(self, etapa):
+        return os.path.join(self.directorio, f'{etapa}.joblib')
+
+    def cargar(self, etapa):
+        """(True, valor) si la etapa ya terminó en esta huella; (False, None) si hay que ejecutarla"""
+        if etapa not in self.estado['etapas']:
+            return False, None
+        try:
+            return True, joblib.load(self._ruta(etapa))
+        except Exception as e:
+            print(f"Punto de control '{etapa}' ilegible ({e}); se vuelve a ejecutar la etapa.")
+            self.estado['etapas'].remove(etapa)
+            return False, None
+
+    def guardar(self, etapa, valor):
+        """Guarda el resultado de la etapa (escritura atómica) y la registra en el estado"""
+        temporal = f'{self._ruta(etapa)}.{os.getpid()}.tmp'
+        joblib.dump(valor, temporal)
+        os.replace(temporal, self._ruta(etapa))
+        if etapa not in self.estado['etapas']:
+            self.estado['etapas'].append(etapa)
+        self._escribir_estado()
+
+    def completar(self):
+        """Marca la ejecución como terminada: una nueva corrida con la misma huella la reutiliza"""
+        self.estado['completo'] = True
+        self._escribir_estado()
+
+    def _limpiar(self, directorio_base, conservar):
+        # Elimina los directorios de las huellas usadas hace más tiempo
+        directorios = [os.path.join(directorio_base, d) for d in os.listdir(directorio_base)]
+        directorios = sorted((d for d in directorios if os.path.isdir(d) and d != self.directorio),
+                             key=os.path.getmtime, reverse=True)
+        for directorio in directorios[max(conservar - 1, 0):]:
+            shutil.rmtree(directorio, ignore_errors=True)
@@ -0,0 +1,255 @@
+"""
+PUNTUACIÓN MASIVA DE CARTERA
+Herramienta de línea de comandos para volver a puntuar la cartera completa desde un CSV.
+El modelo se carga una sola vez (con el motor compilado si el pipeline lo permite) y los
+procesos del pool lo heredan; el CSV se lee por bloques (read_csv con chunksize), los bloques
+se puntúan en paralelo con una ventana acotada de bloques pendientes (memoria acotada) y los
+resultados se escriben en orden a CSV o Parquet.
+El progreso se guarda tras cada bloque escrito: --reanudar continúa desde ese punto.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from esquema import ValidadorEsquema, clasificar_riesgo_lote, resumen_errores
+from motor_rapido import compilar_motor
+from registro_modelos import VersionModelo, listar_artefactos, validar_modelo
+
+# Versión del modelo del proceso (heredada por fork o cargada por el inicializador del pool)
+_VERSION = None
+_VALIDADOR = None
+
+
+def cargar_version(ruta_modelo):
+    """Carga el artefacto, compila el motor rápido si es posible y lo valida"""
+    pipeline = joblib.load(ruta_modelo)
+    version = VersionModelo(os.path.basename(ruta_modelo), pipeline, compilar_motor(pipeline))
+    validar_modelo(version)
+    return version
+
+
+def _inicializar(ruta_modelo):
+    global _VERSION, _VALIDADOR
+    if _VERSION is None:
+        _VERSION = cargar_version(ruta_modelo)
+    _VALIDADOR = ValidadorEsquema()
+
+
+def puntuar_bloque(tarea):
+    """Puntúa un bloque del CSV; las filas inválidas quedan sin predicción y con el error"""
+    numero, bloque, conservar = tarea
+    n = len(bloque)
+    validos, indices, errores = _VALIDADOR.validar_columnas(bloque, n)
+
+    prediccion = pd.array([pd.NA] * n, dtype='Int8')
+    proba = np.full((n, 2), np.nan)
+    if len(validos):
+        probabilidades = _VERSION.predict_proba(validos)
+        proba[indices] = probabilidades
+        prediccion[indices] = _VERSION.classes_[probabilidades.argmax(axis=1)].astype(np.int8)
+
+    riesgo = np.full(n, None, dtype=object)
+    riesgo[indices] = clasificar_riesgo_lote(proba[indices, 1])
+    error = np.full(n, None, dtype=object)
+    for i, por_campo in errores.items():
+        error[i] = resumen_errores(por_campo)
+
+    salida = bloque[conservar].reset_index(drop=True) if conservar else pd.DataFrame(index=range(n))
+    salida['prediccion'] = prediccion
+    salida['probabilidad_no_moroso'] = proba[:, 0]
+    salida['probabilidad_moroso'] = proba[:, 1]
+    salida['riesgo'] = riesgo
+    salida['error'] = error
+    return numero, salida, len(errores)
+
+
+# --- ESCRITURA Y PROGRESO ---
+
+class EscritorCSV:
+    """Agrega los bloques a un único CSV; el tamaño del archivo tras cada bloque permite reanudar"""
+
+    def __init__(self, ruta, reanudar_en=None):
+        self.ruta = ruta
+        if reanudar_en is None:
+            open(ruta, 'w').close()
+        else:
+            # Descarta lo escrito después del último bloque registrado
+            with open(ruta, 'r+b') as f:
+                f.truncate(reanudar_en)
+
+    def escribir(self, numero, df):
+        with open(self.ruta, 'a', encoding='utf-8', newline='') as f:
+            df.to_csv(f, header=os.path.getsize(self.ruta) == 0, index=False)
+        return os.path.getsize(self.ruta)
+
+
+class EscritorParquet:
+    """Escribe un archivo Parquet por bloque dentro de un directorio (legible con pd.read_parquet)"""
+
+    def __init__(self, ruta, reanudar_en=None):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise SystemExit("La salida Parquet requiere pyarrow (pip install pyarrow)")
+        self.ruta = ruta
+        os.makedirs(ruta, exist_ok=True)
+        if reanudar_en is None:
+            for nombre in os.listdir(ruta):
+                if nombre.startswith('parte_') and nombre.endswith('.parquet'):
+                    os.remove(os.path.join(ruta, nombre))
+
+    def escribir(self, numero, df):
+        final = os.path.join(self.ruta, f'parte_{numero:06d}.parquet')
+        temporal = final + '.tmp'
+        df.to_parquet(temporal, index=False)
+        os.replace(temporal, final)
+        return None
+
+
+def ruta_progreso(salida):
+    return salida.rstrip('/\\') + '.progreso.json'
+
+
+def guardar_progreso(ruta, estado):
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2)
+    os.replace(temporal, ruta)
+
+
+def contar_filas(ruta):
+    """Filas de datos del CSV (para el porcentaje de avance), contando saltos de línea por bloques"""
+    lineas = 0
+    with open(ruta, 'rb') as f:
+        for trozo in iter(lambda: f.read(1 << 24), b''):
+            lineas += trozo.count(b'\n')
+    return max(lineas - 1, 0)
+
+
+def main(args):
+    global _VERSION
+    formato = args.formato or ('parquet' if args.salida.endswith(('.parquet', '/')) else 'csv')
+    if args.modelo is None:
+        artefactos = listar_artefactos(args.output_dir)
+        if not artefactos:
+            raise SystemExit(f"No se encontró ningún modelo entrenado en '{args.output_dir}'")
+        args.modelo = os.path.join(args.output_dir, artefactos[-1])
+
+    progreso_ruta = ruta_progreso(args.salida)
+    estado = {
+        'entrada': os.path.abspath(args.entrada),
+        'modelo': os.path.basename(args.modelo),
+        'tamano_bloque': args.tamano_bloque,
+        'formato': formato,
+        'bloques': 0,
+        'filas': 0,
+        'con_errores': 0,
+        'bytes_salida': 0
+    }
+    reanudar_en = None
+    if args.reanudar and os.path.exists(progreso_ruta):
+        with open(progreso_ruta, 'r', encoding='utf-8') as f:
+            previo = json.load(f)
+        for clave in ('entrada', 'modelo', 'tamano_bloque', 'formato'):
+            if previo[clave] != estado[clave]:
+                raise SystemExit(f"No se puede reanudar: '{clave}' cambió ({previo[clave]} -> {estado[clave]})")
+        estado = previo
+        reanudar_en = estado['bytes_salida']
+        print(f"Reanudando desde el bloque {estado['bloques']} ({estado['filas']} filas ya puntuadas)")
+
+    print(f"Cargando modelo: {args.modelo}")
+    _VERSION = cargar_version(args.modelo)
+    print(f"Motor de inferencia: {'rápido' if _VERSION.motor is not None else 'pipeline de sklearn'}")
+
+    total = contar_filas(args.entrada)
+    conservar = [c.strip() for c in args.conservar.split(',')] if args.conservar else None
+
+    # Un callable en lugar de range(): pandas convierte skiprows en un conjunto con cada fila saltada
+    filas_previas = estado['bloques'] * args.tamano_bloque
+    lector = pd.read_csv(args.entrada, chunksize=args.tamano_bloque,
+                         skiprows=(lambda i: 0 < i <= filas_previas) if filas_previas else None)
+    # Las columnas a conservar se validan con el primer bloque, antes de tocar la salida
+    primero = next(lector, None)
+    if primero is not None:
+        if conservar is None:
+            conservar = list(primero.columns)
+        faltantes = [c for c in conservar if c not in primero.columns]
+        if faltantes:
+            raise SystemExit(f"Columnas de --conservar que no están en '{args.entrada}': {faltantes}; "
+                             f"disponibles: {list(primero.columns)}")
+    bloques = itertools.chain([primero], lector) if primero is not None else lector
+
+    escritor = (EscritorParquet if formato == 'parquet' else EscritorCSV)(args.salida, reanudar_en)
+
+    metodo = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+    contexto = multiprocessing.get_context(metodo)
+    inicio = time.perf_counter()
+    filas_sesion = 0
+    with contexto.Pool(args.procesos, initializer=_inicializar, initargs=(args.modelo,)) as pool:
+        pendientes = deque()
+        numero = estado['bloques']
+        for bloque in bloques:
+            pendientes.append(pool.apply_async(puntuar_bloque, ((numero, bloque, conservar),)))
+            numero += 1
+            # Ventana acotada: como máximo 2 bloques pendientes por proceso
+            while len(pendientes) >= 2 * args.procesos:
+                filas_sesion += _escribir_siguiente(pendientes, escritor, estado, progreso_ruta)
+                _reportar(estado, total, filas_sesion, inicio)
+        while pendientes:
+            filas_sesion += _escribir_siguiente(pendientes, escritor, estado, progreso_ruta)
+            _reportar(estado, total, filas_sesion, inicio)
+
+    duracion = time.perf_counter() - inicio
+    print(f"\nPuntuación completa: {estado['filas']} filas ({estado['con_errores']} con errores) "
+          f"en {duracion:.1f} s -> {args.salida}")
+    estado['completo'] = True
+    guardar_progreso(progreso_ruta, estado)
+
+
+def _escribir_siguiente(pendientes, escritor, estado, progreso_ruta):
+    # Los resultados se escriben en el orden de lectura
+    numero, salida, con_errores = pendientes.popleft().get()
+    bytes_salida = escritor.escribir(numero, salida)
+    estado['bloques'] = numero + 1
+    estado['filas'] += len(salida)
+    estado['con_errores'] += con_errores
+    if bytes_salida is not None:
+        estado['bytes_salida'] = bytes_salida
+    guardar_progreso(progreso_ruta, estado)
+    return len(salida)
+
+
+def _reportar(estado, total, filas_sesion, inicio):
+    transcurrido = time.perf_counter() - inicio
+    velocidad = filas_sesion / transcurrido if transcurrido else 0.0
+    porcentaje = f" ({100 * estado['filas'] / total:.1f}%)" if total else ''
+    print(f"\r{estado['filas']}/{total} filas{porcentaje} - {velocidad:,.0f} filas/s",
+          end='', file=sys.stderr, flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Puntuación masiva de la cartera desde un CSV")
+    parser.add_argument("--entrada", type=str, required=True, help="CSV con los 17 campos del solicitante.")
+    parser.add_argument("--salida", type=str, required=True,
+                        help="CSV de salida, o directorio .parquet (un archivo por bloque).")
+    parser.add_argument("--formato", choices=['csv', 'parquet'], default=None,
+                        help="Formato de salida (por defecto, según la extensión de --salida).")
+    parser.add_argument("--modelo", type=str, default=None,
+                        help="Artefacto .joblib a usar (por defecto, el más reciente de --output_dir).")
+    parser.add_argument("--output_dir", type=str, default="output", help="Directorio de los modelos entrenados.")
+    parser.add_argument("--tamano_bloque", type=int, default=50000, help="Filas leídas y puntuadas por bloque.")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1, help="Procesos del pool.")
+    parser.add_argument("--conservar", type=str, default=None,
+                        help="Columnas de la entrada a copiar en la salida, separadas por coma (por defecto, todas).")
+    parser.add_argument("--reanudar", action="store_true",
+                        help="Continuar desde el último bloque escrito según el archivo de progreso.")
+    main(parser.parse_args())
@@ -0,0 +1,282 @@
+"""
+REGISTRO DE MODELOS
+Mantiene varias versiones del modelo cargadas en memoria, vigila el directorio de
+salida en segundo plano y activa los nuevos artefactos de forma atómica tras
+validarlos con una predicción de prueba.
+En arranque rápido, si existe el motor compilado de un artefacto ya validado, la versión
+queda lista solo con él y el pipeline de sklearn se carga en segundo plano.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+from motor_rapido import cargar_motor, compilar_motor, guardar_motor
+
+PREFIJO_MODELO = 'model_pipeline_final'
+
+# Solicitante usado para validar cada artefacto antes de activarlo
+SOLICITANTE_PRUEBA = {
+    'edad': 35, 'genero': 'M', 'zona': 'Urbana', 'tipo_empleo': 'Dependiente',
+    'antiguedad': 8, 'ingresos': 4500.00, 'score_crediticio': 720, 'pagos_previos': 3,
+    'creditos_previos': 2, 'monto_credito': 50000, 'plazo_meses': 24,
+    'destino_credito': 'Consumo', 'tipo_garantia': 'Vehiculo', 'valor_garantia': 55000.00,
+    'precio_soya': 420.50, 'precio_vino': 48.00, 'uso_productos': 2
+}
+
+
+class VersionModelo:
+    """
+    Un artefacto cargado: pipeline de sklearn, motor rápido opcional y metadatos.
+    El pipeline puede cargarse de forma diferida con la función cargador.
+    """
+
+    def __init__(self, nombre, pipeline=None, motor=None, cargador=None):
+        self.nombre = nombre
+        self.motor = motor
+        self.cargado_en = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._pipeline = pipeline
+        self._cargador = cargador
+        self._candado = threading.Lock()
+
+    @property
+    def pipeline(self):
+        if self._pipeline is None:
+            with self._candado:
+                if self._pipeline is None:
+                    self._pipeline = self._cargador()
+        return self._pipeline
+
+    def pipeline_cargado(self):
+        return self._pipeline is not None
+
+    @property
+    def classes_(self):
+        if self.motor is not None:
+            return self.motor.classes_
+        return self.pipeline.classes_
+
+    def predict_proba(self, lote):
+        """
+        Probabilidades de un lote (lista de dicts o registros, arreglo estructurado o DataFrame)
+        con el camino más rápido disponible.
+        """
+        if self.motor is not None:
+            return self.motor.predict_proba(lote)
+        import pandas as pd
+        if isinstance(lote, list) and lote and isinstance(lote[0], np.void):
+            lote = np.array(lote, dtype=lote[0].dtype)
+        if isinstance(lote, np.ndarray):
+            lote = pd.DataFrame(lote)
+        elif isinstance(lote, list):
+            lote = pd.DataFrame(lote, columns=list(SOLICITANTE_PRUEBA))
+        return self.pipeline.predict_proba(lote)
+
+    def describir(self):
+        return {
+            'nombre': self.nombre,
+            'cargado_en': self.cargado_en,
+            'motor_rapido': self.motor is not None,
+            'pipeline_cargado': self.pipeline_cargado()
+        }
+
+
+def ruta_motor(ruta_artefacto):
+    """Ruta del motor compilado que acompaña a un artefacto validado"""
+    return ruta_artefacto + '.motor.json'
+
+
+def listar_artefactos(output_dir):
+    """Nombres de los artefactos de modelo del directorio, del más antiguo al más reciente"""
+    if not os.path.isdir(output_dir):
+        return []
+    return sorted(f for f in os.listdir(output_dir)
+                  if f.startswith(PREFIJO_MODELO) and f.endswith('.joblib'))
+
+
+def validar_modelo(version):
+    """Predicción de prueba: lanza ValueError si el artefacto no produce probabilidades válidas"""
+    import pandas as pd
+    proba = version.pipeline.predict_proba(pd.DataFrame([SOLICITANTE_PRUEBA]))
+    if proba.shape != (1, 2) or not np.all(np.isfinite(proba)) or abs(proba.sum() - 1) > 1e-6:
+        raise ValueError(f"Predicción de prueba inválida: {proba}")
+    if version.motor is not None:
+        proba_motor = version.motor.predict_proba([SOLICITANTE_PRUEBA])
+        if np.abs(proba_motor - proba).max() > 1e-9:
+            print(f"Motor rápido descartado para {version.nombre}: no coincide con el pipeline")
+            version.motor = None
+
+
+class RegistroModelos:
+    """
+    Registro de versiones residentes.
+    - max_versiones: cuántos artefactos se mantienen cargados (el activo nunca se descarga).
+    - intervalo_sondeo: cada cuántos segundos se revisa output_dir en busca de artefactos nuevos.
+    - antiguedad_minima: segundos sin modificarse antes de cargar un archivo (evita leerlo a medio escribir).
+    - mmap: abre los arreglos del artefacto con mmap_mode='r' (páginas compartidas, sin copia).
+    - arranque_rapido: usa el motor compilado guardado y difiere la carga del pipeline.
+    Las funciones en al_cambiar reciben la nueva versión activa después de cada cambio.
+    """
+
+    def __init__(self, output_dir='output', max_versiones=3, intervalo_sondeo=10.0,
+                 antiguedad_minima=2.0, compilar=True, mmap=True, arranque_rapido=True):
+        self.output_dir = output_dir
+        self.max_versiones = max_versiones
+        self.intervalo_sondeo = intervalo_sondeo
+        self.antiguedad_minima = antiguedad_minima
+        self.compilar = compilar
+        self.mmap = mmap
+        self.arranque_rapido = arranque_rapido
+        self.activo = None
+        self.al_cambiar = []
+        self._versiones = OrderedDict()
+        self._fallidos = {}
+        self._candado = threading.RLock()
+        self._hilo = None
+        self._pid = None
+
+    # --- CARGA ---
+
+    def _leer(self, ruta):
+        # joblib solo puede mapear los arreglos de artefactos sin comprimir; si no, los copia
+        return joblib.load(ruta, mmap_mode='r' if self.mmap else None)
+
+    def cargar(self, nombre):
+        """Carga y valida un artefacto del directorio; devuelve la versión (sin activarla)"""
+        with self._candado:
+            if nombre in self._versiones:
+                return self._versiones[nombre]
+
+        ruta = os.path.join(self.output_dir, nombre)
+        ruta_compilado = ruta_motor(ruta)
+        print(f"Cargando modelo: {ruta}")
+
+        if (self.compilar and self.arranque_rapido and os.path.exists(ruta_compilado)
+                and os.path.getmtime(ruta_compilado) >= os.path.getmtime(ruta)):
+            # El motor se guardó tras validar este artefacto: listo sin importar sklearn
+            version = VersionModelo(nombre, motor=cargar_motor(ruta_compilado),
+                                    cargador=lambda: self._leer(ruta))
+            proba = version.motor.predict_proba([SOLICITANTE_PRUEBA])
+            if not np.all(np.isfinite(proba)):
+                raise ValueError(f"Predicción de prueba inválida: {proba}")
+            threading.Thread(target=lambda: version.pipeline, name='carga-pipeline', daemon=True).start()
+        else:
+            pipeline = self._leer(ruta)
+            motor = compilar_motor(pipeline) if self.compilar else None
+            version = VersionModelo(nombre, pipeline, motor)
+            validar_modelo(version)
+            if version.motor is not None:
+                try:
+                    guardar_motor(version.motor, ruta_compilado)
+                except OSError as e:
+                    print(f"No se pudo guardar el motor compilado: {e}")
+
+        with self._candado:
+            self._versiones[nombre] = version
+            self._descargar_sobrantes()
+        return version
+
+    def activar(self, nombre):
+        """Activa una versión residente; las peticiones en curso terminan con la versión que tomaron"""
+        with self._candado:
+            version = self._versiones[nombre]
+            self._versiones.move_to_end(nombre)
+            self.activo = version
+        print(f"Modelo activo: {nombre}")
+        for funcion in self.al_cambiar:
+            try:
+                funcion(version)
+            except Exception as e:
+                print(f"Error al notificar el cambio de modelo: {e}")
+        return version
+
+    def cargar_mas_reciente(self):
+        """Carga y activa el artefacto más reciente del directorio de salida"""
+        artefactos = listar_artefactos(self.output_dir)
+        if not artefactos:
+            raise FileNotFoundError(f"No se encontró ningún modelo entrenado en el directorio '{self.output_dir}'")
+        self.cargar(artefactos[-1])
+        return self.activar(artefactos[-1])
+
+    def _descargar_sobrantes(self):
+        # Descarta las versiones más antiguas que excedan max_versiones (nunca la activa)
+        for nombre in list(self._versiones):
+            if len(self._versiones) <= self.max_versiones:
+                break
+            if self.activo is not None and nombre == self.activo.nombre:
+                continue
+            del self._versiones[nombre]
+            print(f"Modelo descargado de memoria: {nombre}")
+
+    # --- CONSULTA ---
+
+    def obtener(self, nombre=None):
+        """Versión solicitada (o la activa). Lanza KeyError si no está cargada."""
+        if not nombre:
+            if self.activo is None:
+                raise KeyError('No hay ningún modelo activo')
+            return self.activo
+        with self._candado:
+            return self._versiones[nombre]
+
+    def nombre_activo(self):
+        version = self.activo
+        return version.nombre if version is not None else None
+
+    def describir(self):
+        with self._candado:
+            return {
+                'activo': self.nombre_activo(),
+                'versiones': [v.describir() for v in self._versiones.values()]
+            }
+
+    # --- VIGILANCIA DEL DIRECTORIO ---
+
+    def revisar(self):
+        """Carga, valida y activa el artefacto más reciente si es nuevo. Devuelve True si hubo cambio."""
+        artefactos = listar_artefactos(self.output_dir)
+        if not artefactos:
+            return False
+        nombre = artefactos[-1]
+        if nombre == self.nombre_activo():
+            return False
+
+        ruta = os.path.join(self.output_dir, nombre)
+        try:
+            mtime = os.path.getmtime(ruta)
+        except OSError:
+            return False
+        if time.time() - mtime < self.antiguedad_minima or self._fallidos.get(nombre) == mtime:
+            return False
+
+        try:
+            self.cargar(nombre)
+        except Exception as e:
+            self._fallidos[nombre] = mtime
+            print(f"Error al cargar el modelo {nombre}, se mantiene el activo: {e}")
+            return False
+        self.activar(nombre)
+        return True
+
+    def iniciar_vigilancia(self):
+        """Arranca (una vez por proceso) el hilo que vigila el directorio de salida"""
+        if self._hilo is not None and self._pid == os.getpid():
+            return
+        with self._candado:
+            if self._hilo is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._hilo = threading.Thread(target=self._vigilar, name='registro-modelos', daemon=True)
+            self._hilo.start()
+
+    def _vigilar(self):
+        while True:
+            time.sleep(self.intervalo_sondeo)
+            try:
+                self.revisar()
+            except Exception as e:
+                print(f"Error al revisar el directorio de modelos: {e}")
@@ -0,0 +1,277 @@
+"""
+REGISTRO DE PREDICCIONES
+Escritor de logs en formato JSON Lines (una predicción por línea) con un hilo en
+segundo plano, cola acotada y vaciado por lotes. Incluye lector y migración de los
+logs diarios anteriores en formato JSON (arreglo completo por archivo).
+Cada lote se escribe con una sola llamada write() sobre un descriptor O_APPEND, de modo
+que varios procesos (servidor.py) pueden escribir el mismo archivo sin mezclar líneas.
+"""
+import argparse
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+POLITICAS_FSYNC = ('nunca', 'lote', 'siempre')
+
+
+def _fecha_de(resultado):
+    # Fecha YYYYMMDD del registro a partir de su timestamp ("%Y-%m-%d %H:%M:%S")
+    timestamp = resultado.get('timestamp') if isinstance(resultado, dict) else None
+    if isinstance(timestamp, str) and len(timestamp) >= 10:
+        return timestamp[:10].replace('-', '')
+    return datetime.now().strftime("%Y%m%d")
+
+
+class RegistroPredicciones:
+    """
+    Registra predicciones sin que el hilo de la petición toque el disco.
+    - max_cola: registros pendientes como máximo; si la cola se llena se descartan y se cuentan.
+    - max_lote: registros escritos por cada vaciado.
+    - intervalo_vaciado: espera máxima (segundos) antes de escribir un lote incompleto.
+    - politica_fsync: 'nunca' (sin fsync), 'lote' (fsync por lote) o 'siempre' (fsync por registro).
+    Las funciones en tareas_periodicas se ejecutan en el mismo hilo tras cada vaciado
+    o cada intervalo_vaciado sin actividad.
+    """
+
+    def __init__(self, log_dir='logs', max_cola=10000, max_lote=256,
+                 intervalo_vaciado=0.5, politica_fsync='lote'):
+        if politica_fsync not in POLITICAS_FSYNC:
+            raise ValueError(f"politica_fsync debe ser una de {POLITICAS_FSYNC}")
+        self.log_dir = log_dir
+        self.max_lote = max_lote
+        self.intervalo_vaciado = intervalo_vaciado
+        self.politica_fsync = politica_fsync
+        self.escritos = 0
+        self.descartados = 0
+        self._cola = queue.Queue(maxsize=max_cola)
+        self._hilo = None
+        self._pid = None
+        self._candado = threading.Lock()
+        self._fd = None
+        self._fecha_archivo = None
+        self.tareas_periodicas = []
+        atexit.register(self.cerrar)
+
+    def _asegurar_hilo(self):
+        # El hilo se arranca de forma perezosa (y se rearranca tras un fork)
+        if self._hilo is not None and self._pid == os.getpid() and self._hilo.is_alive():
+            return
+        with self._candado:
+            if self._hilo is not None and self._pid == os.getpid() and self._hilo.is_alive():
+                return
+            if self._pid != os.getpid():
+                # Proceso hijo: la cola y el archivo heredados no son utilizables
+                self._cola = queue.Queue(maxsize=self._cola.maxsize)
+                self._fd = None
+                self._fecha_archivo = None
+            self._pid = os.getpid()
+            self._hilo = threading.Thread(target=self._bucle, name='registro-predicciones', daemon=True)
+            self._hilo.start()
+
+    def registrar(self, resultado):
+        """Encola una predicción. Devuelve False si la cola está llena y se descartó."""
+        self._asegurar_hilo()
+        try:
+            self._cola.put_nowait(resultado)
+            return True
+        except queue.Full:
+            self.descartados += 1
+            if self.descartados % 1000 == 1:
+                print(f"Advertencia: cola de logs llena, {self.descartados} predicciones descartadas")
+            return False
+
+    def registrar_varios(self, resultados):
+        """Encola varias predicciones"""
+        return sum(self.registrar(r) for r in resultados)
+
+    def vaciar(self):
+        """Bloquea hasta que todos los registros encolados estén escritos"""
+        if self._hilo is not None and self._pid == os.getpid():
+            self._cola.join()
+
+    def cerrar(self):
+        """Escribe lo pendiente y detiene el hilo"""
+        if self._hilo is None or self._pid != os.getpid() or not self._hilo.is_alive():
+            return
+        self._cola.put(None)
+        self._hilo.join(timeout=10)
+        self._hilo = None
+
+    def _bucle(self):
+        while True:
+            try:
+                primero = self._cola.get(timeout=self.intervalo_vaciado)
+            except queue.Empty:
+                self._ejecutar_tareas()
+                continue
+
+            lote = [primero]
+            while len(lote) < self.max_lote:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+
+            detener = None in lote
+            registros = [r for r in lote if r is not None]
+            try:
+                if registros:
+                    self._escribir(registros)
+            except Exception as e:
+                print(f"Error al guardar log: {e}")
+            finally:
+                for _ in lote:
+                    self._cola.task_done()
+            self._ejecutar_tareas()
+
+            if detener:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                return
+
+    def _ejecutar_tareas(self):
+        for tarea in self.tareas_periodicas:
+            try:
+                tarea()
+            except Exception as e:
+                print(f"Error en tarea periódica del registro: {e}")
+
+    def _abrir(self, fecha):
+        if self._fecha_archivo == fecha and self._fd is not None:
+            return self._fd
+        if self._fd is not None:
+            os.close(self._fd)
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._fd = os.open(ruta_log(fecha, self.log_dir), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._fecha_archivo = fecha
+        return self._fd
+
+    def _anexar(self, fd, lineas):
+        datos = ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in lineas).encode('utf-8')
+        vista = memoryview(datos)
+        while vista:
+            escritos = os.write(fd, vista)
+            vista = vista[escritos:]
+
+    def _escribir(self, registros):
+        # Agrupar por día conservando el orden de llegada
+        grupos = {}
+        for r in registros:
+            grupos.setdefault(_fecha_de(r), []).append(r)
+
+        for fecha, grupo in grupos.items():
+            fd = self._abrir(fecha)
+            if self.politica_fsync == 'siempre':
+                for r in grupo:
+                    self._anexar(fd, [r])
+                    os.fsync(fd)
+            else:
+                self._anexar(fd, grupo)
+                if self.politica_fsync == 'lote':
+                    os.fsync(fd)
+            self.escritos += len(grupo)
+
+
+# --- LECTURA Y MIGRACIÓN ---
+
+def ruta_log(fecha, log_dir='logs'):
+    """Ruta del log JSON Lines del día (fecha en formato YYYYMMDD)"""
+    return os.path.join(log_dir, f'predicciones_{fecha}.jsonl')
+
+
+def ruta_log_antiguo(fecha, log_dir='logs'):
+    """Ruta del log diario en el formato anterior (arreglo JSON)"""
+    return os.path.join(log_dir, f'predicciones_{fecha}.json')
+
+
+def iterar_predicciones(fecha=None, log_dir='logs'):
+    """
+    Recorre las predicciones del día: primero las del log antiguo (si existe)
+    y después las del log JSON Lines. Ignora una última línea incompleta.
+    """
+    fecha = fecha or datetime.now().strftime("%Y%m%d")
+
+    antiguo = ruta_log_antiguo(fecha, log_dir)
+    if os.path.exists(antiguo):
+        with open(antiguo, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+
+    actual = ruta_log(fecha, log_dir)
+    if os.path.exists(actual):
+        with open(actual, 'r', encoding='utf-8') as f:
+            for linea in f:
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    yield json.loads(linea)
+                except json.JSONDecodeError:
+                    print(f"Línea de log inválida ignorada en {actual}")
+
+
+def leer_predicciones(fecha=None, log_dir='logs'):
+    """Devuelve la lista de predicciones del día"""
+    return list(iterar_predicciones(fecha, log_dir))
+
+
+def migrar_log_json(ruta_json):
+    """
+    Convierte un log diario antiguo (arreglo JSON) a JSON Lines.
+    Las predicciones antiguas se anexan al final del .jsonl del mismo día (O_APPEND, como el
+    escritor), de modo que la migración puede correr con el servidor en marcha: el archivo no se
+    reemplaza y el descriptor que mantiene abierto el servidor sigue apuntando a él. Por eso
+    quedan después de las ya registradas en el .jsonl y no en orden cronológico.
+    El archivo original se renombra a *.json.migrado después de escribir; si la migración se
+    interrumpe entre ambos pasos, volver a ejecutarla duplica esas predicciones.
+    """
+    with open(ruta_json, 'r', encoding='utf-8') as f:
+        predicciones = json.load(f)
+
+    ruta_jsonl = ruta_json[:-len('.json')] + '.jsonl'
+    datos = ''.join(json.dumps(p, ensure_ascii=False) + '\n' for p in predicciones).encode('utf-8')
+    fd = os.open(ruta_jsonl, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        vista = memoryview(datos)
+        while vista:
+            escritos = os.write(fd, vista)
+            vista = vista[escritos:]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    os.replace(ruta_json, ruta_json + '.migrado')
+    return ruta_jsonl, len(predicciones)
+
+
+def migrar_directorio(log_dir='logs'):
+    """Migra todos los logs diarios antiguos del directorio"""
+    migrados = []
+    for nombre in sorted(os.listdir(log_dir)):
+        if nombre.startswith('predicciones_') and nombre.endswith('.json'):
+            ruta_jsonl, n = migrar_log_json(os.path.join(log_dir, nombre))
+            print(f"Migrado {nombre} -> {os.path.basename(ruta_jsonl)} ({n} predicciones)")
+            migrados.append(ruta_jsonl)
+    return migrados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Migración de logs de predicciones a JSON Lines. Puede ejecutarse con el servidor "
+                    "en marcha: las predicciones antiguas se anexan al final del .jsonl del día (no "
+                    "quedan en orden cronológico) y el archivo no se reemplaza.")
+    parser.add_argument(
+        "--log_dir",
+        type=str,
+        default="logs",
+        help="Directorio con los archivos predicciones_YYYYMMDD.json."
+    )
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    migrados = migrar_directorio(args.log_dir)
+    print(f"{len(migrados)} archivos migrados en {time.perf_counter() - inicio:.2f} s")
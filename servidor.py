@@ -0,0 +1,408 @@
+"""
+SERVIDOR PRE-FORK
+Punto de entrada multiproceso para producción (Linux/macOS).
+El proceso maestro importa la aplicación una sola vez (modelo cargado, validado y calentado),
+abre el socket de escucha y crea los trabajadores con fork: todos comparten por
+copy-on-write la misma copia del modelo en memoria y aceptan conexiones del mismo socket.
+El maestro supervisa los latidos de cada trabajador, reemplaza los que mueren o se cuelgan
+y hace reinicios escalonados (SIGHUP o modelo nuevo en 'output') sin dejar de atender.
+SIGTERM/SIGINT detienen el servicio esperando a que terminen las peticiones en curso.
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+# Campos por espacio del arreglo compartido. Hay dos espacios por trabajador: en un reinicio
+# escalonado el reemplazo usa un espacio libre mientras el anterior termina sus peticiones, y un
+# espacio solo se reutiliza cuando el maestro recogió al proceso que lo ocupaba
+LATIDO, PETICIONES, EN_CURSO = range(3)
+CAMPOS = 3
+
+# Flujos SSE: no terminan por sí solos, así que no cuentan como peticiones en curso al detenerse
+# (el navegador se reconecta a otro trabajador cuando el flujo se corta)
+RUTAS_SIN_ESPERA = ('/api/estadisticas/stream',)
+
+
+class ManejadorSilencioso(WSGIRequestHandler):
+    """Manejador sin log de accesos (el log por petición en stderr limita el rendimiento)"""
+
+    def log_request(self, code='-', size='-'):
+        pass
+
+
+class ServidorPrefork:
+    """
+    Maestro pre-fork.
+    - trabajadores: número de procesos que atienden peticiones.
+    - gracia: segundos que un trabajador espera a las peticiones en curso al detenerse.
+    - latido_max: segundos sin latido tras los que un trabajador se considera colgado y se reemplaza.
+    - vigilar: el maestro revisa 'output' y, si activa un modelo nuevo, reinicia los trabajadores
+      de forma escalonada (los trabajadores no vigilan por su cuenta).
+    - archivo_estado: JSON con el estado de los trabajadores, reescrito por el maestro.
+    """
+
+    def __init__(self, trabajadores=2, host='0.0.0.0', puerto=5000, gracia=30.0,
+                 latido_max=30.0, vigilar=True, archivo_estado='logs/trabajadores.json',
+                 log_accesos=False):
+        if not hasattr(os, 'fork'):
+            raise RuntimeError("El servidor pre-fork requiere os.fork (Linux/macOS); use app.py en Windows")
+        self.trabajadores = trabajadores
+        self.host = host
+        self.puerto = puerto
+        self.gracia = gracia
+        self.latido_max = latido_max
+        self.vigilar = vigilar
+        self.archivo_estado = archivo_estado
+        self.log_accesos = log_accesos
+        self._estado = multiprocessing.RawArray('d', 2 * trabajadores * CAMPOS)
+        self._libres = list(range(2 * trabajadores))
+        self._espacios = {}
+        self._pids = {}
+        self._retirados = set()
+        self._reinicios = [0] * trabajadores
+        self._detener = False
+        self._reiniciar = False
+        self._socket = None
+        self.aplicacion = None
+
+    # --- MAESTRO ---
+
+    def _preparar(self):
+        # La aplicación (y el modelo) se cargan una única vez en el maestro
+        import app as aplicacion
+        if not aplicacion.listo:
+            raise RuntimeError("La aplicación no quedó lista (modelo no cargado)")
+        aplicacion.VIGILAR_MODELOS = False
+        self.aplicacion = aplicacion
+        self._precargar()
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.puerto))
+        self._socket.listen(1024)
+        self._socket.set_inheritable(True)
+        self.puerto = self._socket.getsockname()[1]
+
+    def _precargar(self):
+        # Sin cargas diferidas pendientes: ningún candado queda tomado al hacer fork y
+        # el pipeline completo se comparte en vez de cargarse en cada trabajador
+        self.aplicacion.modelos.activo.pipeline
+        gc.collect()
+        gc.freeze()
+
+    def iniciar(self):
+        """Carga la aplicación, crea los trabajadores y supervisa hasta recibir SIGTERM/SIGINT"""
+        self._preparar()
+        signal.signal(signal.SIGTERM, self._al_detener)
+        signal.signal(signal.SIGINT, self._al_detener)
+        signal.signal(signal.SIGHUP, self._al_reiniciar)
+
+        print(f"Servidor pre-fork en http://{self.host}:{self.puerto} "
+              f"con {self.trabajadores} trabajadores (maestro {os.getpid()})")
+        for ranura in range(self.trabajadores):
+            self._lanzar(ranura)
+
+        proxima_revision = time.monotonic() + self.aplicacion.modelos.intervalo_sondeo
+        try:
+            while not self._detener:
+                self._recoger()
+                self._revisar_latidos()
+                if self.vigilar and time.monotonic() >= proxima_revision:
+                    proxima_revision = time.monotonic() + self.aplicacion.modelos.intervalo_sondeo
+                    if self.aplicacion.modelos.revisar():
+                        self._reiniciar = True
+                if self._reiniciar:
+                    self._reiniciar = False
+                    self._reinicio_escalonado()
+                self._guardar_estado()
+                time.sleep(0.5)
+        finally:
+            self._apagar()
+
+    def _al_detener(self, signum, frame):
+        self._detener = True
+
+    def _al_reiniciar(self, signum, frame):
+        self._reiniciar = True
+
+    def _lanzar(self, ranura):
+        # Ocupa un espacio libre del arreglo compartido: ningún otro proceso vivo escribe en él
+        espacio = self._libres.pop(0)
+        base = espacio * CAMPOS
+        self._estado[base + LATIDO] = 0.0
+        self._estado[base + PETICIONES] = 0.0
+        self._estado[base + EN_CURSO] = 0.0
+        pid = os.fork()
+        if pid == 0:
+            codigo = 1
+            try:
+                codigo = self._ejecutar_trabajador(espacio)
+            except BaseException as e:
+                print(f"Trabajador {os.getpid()} terminó con error: {e}", file=sys.stderr)
+            finally:
+                os._exit(codigo)
+        self._espacios[pid] = espacio
+        self._pids[ranura] = pid
+        return pid
+
+    def _liberar(self, pid):
+        # El proceso ya fue recogido: su espacio puede reutilizarse
+        espacio = self._espacios.pop(pid, None)
+        if espacio is not None:
+            self._libres.append(espacio)
+
+    def _recoger(self):
+        # Recoge los trabajadores terminados y reemplaza los que no se retiraron a propósito
+        while True:
+            try:
+                pid, estado = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self._liberar(pid)
+            if pid in self._retirados:
+                self._retirados.discard(pid)
+                continue
+            for ranura, actual in list(self._pids.items()):
+                if actual == pid:
+                    print(f"Trabajador {pid} terminó inesperadamente (estado {estado}); se reemplaza")
+                    self._reinicios[ranura] += 1
+                    if not self._detener:
+                        self._lanzar(ranura)
+
+    def _revisar_latidos(self):
+        ahora = time.time()
+        for ranura, pid in self._pids.items():
+            if pid not in self._espacios:
+                continue
+            base = self._espacios[pid] * CAMPOS
+            latido = self._estado[base + LATIDO]
+            if latido and ahora - latido > self.latido_max:
+                print(f"Trabajador {pid} sin latido hace {ahora - latido:.0f} s; se termina")
+                self._estado[base + LATIDO] = 0.0
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    def _esperar_espacio_libre(self):
+        # Con dos espacios por trabajador solo falta uno si hay retirados de un reinicio anterior
+        # todavía terminando sus peticiones; pasada la gracia se fuerzan
+        limite = time.monotonic() + self.gracia + 5
+        while not self._libres:
+            self._recoger()
+            if self._libres:
+                return
+            if time.monotonic() >= limite:
+                for pid in list(self._retirados):
+                    print(f"Trabajador {pid} no terminó a tiempo; se fuerza")
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                limite = time.monotonic() + self.gracia + 5
+            time.sleep(0.05)
+
+    def _esperar_latido(self, pid):
+        # True cuando el trabajador nuevo late en su propio espacio; False si murió o no arrancó a tiempo
+        base = self._espacios[pid] * CAMPOS
+        limite = time.monotonic() + self.latido_max
+        while not self._estado[base + LATIDO]:
+            try:
+                terminado = os.waitpid(pid, os.WNOHANG)[0] == pid
+            except ChildProcessError:
+                terminado = True
+            if terminado:
+                self._liberar(pid)
+                return False
+            if time.monotonic() >= limite:
+                self._retirados.add(pid)
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _reinicio_escalonado(self):
+        """Reemplaza los trabajadores uno a uno: el nuevo atiende antes de retirar al anterior"""
+        print(f"Reinicio escalonado con el modelo {self.aplicacion.modelos.nombre_activo()}")
+        self._precargar()
+        for ranura in range(self.trabajadores):
+            self._esperar_espacio_libre()
+            anterior = self._pids.get(ranura)
+            nuevo = self._lanzar(ranura)
+            if not self._esperar_latido(nuevo):
+                # El anterior sigue atendiendo; el reinicio se reintenta con el próximo SIGHUP o modelo
+                print(f"Advertencia: el trabajador de reemplazo {nuevo} no arrancó; "
+                      f"se conserva {anterior} y se interrumpe el reinicio escalonado")
+                if anterior is not None:
+                    self._pids[ranura] = anterior
+                else:
+                    self._pids.pop(ranura, None)
+                return
+            if anterior is not None:
+                self._retirados.add(anterior)
+                try:
+                    os.kill(anterior, signal.SIGTERM)
+                except ProcessLookupError:
+                    self._retirados.discard(anterior)
+
+    def _apagar(self):
+        print("Deteniendo trabajadores...")
+        pendientes = set(self._pids.values()) | self._retirados
+        for pid in pendientes:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        limite = time.monotonic() + self.gracia + 5
+        while pendientes and time.monotonic() < limite:
+            for pid in list(pendientes):
+                try:
+                    if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                        pendientes.discard(pid)
+                except ChildProcessError:
+                    pendientes.discard(pid)
+            time.sleep(0.1)
+        for pid in pendientes:
+            print(f"Trabajador {pid} no terminó a tiempo; se fuerza")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self._socket.close()
+        self._guardar_estado()
+
+    def describir(self):
+        """Estado de cada trabajador: pid, peticiones atendidas, en curso y antigüedad del latido"""
+        ahora = time.time()
+        trabajadores = []
+        for ranura in range(self.trabajadores):
+            pid = self._pids.get(ranura)
+            if pid not in self._espacios:
+                trabajadores.append({'ranura': ranura, 'pid': None, 'peticiones': 0, 'en_curso': 0,
+                                     'segundos_desde_latido': None, 'reinicios': self._reinicios[ranura]})
+                continue
+            base = self._espacios[pid] * CAMPOS
+            latido = self._estado[base + LATIDO]
+            trabajadores.append({
+                'ranura': ranura,
+                'pid': pid,
+                'peticiones': int(self._estado[base + PETICIONES]),
+                'en_curso': int(self._estado[base + EN_CURSO]),
+                'segundos_desde_latido': round(ahora - latido, 3) if latido else None,
+                'reinicios': self._reinicios[ranura]
+            })
+        return {
+            'maestro': os.getpid(),
+            'detenido': self._detener,
+            'modelo': self.aplicacion.modelos.nombre_activo() if self.aplicacion else None,
+            'trabajadores': trabajadores,
+            'retirandose': sorted(self._retirados)
+        }
+
+    def _guardar_estado(self):
+        if not self.archivo_estado:
+            return
+        try:
+            directorio = os.path.dirname(self.archivo_estado)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            temporal = self.archivo_estado + '.tmp'
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(self.describir(), f, indent=2)
+            os.replace(temporal, self.archivo_estado)
+        except OSError as e:
+            print(f"No se pudo guardar el estado de los trabajadores: {e}")
+
+    # --- TRABAJADOR ---
+
+    def _ejecutar_trabajador(self, espacio):
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_DFL)
+        base = espacio * CAMPOS
+        estado = self._estado
+        candado = threading.Lock()
+        aplicacion_wsgi = self.aplicacion.app
+
+        def medir(environ, start_response):
+            # Cuenta peticiones en curso para poder esperarlas al detenerse
+            esperar = environ.get('PATH_INFO') not in RUTAS_SIN_ESPERA
+            with candado:
+                if esperar:
+                    estado[base + EN_CURSO] += 1
+                estado[base + PETICIONES] += 1
+                estado[base + LATIDO] = time.time()
+            try:
+                yield from aplicacion_wsgi(environ, start_response)
+            finally:
+                if esperar:
+                    with candado:
+                        estado[base + EN_CURSO] -= 1
+
+        manejador = WSGIRequestHandler if self.log_accesos else ManejadorSilencioso
+        servidor = make_server(self.host, self.puerto, medir, threaded=True,
+                               request_handler=manejador, fd=self._socket.fileno())
+
+        def latir():
+            estado[base + LATIDO] = time.time()
+
+        servidor.service_actions = latir
+
+        def detener(signum, frame):
+            # shutdown() espera al bucle de serve_forever: no puede llamarse desde su mismo hilo
+            threading.Thread(target=servidor.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, detener)
+        latir()
+        servidor.serve_forever(poll_interval=0.5)
+
+        # Sin aceptar conexiones nuevas: esperar las peticiones en curso
+        limite = time.monotonic() + self.gracia
+        while estado[base + EN_CURSO] > 0 and time.monotonic() < limite:
+            time.sleep(0.05)
+        self.aplicacion.registro.cerrar()
+        self.aplicacion.agregador.guardar_snapshot(True)
+        return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor pre-fork del servicio de predicción de morosidad")
+    parser.add_argument("--trabajadores", type=int, default=os.cpu_count() or 1,
+                        help="Procesos trabajadores (por defecto, uno por CPU).")
+    parser.add_argument("--host", type=str, default="0.0.0.0", help="Dirección de escucha.")
+    parser.add_argument("--puerto", type=int, default=5000, help="Puerto de escucha (0 = libre).")
+    parser.add_argument("--gracia", type=float, default=30.0,
+                        help="Segundos de espera a las peticiones en curso al detenerse.")
+    parser.add_argument("--latido_max", type=float, default=30.0,
+                        help="Segundos sin latido tras los que se reemplaza un trabajador.")
+    parser.add_argument("--sin_vigilancia", action="store_true",
+                        help="No revisar 'output' en busca de modelos nuevos (usar SIGHUP).")
+    parser.add_argument("--estado", type=str, default="logs/trabajadores.json",
+                        help="Archivo JSON con el estado de los trabajadores.")
+    parser.add_argument("--log_accesos", action="store_true", help="Registrar cada petición en stderr.")
+    args = parser.parse_args()
+
+    ServidorPrefork(
+        trabajadores=args.trabajadores,
+        host=args.host,
+        puerto=args.puerto,
+        gracia=args.gracia,
+        latido_max=args.latido_max,
+        vigilar=not args.sin_vigilancia,
+        archivo_estado=args.estado,
+        log_accesos=args.log_accesos
+    ).iniciar()
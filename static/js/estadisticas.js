@@ -1,12 +1,51 @@
 // Script para la página de estadísticas
 
+// Intervalo de consulta cuando el flujo en vivo no está disponible
+const INTERVALO_CONSULTA_MS = 30000;
+let temporizadorConsulta = null;
+
 document.addEventListener('DOMContentLoaded', function() {
     cargarEstadisticas();
-    
-    // Auto-actualizar cada 30 segundos
-    setInterval(cargarEstadisticas, 30000);
+
+    // Actualización en vivo mediante Server-Sent Events (consulta periódica como respaldo)
+    conectarFlujo();
 });
 
+function conectarFlujo() {
+    if (!window.EventSource) {
+        iniciarConsultaPeriodica();
+        return;
+    }
+
+    const flujo = new EventSource('/api/estadisticas/stream');
+
+    flujo.addEventListener('estadisticas', function(evento) {
+        actualizarInterfaz(JSON.parse(evento.data));
+    });
+
+    flujo.onopen = function() {
+        detenerConsultaPeriodica();
+    };
+
+    flujo.onerror = function() {
+        // El navegador reintenta la conexión; mientras tanto se consulta periódicamente
+        iniciarConsultaPeriodica();
+    };
+}
+
+function iniciarConsultaPeriodica() {
+    if (temporizadorConsulta === null) {
+        temporizadorConsulta = setInterval(cargarEstadisticas, INTERVALO_CONSULTA_MS);
+    }
+}
+
+function detenerConsultaPeriodica() {
+    if (temporizadorConsulta !== null) {
+        clearInterval(temporizadorConsulta);
+        temporizadorConsulta = null;
+    }
+}
+
 async function cargarEstadisticas() {
     try {
         const response = await fetch('/api/estadisticas');
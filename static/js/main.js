@@ -221,7 +221,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 'Dependiente': 4500,
                 'Independiente': 4000,
                 'Agricola': 3500,
-                'Gobierno': 5000
+                'Comerciante': 4000
             };
             
             if (!ingresosInput.value && this.value in ingresosSugeridos) {
@@ -54,7 +54,7 @@ datos_cliente_3 = {
     "edad": 45,
     "genero": "M",
     "zona": "Urbana",
-    "tipo_empleo": "Gobierno",
+    "tipo_empleo": "Dependiente",
     "antiguedad": 20,
     "ingresos": 8000.00,
     "score_crediticio": 810,
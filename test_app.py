@@ -0,0 +1,42 @@
+"""
+Pruebas de los endpoints de la aplicación web (cliente de prueba de Flask, sin servidor)
+"""
+import importlib
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(scope='module')
+def aplicacion(tmp_path_factory):
+    """Importa app.py desde un directorio temporal (logs y output vacíos) sin vigilar modelos"""
+    directorio = tmp_path_factory.mktemp('app')
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(directorio)
+        mp.setenv('MOROSIDAD_VIGILAR_MODELOS', '0')
+        mp.syspath_prepend(RAIZ)
+        sys.modules.pop('app', None)
+        modulo = importlib.import_module('app')
+        yield modulo
+    sys.modules.pop('app', None)
+
+
+@pytest.fixture
+def cliente(aplicacion, monkeypatch):
+    # Cualquier versión activa basta: las peticiones inválidas se rechazan antes de usar el modelo
+    monkeypatch.setattr(aplicacion.modelos, 'activo', object())
+    return aplicacion.app.test_client()
+
+
+def test_lote_json_malformado(cliente):
+    respuesta = cliente.post('/predecir/lote', data='[{"edad": 35,', content_type='application/json')
+    assert respuesta.status_code == 400
+    assert 'arreglo JSON' in respuesta.get_json()['error']
+
+
+def test_lote_no_es_lista(cliente):
+    respuesta = cliente.post('/predecir/lote', json={'edad': 35})
+    assert respuesta.status_code == 400
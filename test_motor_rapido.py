@@ -0,0 +1,118 @@
+"""
+Prueba de equivalencia entre el motor de inferencia rápida y el pipeline de sklearn
+"""
+import functools
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from morosidadTrain import ClasificadorMorosidad
+from motor_rapido import compilar_motor
+
+warnings.filterwarnings('ignore')
+
+DATASET = 'dataset_credito_morosidad.csv'
+
+
+@functools.lru_cache(maxsize=None)
+def clasificador_preparado():
+    """Datos divididos y preprocesador del entrenamiento, sin artefactos en output/"""
+    clf = ClasificadorMorosidad(DATASET, output_dir=tempfile.mkdtemp(), cache_dir=None, usar_cache_datos=False)
+    clf.load_data()
+    clf.detectar_target()
+    clf.dividir_datos()
+    clf.crear_pipeline_preprocesamiento()
+    return clf
+
+
+def ajustar_pipeline(modelo):
+    """Ajusta el preprocesamiento del entrenamiento + modelo sobre X_train"""
+    clf = clasificador_preparado()
+    pipeline = Pipeline(steps=[('preprocessor', clone(clf.preprocessor)), ('model', modelo)])
+    return pipeline.fit(clf.X_train, clf.y_train)
+
+
+@functools.lru_cache(maxsize=None)
+def cargar_pipeline_y_datos():
+    """Pipeline logístico ajustado en la prueba y el dataset con algunos casos borde añadidos"""
+    pipeline = ajustar_pipeline(LogisticRegression(random_state=42, max_iter=1000, class_weight='balanced'))
+
+    df = pd.read_csv(DATASET)
+    df = df.drop(columns=[c for c in df.columns if c.startswith('default')])
+    # Valores faltantes y categorías desconocidas
+    df.loc[0, 'edad'] = np.nan
+    df.loc[1, 'ingresos'] = np.nan
+    df.loc[2, 'zona'] = np.nan
+    df.loc[3, 'tipo_empleo'] = 'Gobierno'
+    df.loc[4, 'tipo_garantia'] = None
+    return pipeline, df
+
+
+def test_equivalencia_float64():
+    pipeline, df = cargar_pipeline_y_datos()
+    motor = compilar_motor(pipeline)
+    assert motor is not None
+
+    esperado = pipeline.predict_proba(df)
+    np.testing.assert_allclose(motor.predict_proba(df), esperado, rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(motor.predict(df), pipeline.predict(df))
+
+
+def test_equivalencia_formatos_de_entrada():
+    pipeline, df = cargar_pipeline_y_datos()
+    motor = compilar_motor(pipeline)
+    esperado = pipeline.predict_proba(df)[:, 1]
+
+    registros = df.to_dict('records')
+    np.testing.assert_allclose(motor.predict_proba(registros)[:, 1], esperado, atol=1e-12)
+    np.testing.assert_allclose(motor.predict_proba(df.to_records(index=False))[:, 1], esperado, atol=1e-12)
+    individuales = [motor.probabilidad_moroso(r) for r in registros[:50]]
+    np.testing.assert_allclose(individuales, esperado[:50], atol=1e-12)
+
+
+def test_equivalencia_float32():
+    pipeline, df = cargar_pipeline_y_datos()
+    motor = compilar_motor(pipeline, dtype=np.float32)
+
+    np.testing.assert_allclose(motor.predict_proba(df), pipeline.predict_proba(df), rtol=0, atol=1e-5)
+
+
+def test_equivalencia_sgd_incremental():
+    from entrenamiento_incremental import EntrenadorIncremental
+    _, df = cargar_pipeline_y_datos()
+    pipeline = EntrenadorIncremental(DATASET, tamano_bloque=1000, epocas=2).entrenar()
+    motor = compilar_motor(pipeline)
+    assert motor is not None
+
+    np.testing.assert_allclose(motor.predict_proba(df), pipeline.predict_proba(df), rtol=0, atol=1e-12)
+
+
+def test_pipeline_no_compatible():
+    pipeline, _ = cargar_pipeline_y_datos()
+    assert compilar_motor(pipeline.named_steps['model']) is None
+
+
+def test_pipeline_no_compilable():
+    # Misma forma de pipeline pero con un modelo que no es logístico
+    pipeline = ajustar_pipeline(RandomForestClassifier(n_estimators=10, random_state=42))
+    assert compilar_motor(pipeline) is None
+
+
+if __name__ == "__main__":
+    print("\n" + "="*70)
+    print(" PRUEBAS DE EQUIVALENCIA DEL MOTOR RÁPIDO")
+    print("="*70)
+
+    for prueba in [test_equivalencia_float64, test_equivalencia_formatos_de_entrada,
+                   test_equivalencia_float32, test_equivalencia_sgd_incremental, test_pipeline_no_compatible,
+                   test_pipeline_no_compilable]:
+        prueba()
+        print(f" OK: {prueba.__name__}")
+
+    print("="*70 + "\n")